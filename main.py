@@ -2,66 +2,356 @@
 """
 Smart iTop Query Processor V2 - Simplified and Class-Specific
 """
+import asyncio
 import json
 import os
 import re
-from typing import Any, Optional, Dict, List
+import sys
+import time
+from collections import Counter, defaultdict, deque, namedtuple
+from contextlib import asynccontextmanager
+from functools import lru_cache, wraps
+from itertools import islice
+from typing import Any, Callable, Optional, Dict, List
+from urllib.parse import quote_plus, urlencode
 from datetime import datetime, timedelta
 
 import httpx
 from fastmcp import FastMCP
 
+# Optional speedups (pip install itop-mcp[speedups])
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# HTTP/2 support in httpx needs the h2 package (pip install itop-mcp[http2])
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# JSON encoding/decoding for the REST payloads; orjson's errors subclass json.JSONDecodeError
+if orjson is not None:
+    _json_dumps = orjson.dumps
+    _json_loads = orjson.loads
+else:
+    def _json_dumps(obj: Any) -> str:
+        return json.dumps(obj, separators=(",", ":"))
+    _json_loads = json.loads
+
+
+@asynccontextmanager
+async def _lifespan(server):
+    """Close the pooled iTop connection when the server shuts down"""
+    try:
+        yield {}
+    finally:
+        if _itop_client is not None:
+            await _itop_client.aclose()
+
 # Initialize FastMCP server
-mcp = FastMCP("itop-mcp")
+mcp = FastMCP("itop-mcp", lifespan=_lifespan)
 
 # Configuration
 ITOP_BASE_URL = os.getenv("ITOP_BASE_URL", "")
 ITOP_USER = os.getenv("ITOP_USER", "")
 ITOP_PASSWORD = os.getenv("ITOP_PASSWORD", "")
 ITOP_VERSION = os.getenv("ITOP_VERSION", "1.4")
+# Connection pool sizing for the shared HTTP client
+ITOP_MAX_CONNECTIONS = int(os.getenv("ITOP_MAX_CONNECTIONS", "50"))
+ITOP_KEEPALIVE_EXPIRY = float(os.getenv("ITOP_KEEPALIVE_EXPIRY", "60"))
+# HTTP/2 is negotiated (ALPN) when h2 is installed, unless disabled here
+ITOP_HTTP2 = os.getenv("ITOP_HTTP2", "true").lower() not in ("0", "false", "no")
+# Seconds a successful core/get response is reused for identical requests (0 disables)
+ITOP_CACHE_TTL = float(os.getenv("ITOP_CACHE_TTL", "10"))
+
+
+def _freeze(value: Any) -> Any:
+    """Recursively convert a JSON-like value into a hashable equivalent"""
+    if isinstance(value, dict):
+        return frozenset((key, _freeze(item)) for key, item in value.items())
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    if isinstance(value, str) or value is None:
+        return value
+    # Keep the type so True/1/1.0 do not share a cache entry
+    return (type(value), value)
+
+
+class _FrozenOperation:
+    """Hashable wrapper carrying an operation dict alongside its frozen key"""
+    
+    __slots__ = ("key", "operation")
+    
+    def __init__(self, operation: dict):
+        self.key = _freeze(operation)
+        self.operation = operation
+    
+    def __hash__(self) -> int:
+        return hash(self.key)
+    
+    def __eq__(self, other: Any) -> bool:
+        return isinstance(other, _FrozenOperation) and self.key == other.key
+
+
+@lru_cache(maxsize=256)
+def _encode_frozen_operation(frozen_operation: _FrozenOperation) -> str:
+    return quote_plus(_json_dumps(frozen_operation.operation))
+
+
+# Operations whose payloads are one-off by nature and not worth caching
+_UNCACHED_OPERATIONS = frozenset({"core/create", "core/update", "core/delete", "core/apply_stimulus"})
+
+# Read-only operations that concurrent identical callers can share one round-trip for
+_COALESCED_OPERATIONS = frozenset({"core/get"})
+
+def _encode_operation(operation_data: dict) -> str:
+    """JSON-encode and form-quote an operation, reusing the result for repeated operations"""
+    if operation_data.get("operation") in _UNCACHED_OPERATIONS:
+        return quote_plus(_json_dumps(operation_data))
+    try:
+        return _encode_frozen_operation(_FrozenOperation(operation_data))
+    except TypeError:
+        # Unhashable leaf values (e.g. sets) are simply encoded every time
+        return quote_plus(_json_dumps(operation_data))
+
+
+class _BoundedCache(dict):
+    """Insertion-ordered dict that evicts its oldest entry once it holds maxsize entries"""
+    
+    def __init__(self, maxsize: int):
+        super().__init__()
+        self.maxsize = maxsize
+    
+    def put(self, key: Any, value: Any) -> None:
+        """Store value under key as the newest entry, evicting the oldest one when full"""
+        self.pop(key, None)
+        if len(self) >= self.maxsize:
+            # Evict the oldest entry (dicts keep insertion order)
+            del self[next(iter(self))]
+        self[key] = value
 
 
 class ITopClient:
     """Client for interacting with iTop REST API"""
     
+    _RESPONSE_CACHE_SIZE = 256
+    
     def __init__(self, base_url: str, username: str, password: str, version: str = "1.4"):
         self.base_url = base_url.rstrip("/")
         self.username = username
         self.password = password
         self.version = version
         self.rest_url = f"{self.base_url}/webservices/rest.php"
-    
-    async def make_request(self, operation_data: dict) -> dict:
-        """Make a REST request to iTop"""
-        headers = {
-            "User-Agent": "iTop-MCP-Server/1.0",
-            "Content-Type": "application/x-www-form-urlencoded"
-        }
-        
-        data = {
-            "version": self.version,
-            "auth_user": self.username,
-            "auth_pwd": self.password,
-            "json_data": json.dumps(operation_data)
-        }
-        
-        async with httpx.AsyncClient(timeout=30.0) as client:
+        self._client: Optional[httpx.AsyncClient] = None
+        # Identical read requests currently on the wire, keyed by encoded operation
+        self._inflight: Dict[str, asyncio.Future] = {}
+        # Recent read responses: encoded operation -> (expiry on the monotonic clock, result)
+        self._responses = _BoundedCache(self._RESPONSE_CACHE_SIZE)
+        # Bumped by every write; reads started under an older generation are not cached
+        self._write_generation = 0
+        # Version and credentials never change, so form-encode them once
+        self._auth_form = urlencode({
+            "version": version,
+            "auth_user": username,
+            "auth_pwd": password
+        }) + "&json_data="
+    
+    def _get_http_client(self) -> httpx.AsyncClient:
+        """Get the pooled HTTP client, creating it on first use"""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=30.0,
+                http2=ITOP_HTTP2 and HTTP2_AVAILABLE,
+                headers={
+                    "User-Agent": "iTop-MCP-Server/1.0",
+                    "Content-Type": "application/x-www-form-urlencoded"
+                },
+                limits=httpx.Limits(
+                    max_connections=ITOP_MAX_CONNECTIONS,
+                    max_keepalive_connections=min(20, ITOP_MAX_CONNECTIONS),
+                    keepalive_expiry=ITOP_KEEPALIVE_EXPIRY
+                )
+            )
+        return self._client
+    
+    async def aclose(self) -> None:
+        """Close the pooled HTTP client and its keep-alive connections"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+    
+    async def make_request(self, operation_data: dict, cache_bust: bool = False) -> dict:
+        """Make a REST request to iTop
+        
+        Identical concurrent reads share a single request, and successful reads are reused
+        for ITOP_CACHE_TTL seconds unless cache_bust is set.
+        """
+        encoded_json_data = _encode_operation(operation_data)
+        operation = operation_data.get("operation")
+        if operation not in _COALESCED_OPERATIONS:
+            if operation not in _UNCACHED_OPERATIONS:
+                return await self.make_encoded_request(encoded_json_data)
+            # Writes can change what any cached or in-flight read would return, both those
+            # started before the write was sent and those started while it was on the wire
+            self._forget_reads()
             try:
-                response = await client.post(self.rest_url, data=data, headers=headers)
-                response.raise_for_status()
-                return response.json()
-            except httpx.RequestError as e:
-                raise ConnectionError(f"Request failed: {e}") from e
-            except httpx.HTTPStatusError as e:
-                raise ValueError(f"HTTP error {e.response.status_code}: {e.response.text}") from e
-            except json.JSONDecodeError as e:
-                raise ValueError(f"Invalid JSON response: {e}") from e
+                return await self.make_encoded_request(encoded_json_data)
+            finally:
+                self._forget_reads()
+        
+        if not cache_bust:
+            cached = self._responses.get(encoded_json_data)
+            if cached is not None and cached[0] > time.monotonic():
+                return cached[1]
+        
+        pending = self._inflight.get(encoded_json_data)
+        if pending is None:
+            pending = asyncio.ensure_future(self.make_encoded_request(encoded_json_data))
+            self._inflight[encoded_json_data] = pending
+            generation = self._write_generation
+            pending.add_done_callback(lambda task: self._finish_read(encoded_json_data, task, generation))
+        # Shielded so one cancelled caller does not cancel the request for the others
+        return await asyncio.shield(pending)
+    
+    def _forget_reads(self) -> None:
+        """Start a new write generation and drop every cached and in-flight read"""
+        self._write_generation += 1
+        self._responses.clear()
+        self._inflight.clear()
+    
+    def _finish_read(self, encoded_json_data: str, task: asyncio.Future, generation: int) -> None:
+        """Drop a completed read from the in-flight map and cache its result if it succeeded
+        
+        Results of reads that overlapped a write are returned to their callers but not cached.
+        """
+        if self._inflight.get(encoded_json_data) is task:
+            self._inflight.pop(encoded_json_data)
+        if generation != self._write_generation:
+            return
+        if ITOP_CACHE_TTL <= 0 or task.cancelled() or task.exception() is not None:
+            return
+        result = task.result()
+        if not isinstance(result, dict) or result.get("code") != 0:
+            return
+        self._responses.put(encoded_json_data, (time.monotonic() + ITOP_CACHE_TTL, result))
+    
+    async def make_encoded_request(self, encoded_json_data: str) -> dict:
+        """Make a REST request from an already JSON-encoded and form-quoted operation"""
+        body = self._auth_form + encoded_json_data
+        
+        try:
+            response = await self._get_http_client().post(self.rest_url, content=body)
+            response.raise_for_status()
+            return _json_loads(response.content)
+        except httpx.RequestError as e:
+            raise ConnectionError(f"Request failed: {e}") from e
+        except httpx.HTTPStatusError as e:
+            raise ValueError(f"HTTP error {e.response.status_code}: {e.response.text}") from e
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON response: {e}") from e
+    
+    async def make_requests_batch(self, operations: List[dict]) -> List[dict]:
+        """Make several independent REST requests concurrently over the shared pool"""
+        return list(await asyncio.gather(*(self.make_request(operation) for operation in operations)))
+
+# Shared client so every tool call reuses the same connection pool
+_itop_client: Optional[ITopClient] = None
 
 def get_itop_client() -> ITopClient:
     """Get configured iTop client"""
+    global _itop_client
     if not all([ITOP_BASE_URL, ITOP_USER, ITOP_PASSWORD]):
         raise ValueError("Missing required environment variables: ITOP_BASE_URL, ITOP_USER, ITOP_PASSWORD")
-    return ITopClient(ITOP_BASE_URL, ITOP_USER, ITOP_PASSWORD, ITOP_VERSION)
+    if _itop_client is None:
+        _itop_client = ITopClient(ITOP_BASE_URL, ITOP_USER, ITOP_PASSWORD, ITOP_VERSION)
+    return _itop_client
+
+# =============================================================================
+# Keyword Automaton - Multi-keyword matching in a single pass
+# =============================================================================
+
+class _KeywordAutomaton:
+    """Pure-Python Aho-Corasick automaton, used when pyahocorasick is not installed.
+    
+    Implements the subset of the ahocorasick.Automaton API used here:
+    add_word(), make_automaton() and iter() yielding (end_index, value).
+    """
+    
+    def __init__(self):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._values: Dict[int, Any] = {}
+        self._fail: List[int] = [0]
+        self._output: List[List[Any]] = [[]]
+    
+    def add_word(self, word: str, value: Any) -> bool:
+        state = 0
+        for char in word:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = next_state
+        self._values[state] = value
+        return True
+    
+    def make_automaton(self) -> None:
+        # Breadth-first so every failure target is resolved before it is used
+        order = []
+        queue = deque()
+        for state in self._goto[0].values():
+            self._fail[state] = 0
+            queue.append(state)
+        
+        while queue:
+            state = queue.popleft()
+            order.append(state)
+            own = [self._values[state]] if state in self._values else []
+            self._output[state] = own + self._output[self._fail[state]]
+            for char, next_state in self._goto[state].items():
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(char, 0)
+                queue.append(next_state)
+        
+        # Fold the failure links into a complete transition table (a DFA), so scanning is
+        # one dict lookup per character; characters with no transition go back to the root
+        delta = [None] * len(self._goto)
+        delta[0] = dict(self._goto[0])
+        for state in order:
+            delta[state] = {**delta[self._fail[state]], **self._goto[state]}
+        self._delta = delta
+        self._outputs = tuple(tuple(values) for values in self._output)
+    
+    def iter(self, haystack: str):
+        delta, outputs = self._delta, self._outputs
+        state = 0
+        for index, char in enumerate(haystack):
+            state = delta[state].get(char, 0)
+            if outputs[state]:
+                for value in outputs[state]:
+                    yield index, value
+
+
+def _build_keyword_automaton(words):
+    """Build an automaton from (keyword, value) pairs, using pyahocorasick when available"""
+    automaton = ahocorasick.Automaton() if ahocorasick is not None else _KeywordAutomaton()
+    for word, value in words:
+        automaton.add_word(word, value)
+    automaton.make_automaton()
+    return automaton
+
 
 ITOP_CLASS_TAXONOMY = {
     "SearchUseCases": [
@@ -177,82 +467,182 @@ ITOP_CLASS_TAXONOMY = {
     ]
 }
 
+# Immutable taxonomy records; ITOP_CLASS_TAXONOMY stays the editable source of truth
+TaxonomyCategory = namedtuple("TaxonomyCategory", "name classes keywords description")
+
+_TAX_CATEGORIES = tuple(
+    TaxonomyCategory(
+        category["name"],
+        tuple(category["classes"]),
+        tuple(category.get("keywords", ())),
+        category.get("description", "")
+    )
+    for category_list in ITOP_CLASS_TAXONOMY.values()
+    for category in category_list
+)
+
+# Flattened taxonomy as parallel (structure-of-arrays) tuples built once at import
+_TAX_CATEGORY_NAMES = tuple(category.name for category in _TAX_CATEGORIES)
+
+# One keyword entry per (keyword, category) - multi-word keywords get higher scores
+_TAX_KEYWORDS, _TAX_KEYWORD_SCORES, _TAX_KEYWORD_CATEGORIES = zip(*(
+    (keyword, len(keyword.split()) * 15, category_index)
+    for category_index, category in enumerate(_TAX_CATEGORIES)
+    for keyword in category.keywords
+))
+
+# One class entry per distinct (class, category) in taxonomy order, which breaks
+# score ties (some categories list a class twice)
+_TAX_CLASS_NAMES, _TAX_CLASS_CATEGORIES = zip(*dict.fromkeys(
+    (class_name, category_index)
+    for category_index, category in enumerate(_TAX_CATEGORIES)
+    for class_name in category.classes
+))
+
+# category index -> its class entry indexes
+_TAX_CATEGORY_CLASS_ENTRIES = tuple(
+    frozenset(index for index, class_category in enumerate(_TAX_CLASS_CATEGORIES) if class_category == category_index)
+    for category_index in range(len(_TAX_CATEGORIES))
+)
+
+# Lowercased class names, matched against the query for the class name bonus
+_TAX_CLASS_NAMES_LOWER = tuple(class_name.lower() for class_name in _TAX_CLASS_NAMES)
+
+# word -> (keyword entry indexes, class entry indexes). A keyword can belong to
+# several categories and can also be a class name (e.g. "server")
+_TAX_WORD_ENTRIES: Dict[str, tuple] = {}
+for _index, _word in enumerate(_TAX_KEYWORDS):
+    _keyword_entries, _class_entries = _TAX_WORD_ENTRIES.get(_word, ((), ()))
+    _TAX_WORD_ENTRIES[_word] = (_keyword_entries + (_index,), _class_entries)
+for _index, _word in enumerate(_TAX_CLASS_NAMES_LOWER):
+    _keyword_entries, _class_entries = _TAX_WORD_ENTRIES.get(_word, ((), ()))
+    _TAX_WORD_ENTRIES[_word] = (_keyword_entries, _class_entries + (_index,))
+
+# Every taxonomy keyword and class name in one automaton, reporting the word's entries
+_TAXONOMY_AUTOMATON = _build_keyword_automaton(_TAX_WORD_ENTRIES.items())
+
+# Priority routing rules checked before taxonomy scoring, in order. Each rule is
+# one anchored pattern whose lookaheads test for (or against) substrings anywhere
+# in the query, so every rule costs a single regex call
+_PRIORITY_CLASS_RULES = tuple(
+    (re.compile(pattern, re.DOTALL), class_name, confidence, analysis)
+    for pattern, class_name, confidence, analysis in (
+        # PRIORITY 1: Handle entity + relationship queries (give precedence to main entity)
+        # "network devices and their location" should route to NetworkDevice, not Location
+        (r"(?=.*network device)(?=.*location)",
+         "NetworkDevice", 0.95, {"action": "list", "include_relationships": True}),
+        # "software applications installed on server" should route to Server, not Software
+        (r"(?=.*(?:software|application))(?=.*server)",
+         "Server", 0.95, {"action": "list", "include_relationships": True}),
+        # PRIORITY 2: Generic "tickets" (without "support") should use Ticket class
+        (r"(?!.*support)(?!.*user request)(?=.*tickets)",
+         "Ticket", 0.90, {"action": "list", "generic_tickets": True}),
+        # PRIORITY 3: SLA/support ticket queries should use UserRequest (but not for change requests)
+        (r"(?!.*change)(?=.*(?:sla|support ticket))",
+         "UserRequest", 0.95, {"action": "list", "time_analysis": True}),
+        # PRIORITY 4: Team assignment queries - Use UserRequest for most team-based ticket queries
+        (r"(?=.*team)(?=.*(?:ticket|user request|support|assigned))",
+         "UserRequest", 0.90, {"action": "list", "team_filter": True}),
+        # PRIORITY 5: Contact vs Person disambiguation for service managers
+        (r"(?=.*contact)(?=.*service manager)",
+         "Contact", 0.95, {"action": "list", "role_filter": True}),
+    )
+)
+
 def smart_class_detection(query: str) -> tuple[str, float, dict]:
     """
     Enhanced class detection with priority handling
     Returns:
         tuple: (best_class_name, confidence_score, query_analysis)
     """
-    query_lower = query.lower()
-    best_matches = []
-    
-    # PRIORITY 1: Handle entity + relationship queries (give precedence to main entity)
-    # "network devices and their location" should route to NetworkDevice, not Location
-    if "network device" in query_lower and "location" in query_lower:
-        return "NetworkDevice", 0.95, {"action": "list", "include_relationships": True}
-    
-    # "software applications installed on server" should route to Server, not Software  
-    if ("software" in query_lower or "application" in query_lower) and "server" in query_lower:
-        return "Server", 0.95, {"action": "list", "include_relationships": True}
-    
-    # PRIORITY 2: Distinguish between generic tickets and support tickets
-    # Generic "tickets" (without "support") should use Ticket class
-    if "tickets" in query_lower and "support" not in query_lower and "user request" not in query_lower:
-        return "Ticket", 0.90, {"action": "list", "generic_tickets": True}
-    
-    # PRIORITY 3: SLA/support ticket queries should use UserRequest  
-    sla_patterns = ["sla", "support ticket", "support tickets", "sla issues", "with sla"]
-    for pattern in sla_patterns:
-        if pattern in query_lower and "change" not in query_lower:
-            # Force UserRequest for SLA queries (but not for change requests)
-            return "UserRequest", 0.95, {"action": "list", "time_analysis": True}
-    
-    # PRIORITY 4: Team assignment queries - Use UserRequest for most team-based ticket queries
-    if "team" in query_lower and any(ticket_word in query_lower for ticket_word in ["ticket", "tickets", "user request", "support", "assigned"]):
-        # Most team-related ticket queries should use UserRequest for better compatibility
-        return "UserRequest", 0.90, {"action": "list", "team_filter": True}
-    
-    # PRIORITY 5: Contact vs Person disambiguation for service managers
-    if "contact" in query_lower and "service manager" in query_lower:
-        return "Contact", 0.95, {"action": "list", "role_filter": True}
+    query = query.strip()
+    # Most queries are typed in lowercase already, skip the lower() copy for those
+    query_lower = query if query.islower() else query.lower()
+    class_name, confidence, analysis = _smart_class_detection_cached(query_lower)
+    # Callers get their own analysis dict so the cached one stays untouched
+    return class_name, confidence, dict(analysis)
+
+@lru_cache(maxsize=2048)
+def _smart_class_detection_cached(query_lower: str) -> tuple[str, float, dict]:
+    """Class detection for an already normalized (stripped, lowercased) query"""
+    # PRIORITY 1-5: Rule table, first matching rule wins
+    for rule, class_name, confidence, analysis in _PRIORITY_CLASS_RULES:
+        if rule.match(query_lower):
+            return class_name, confidence, analysis
     
     # PRIORITY 6: Standard taxonomy-based detection
-    for category_list in ITOP_CLASS_TAXONOMY.values():
-        for category in category_list:
-            for class_name in category["classes"]:
-                score = 0
-                
-                # Higher score for exact class name matches
-                if class_name.lower() in query_lower:
-                    score += 60
-                
-                # Score for keyword matches
-                for keyword in category.get("keywords", []):
-                    if keyword in query_lower:
-                        # Multi-word keywords get higher scores
-                        word_count = len(keyword.split())
-                        score += word_count * 15
-                        
-                        # Bonus for exact phrase matches
-                        if keyword == query_lower.strip():
-                            score += 30
-                
-                if score > 0:
-                    best_matches.append((class_name, score, category))
-    
-    best_matches.sort(key=lambda x: x[1], reverse=True)
-    
-    if best_matches:
-        best_class, best_score, best_category = best_matches[0]
-        
+    # Keyword scores are shared by every class of a category, so score each
+    # category once and then rank its classes
+    keyword_scores, keyword_categories = _TAX_KEYWORD_SCORES, _TAX_KEYWORD_CATEGORIES
+    category_scores = Counter()
+    class_name_matches = set()
+    for keyword_entries, class_entries in {entries for _, entries in _TAXONOMY_AUTOMATON.iter(query_lower)}:
+        for index in keyword_entries:
+            category_scores[keyword_categories[index]] += keyword_scores[index]
+        class_name_matches.update(class_entries)
+    
+    # Bonus for exact phrase matches
+    for index in _TAX_WORD_ENTRIES.get(query_lower, ((), ()))[0]:
+        category_scores[keyword_categories[index]] += 30
+    
+    # Only classes of a scored category or matched by name can score above zero
+    candidates = class_name_matches.union(
+        *(_TAX_CATEGORY_CLASS_ENTRIES[category_index] for category_index in category_scores)
+    )
+    
+    # Single pass argmax in taxonomy order; strict ">" keeps the first class on ties
+    best_class, best_score, best_category = None, 0, None
+    for index in sorted(candidates):
+        category_index = _TAX_CLASS_CATEGORIES[index]
+        score = category_scores[category_index]
+        
+        # Higher score for exact class name matches
+        if index in class_name_matches:
+            score += 60
+        
+        if score > best_score:
+            best_class, best_score, best_category = _TAX_CLASS_NAMES[index], score, category_index
+    
+    if best_class is not None:
         # Normalize confidence score (0-1)
         confidence = min(best_score / 100.0, 1.0)
         
-        return best_class, confidence, {"action": "list", "category": best_category["name"]}
+        return best_class, confidence, {"action": "list", "category": _TAX_CATEGORY_NAMES[best_category]}
     
     # Default fallback
     return "UserRequest", 0.1, {"action": "list", "fallback": True}
 
+# Count patterns tried in order of preference against the lowercased API message
+_COUNT_PATTERNS = tuple(re.compile(pattern) for pattern in (
+    # iTop common formats
+    r'found[:\s]*(\d+)',                    # "Found: 92", "Found 92", "found:92"
+    r'(\d+)\s*found',                       # "92 found", "92found"
+    r'(\d+)\s*objects?\s*found',            # "92 objects found", "1 object found"
+    r'found\s*(\d+)\s*objects?',            # "found 92 objects", "found 1 object"
+    r'(\d+)\s*objects?\s*returned',         # "92 objects returned"
+    r'returned\s*(\d+)\s*objects?',         # "returned 92 objects"
+    r'(\d+)\s*results?',                    # "92 results", "1 result"
+    r'results?\s*[:\s]*(\d+)',              # "results: 92", "results 92"
+    r'total[:\s]*(\d+)',                    # "total: 92", "total 92"
+    r'count[:\s]*(\d+)',                    # "count: 92", "count 92"
+    r'(\d+)\s*records?',                    # "92 records", "1 record"
+    r'records?\s*[:\s]*(\d+)',              # "records: 92"
+    r'(\d+)\s*entries',                     # "92 entries"
+    r'entries[:\s]*(\d+)',                  # "entries: 92"
+    # Generic number extraction as last resort
+    r'(\d+)'                                # Any number in the message
+))
+
+# All count patterns fused into one zero-width alternation: every position is tried
+# against the patterns in preference order, so a single scan finds the leftmost
+# match of the most preferred pattern (reported through match.lastindex)
+_COUNT_RE = re.compile("(?=" + "|".join(f"(?:{p.pattern})" for p in _COUNT_PATTERNS) + ")")
+
+# Bytes matched by [:\s] for ASCII text (re's \s also covers \x1c-\x1f)
+_COUNT_SEPARATOR_BYTES = frozenset(b": \t\n\r\x0b\x0c\x1c\x1d\x1e\x1f")
+
+# iTop repeats a handful of message shapes ("Found: 92"), so parsed counts are memoized
+@lru_cache(maxsize=1024)
 def _extract_count_from_message(message: str) -> int:
     """Extract count from API response message with flexible pattern matching."""
     try:
@@ -261,29 +651,41 @@ def _extract_count_from_message(message: str) -> int:
         
         message_lower = message.lower()
         
-        # Try multiple flexible patterns in order of preference
-        patterns = [
-            # iTop common formats
-            r'found[:\s]*(\d+)',                    # "Found: 92", "Found 92", "found:92"
-            r'(\d+)\s*found',                       # "92 found", "92found"
-            r'(\d+)\s*objects?\s*found',            # "92 objects found", "1 object found"
-            r'found\s*(\d+)\s*objects?',            # "found 92 objects", "found 1 object"
-            r'(\d+)\s*objects?\s*returned',         # "92 objects returned"
-            r'returned\s*(\d+)\s*objects?',         # "returned 92 objects"
-            r'(\d+)\s*results?',                    # "92 results", "1 result"
-            r'results?\s*[:\s]*(\d+)',              # "results: 92", "results 92"
-            r'total[:\s]*(\d+)',                    # "total: 92", "total 92"
-            r'count[:\s]*(\d+)',                    # "count: 92", "count 92"
-            r'(\d+)\s*records?',                    # "92 records", "1 record"
-            r'records?\s*[:\s]*(\d+)',              # "records: 92"
-            r'(\d+)\s*entries',                     # "92 entries"
-            r'entries[:\s]*(\d+)',                  # "entries: 92"
-            # Generic number extraction as last resort
-            r'(\d+)'                                # Any number in the message
-        ]
+        # Fast path for the usual iTop "Found: 92" message: scan the ASCII bytes by hand.
+        # Mirrors the most preferred pattern, found[:\s]*(\d+), at its leftmost match
+        if message_lower.isascii():
+            buffer = message_lower.encode("ascii")
+            start = buffer.find(b"found")
+            if start >= 0:
+                end = len(buffer)
+                digits_start = start + 5
+                while digits_start < end and buffer[digits_start] in _COUNT_SEPARATOR_BYTES:
+                    digits_start += 1
+                digits_end = digits_start
+                while digits_end < end and 0x30 <= buffer[digits_end] <= 0x39:
+                    digits_end += 1
+                if digits_end > digits_start:
+                    count = int(buffer[digits_start:digits_end])
+                    if count <= 1000000:
+                        return count
+        
+        best = None
+        for match in _COUNT_RE.finditer(message_lower):
+            if best is None or match.lastindex < best.lastindex:
+                best = match
+                if best.lastindex == 1:
+                    break
+        
+        if best is None:
+            return 0
+        
+        count = int(best.group(best.lastindex))
+        if 0 <= count <= 1000000:
+            return count
         
-        for pattern in patterns:
-            match = re.search(pattern, message_lower)
+        # Out of range: keep trying the less preferred patterns one by one
+        for pattern in _COUNT_PATTERNS[best.lastindex:]:
+            match = pattern.search(message_lower)
             if match:
                 count = int(match.group(1))
                 if 0 <= count <= 1000000:  # Up to 1M records seems reasonable
@@ -293,6 +695,10 @@ def _extract_count_from_message(message: str) -> int:
     except (ValueError, AttributeError):
         return 0
 
+def _copy_filter(filter_info: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy a filter dict and its list values (e.g. "values"), so edits never reach a cached filter"""
+    return {key: list(value) if isinstance(value, list) else value for key, value in filter_info.items()}
+
 # =============================================================================
 # Smart Filter Engine - Universal Filtering Logic
 # =============================================================================
@@ -324,17 +730,17 @@ class SmartFilterEngine:
             "escalated": {"patterns": ["escalated", "escalation"]}
         },
         
-        # Time patterns (universal)
+        # Time patterns (universal): cutoff = now - delta, rendered with format
         "time": {
-            "today": {"field": "start_date", "operator": ">=", "value_fn": lambda: datetime.now().strftime("%Y-%m-%d 00:00:00")},
-            "yesterday": {"field": "start_date", "operator": ">=", "value_fn": lambda: (datetime.now() - timedelta(days=1)).strftime("%Y-%m-%d 00:00:00")},
-            "this_week": {"field": "start_date", "operator": ">=", "value_fn": lambda: (datetime.now() - timedelta(days=7)).strftime("%Y-%m-%d 00:00:00")},
-            "last_7_days": {"field": "start_date", "operator": ">=", "value_fn": lambda: (datetime.now() - timedelta(days=7)).strftime("%Y-%m-%d 00:00:00")},
-            "last_15_days": {"field": "start_date", "operator": ">=", "value_fn": lambda: (datetime.now() - timedelta(days=15)).strftime("%Y-%m-%d 00:00:00")},
-            "last_30_days": {"field": "start_date", "operator": ">=", "value_fn": lambda: (datetime.now() - timedelta(days=30)).strftime("%Y-%m-%d 00:00:00")},
+            "today": {"field": "start_date", "operator": ">=", "delta": timedelta(0), "format": "%Y-%m-%d 00:00:00"},
+            "yesterday": {"field": "start_date", "operator": ">=", "delta": timedelta(days=1), "format": "%Y-%m-%d 00:00:00"},
+            "this_week": {"field": "start_date", "operator": ">=", "delta": timedelta(days=7), "format": "%Y-%m-%d 00:00:00"},
+            "last_7_days": {"field": "start_date", "operator": ">=", "delta": timedelta(days=7), "format": "%Y-%m-%d 00:00:00"},
+            "last_15_days": {"field": "start_date", "operator": ">=", "delta": timedelta(days=15), "format": "%Y-%m-%d 00:00:00"},
+            "last_30_days": {"field": "start_date", "operator": ">=", "delta": timedelta(days=30), "format": "%Y-%m-%d 00:00:00"},
             # FIXED: Use <= for "not updated in X hours" (items older than X hours)
-            "24_hours_old": {"field": "last_update", "operator": "<=", "value_fn": lambda: (datetime.now() - timedelta(hours=24)).strftime("%Y-%m-%d %H:%M:%S")},
-            "48_hours_old": {"field": "last_update", "operator": "<=", "value_fn": lambda: (datetime.now() - timedelta(hours=48)).strftime("%Y-%m-%d %H:%M:%S")}
+            "24_hours_old": {"field": "last_update", "operator": "<=", "delta": timedelta(hours=24), "format": "%Y-%m-%d %H:%M:%S"},
+            "48_hours_old": {"field": "last_update", "operator": "<=", "delta": timedelta(hours=48), "format": "%Y-%m-%d %H:%M:%S"}
         },
         
         # Organization/Team patterns
@@ -399,165 +805,235 @@ class SmartFilterEngine:
         }
     }
     
+    # Priority terms -> priority value, in precedence order (can be extended easily)
+    PRIORITY_MAPPINGS = {
+        "critical": "1", "priority 1": "1", "p1": "1", "urgent": "1",
+        "high": "2", "priority 2": "2", "p2": "2", "high priority": "2",
+        "medium": "3", "priority 3": "3", "p3": "3", "normal": "3", "medium priority": "3",
+        "low": "4", "priority 4": "4", "p4": "4", "low priority": "4"
+    }
+    
+    # Time phrases per UNIVERSAL_PATTERNS["time"] key, first match wins
+    TIME_PATTERNS = {
+        "today": ["today"],
+        "yesterday": ["yesterday"],
+        "this_week": ["this week", "past week"],
+        "last_7_days": ["last 7 days", "7 days", "past 7 days"],
+        "last_15_days": ["last 15 days", "15 days", "past 15 days"],
+        "last_30_days": ["last 30 days", "30 days", "past 30 days"],
+        "24_hours_old": ["24 hours", "not updated in 24 hours", "not updated in the last 24 hours"],
+        "48_hours_old": ["48 hours", "not updated in 48 hours", "not updated in the last 48 hours"]
+    }
+    
+    # Automaton over every priority and time literal, built once below the class
+    KEYWORD_AUTOMATON = None
+    
+    # (class_name, status_concept) -> (field, is_multi, value or values), built by _build_indexes
+    _STATUS_INDEX = {}
+    
+    # Length of the shortest priority or time literal, set by _build_indexes
+    MIN_KEYWORD_LEN = 0
+    
+    # Flattened TIME_PATTERNS: (literal, time_key) in precedence order and literal -> position
+    _TIME_LITERALS = ()
+    _TIME_LITERAL_RANKS = {}
+    
+    # Status filters only apply when the status qualifies a ticket noun ("closed tickets")
+    STATUS_FILTER_PATTERNS = {
+        "new": [re.compile(r'\bnew\s+(?:tickets|requests|incidents|changes|problems)\b')],
+        "open": [re.compile(r'\bopen\s+(?:tickets|requests|incidents|changes|problems)\b'), re.compile(r'\bongoing\s+(?:tickets|requests|incidents|changes|problems)\b')],
+        "closed": [re.compile(r'\bclosed\s+(?:tickets|requests|incidents|changes|problems)\b')],
+        "resolved": [re.compile(r'\bresolved\s+(?:tickets|requests|incidents|changes|problems)\b')],
+        "pending": [re.compile(r'\bpending\s+(?:tickets|requests|incidents|changes|problems)\b')],
+        "assigned": [re.compile(r'\bassigned\s+(?:tickets|requests|incidents|changes|problems)\b')]
+    }
+    
+    # Cheap gates: each extractor bails out when its gate finds nothing to work on
+    STATUS_GATE = re.compile(r'\b(?:new|open|ongoing|closed|resolved|pending|assigned)\s')
+    HOURS_GATE = re.compile(r'not updated in ')
+    ORGANIZATION_GATE = re.compile(r'(?:org|organization|team) ["\']')
+    
+    # Pattern: "not updated in the last X hours"
+    HOURS_PATTERN = re.compile(r'not updated in (?:the last )?(\d+) hours?')
+    
+    # Quoted organization / team names
+    ORGANIZATION_PATTERN = re.compile(r'organization ["\']([^"\']+)["\']|org ["\']([^"\']+)["\']')
+    TEAM_PATTERN = re.compile(r'team ["\']([^"\']+)["\']')
+    
+    # Team assignment patterns for ticket classes, most precise first
+    TEAM_ASSIGNMENT_PATTERNS = [
+        (re.compile(r'assigned to (?:the )?(\w+(?:\s+\w+){0,2})(?:\s+team|\s*$)'), 1),           # "assigned to support team"
+        (re.compile(r'team ["\']([^"\']+)["\']'), 1),                                           # 'team "support"'
+        (re.compile(r'(\w+(?:\s+\w+){0,1})\s+team(?:\s|$)'), 1),                             # "support team", "database team"
+        (re.compile(r'tickets?\s+(?:for|from|by)\s+(?:the\s+)?(\w+(?:\s+\w+){0,2})\s+team'), 1),  # "tickets for support team"
+        (re.compile(r'(?:for|by)\s+(\w+(?:\s+\w+){0,1})(?:\s+team|\s*$)'), 1)                # "for support", "by infrastructure"
+    ]
+    
+    # Ticket classes that take team filters, and words that never name a team
+    TEAM_FILTER_CLASSES = frozenset({"Ticket", "UserRequest", "Incident", "Problem", "Change"})
+    EXCLUDED_TEAM_WORDS = frozenset({
+        'the', 'and', 'for', 'by', 'to', 'in', 'on', 'with', 'from', 'tickets', 'ticket',
+        'user', 'requests', 'request', 'incidents', 'incident', 'show', 'me'
+    })
+    
     @classmethod
     def extract_filters(cls, query_lower: str, class_name: str) -> List[Dict[str, Any]]:
-        """Smart filter extraction that adapts to different iTop classes"""
-        filters = []
+        """Smart filter extraction that adapts to different iTop classes
+        
+        Always returns a list of non-empty filter dicts, each with a display_name.
+        """
+        # Nothing can match a query shorter than the shortest filter keyword ("p1")
+        if len(query_lower) < cls.MIN_KEYWORD_LEN:
+            return []
+        
+        leading_filters, trailing_filters, keyword_hits = cls._extract_static_filters(query_lower, class_name)
+        
+        # Callers get fresh filter dicts so the cached ones stay untouched
+        filters = [_copy_filter(filter_info) for filter_info in leading_filters]
+        
+        # Extract time filters (universal) - never cached, the cutoff depends on the current time
+        time_filter = cls._extract_time_filter(query_lower, keyword_hits)
+        if time_filter:
+            filters.append(time_filter)
+        
+        filters.extend(_copy_filter(filter_info) for filter_info in trailing_filters)
+        return filters
+    
+    @classmethod
+    @lru_cache(maxsize=4096)
+    def _extract_static_filters(cls, query_lower: str, class_name: str) -> tuple:
+        """Extract the filters that only depend on the query text, cached per (query, class)
+        
+        Returns the filters that go before and after the time filter, plus the keyword hits.
+        """
+        leading_filters = []
+        trailing_filters = []
+        
+        # Find every priority/time literal in a single pass over the query
+        keyword_hits = frozenset(cls._find_keywords(query_lower))
         
         # Extract priority filters (universal)
         # Only for classes that support priority field (not generic Ticket class)
         if class_name not in ["Ticket"]:
-            priority_filter = cls._extract_priority_filter(query_lower)
+            priority_filter = cls._extract_priority_filter(query_lower, keyword_hits)
             if priority_filter:
-                filters.append(priority_filter)
+                leading_filters.append(priority_filter)
         
         # Extract status filters (class-specific)
         status_filter = cls._extract_status_filter(query_lower, class_name)
         if status_filter:
-            filters.append(status_filter)
-        
-        # Extract time filters (universal)
-        time_filter = cls._extract_time_filter(query_lower)
-        if time_filter:
-            filters.append(time_filter)
+            leading_filters.append(status_filter)
         
         # Extract organization/team filters
         org_filter = cls._extract_organization_filter(query_lower)
         if org_filter:
-            filters.append(org_filter)
+            trailing_filters.append(org_filter)
         
         # Extract class-specific filters
         class_filters = cls._extract_class_specific_filters(query_lower, class_name)
-        filters.extend(class_filters)
+        trailing_filters.extend(class_filters)
         
-        return filters
+        return tuple(leading_filters), tuple(trailing_filters), keyword_hits
+    
+    @classmethod
+    def _find_keywords(cls, query_lower: str) -> set:
+        """Return the set of priority/time literals found anywhere in the query"""
+        return {keyword for _, keyword in cls.KEYWORD_AUTOMATON.iter(query_lower)}
     
     @classmethod
-    def _extract_priority_filter(cls, query_lower: str) -> Optional[Dict[str, Any]]:
+    def _extract_priority_filter(cls, query_lower: str, keyword_hits: Optional[set] = None) -> Optional[Dict[str, Any]]:
         """Extract priority filters dynamically - works for most ticket classes but NOT for generic Ticket class"""
         # Don't use priority field for generic Ticket class as it doesn't have it
         # Priority is available in subclasses like UserRequest, Incident, Problem
+        if keyword_hits is None:
+            keyword_hits = cls._find_keywords(query_lower)
         
-        # Dynamic priority mapping - can be extended easily
-        priority_mappings = {
-            "critical": "1", "priority 1": "1", "p1": "1", "urgent": "1",
-            "high": "2", "priority 2": "2", "p2": "2", "high priority": "2",
-            "medium": "3", "priority 3": "3", "p3": "3", "normal": "3", "medium priority": "3",
-            "low": "4", "priority 4": "4", "p4": "4", "low priority": "4"
-        }
-        
-        # Find all priority terms mentioned in the query
-        found_priorities = []
-        for priority_term, priority_value in priority_mappings.items():
-            if priority_term in query_lower:
-                found_priorities.append((priority_term, priority_value))
+        # Find all priority terms mentioned in the query, deduplicated in mapping order
+        unique_values, unique_terms = {}, {}
+        for priority_term, priority_value in cls.PRIORITY_MAPPINGS.items():
+            if priority_term in keyword_hits:
+                unique_values[priority_value] = None
+                unique_terms[priority_term] = None
         
-        if not found_priorities:
+        if not unique_terms:
             return None
         
-        if len(found_priorities) == 1:
-            # Single priority
-            term, value = found_priorities[0]
+        unique_values = list(unique_values)
+        display_name = f"{'/'.join(unique_terms)} priority"
+        
+        if len(unique_values) == 1:
+            # One priority, possibly named by several terms
             return {
                 "field": "priority",
                 "operator": "=",
-                "value": value,
-                "display_name": f"{term} priority"
+                "value": unique_values[0],
+                "display_name": display_name
             }
         else:
-            # Multiple priorities - use IN operator for OR logic
-            unique_values = list(set([value for _, value in found_priorities]))
-            unique_terms = list(set([term for term, _ in found_priorities]))
-            
-            if len(unique_values) == 1:
-                # Multiple terms mapping to same priority value
-                return {
-                    "field": "priority", 
-                    "operator": "=",
-                    "value": unique_values[0],
-                    "display_name": f"{'/'.join(unique_terms)} priority"
-                }
-            else:
-                # Multiple different priorities
-                return {
-                    "field": "priority",
-                    "operator": "IN", 
-                    "values": unique_values,
-                    "display_name": f"{'/'.join(unique_terms)} priority"
-                }
+            # Multiple different priorities - use IN operator for OR logic
+            return {
+                "field": "priority",
+                "operator": "IN",
+                "values": unique_values,
+                "display_name": display_name
+            }
     
     @classmethod
     def _extract_status_filter(cls, query_lower: str, class_name: str) -> Optional[Dict[str, Any]]:
         """Extract status filters - only when explicitly mentioned as filters"""
-        class_mapping = cls.CLASS_FIELD_MAPPINGS.get(class_name, {})
-        status_field = class_mapping.get("status_field", "status")
-        status_values = class_mapping.get("status_values", {})
+        if not cls.STATUS_GATE.search(query_lower):
+            return None
         
         # Only add status filters when they appear to be intentional filters
         # Look for patterns like "closed tickets", "open requests", etc.
-        status_filter_patterns = {
-            "new": [r'\bnew\s+(?:tickets|requests|incidents|changes|problems)\b'],
-            "open": [r'\bopen\s+(?:tickets|requests|incidents|changes|problems)\b', r'\bongoing\s+(?:tickets|requests|incidents|changes|problems)\b'],
-            "closed": [r'\bclosed\s+(?:tickets|requests|incidents|changes|problems)\b'],
-            "resolved": [r'\bresolved\s+(?:tickets|requests|incidents|changes|problems)\b'],
-            "pending": [r'\bpending\s+(?:tickets|requests|incidents|changes|problems)\b'],
-            "assigned": [r'\bassigned\s+(?:tickets|requests|incidents|changes|problems)\b']
-        }
-        
-        for status_concept, patterns in status_filter_patterns.items():
+        for status_concept, patterns in cls.STATUS_FILTER_PATTERNS.items():
             for pattern in patterns:
-                if re.search(pattern, query_lower):
+                if pattern.search(query_lower):
                     # Map to class-specific status value
-                    class_status_value = status_values.get(status_concept)
-                    if class_status_value:
-                        if isinstance(class_status_value, list):
-                            return {
-                                "field": status_field,
-                                "operator": "IN",
-                                "values": class_status_value,
-                                "display_name": f"{status_concept} status"
-                            }
-                        else:
-                            return {
-                                "field": status_field,
-                                "operator": "=",
-                                "value": class_status_value,
-                                "display_name": f"{status_concept} status"
-                            }
+                    status_filter = cls.build_status_filter(class_name, status_concept, f"{status_concept} status")
+                    if status_filter:
+                        return status_filter
         return None
     
     @classmethod
-    def _extract_time_filter(cls, query_lower: str) -> Optional[Dict[str, Any]]:
-        """Extract time-based filters"""
-        # Enhanced patterns for time-based queries
-        time_patterns = {
-            "today": ["today"],
-            "yesterday": ["yesterday"],
-            "this_week": ["this week", "past week"],
-            "last_7_days": ["last 7 days", "7 days", "past 7 days"],
-            "last_15_days": ["last 15 days", "15 days", "past 15 days"],
-            "last_30_days": ["last 30 days", "30 days", "past 30 days"],
-            "24_hours_old": ["24 hours", "not updated in 24 hours", "not updated in the last 24 hours"],
-            "48_hours_old": ["48 hours", "not updated in 48 hours", "not updated in the last 48 hours"]
-        }
+    def build_status_filter(cls, class_name: str, status_concept: str, display_name: str) -> Optional[Dict[str, Any]]:
+        """Build the class-specific filter for a status concept, or None if the class lacks it"""
+        entry = cls._STATUS_INDEX.get((class_name, status_concept))
+        if entry is None:
+            return None
         
-        for time_key, patterns in time_patterns.items():
-            for pattern in patterns:
-                if pattern in query_lower:
-                    time_config = cls.UNIVERSAL_PATTERNS["time"][time_key]
-                    return {
-                        "field": time_config["field"],
-                        "operator": time_config["operator"],
-                        "value": time_config["value_fn"](),
-                        "display_name": pattern
-                    }
+        status_field, is_multi, payload = entry
+        if is_multi:
+            return {"field": status_field, "operator": "IN", "values": payload, "display_name": display_name}
+        return {"field": status_field, "operator": "=", "value": payload, "display_name": display_name}
+    
+    @classmethod
+    def _extract_time_filter(cls, query_lower: str, keyword_hits: Optional[set] = None) -> Optional[Dict[str, Any]]:
+        """Extract time-based filters"""
+        if keyword_hits is None:
+            keyword_hits = cls._find_keywords(query_lower)
+        
+        # The earliest literal in TIME_PATTERNS order wins, whatever order the hits came in
+        ranks = cls._TIME_LITERAL_RANKS
+        matched = [ranks[hit] for hit in keyword_hits if hit in ranks]
+        if matched:
+            pattern, time_key = cls._TIME_LITERALS[min(matched)]
+            time_config = cls.UNIVERSAL_PATTERNS["time"][time_key]
+            return {
+                "field": time_config["field"],
+                "operator": time_config["operator"],
+                "value": cls._format_cutoff(datetime.now(), time_config["delta"], time_config["format"]),
+                "display_name": pattern
+            }
         
         # Handle more flexible time patterns with regex
-        # Pattern: "not updated in the last X hours"
-        hours_match = re.search(r'not updated in (?:the last )?(\d+) hours?', query_lower)
+        if not cls.HOURS_GATE.search(query_lower):
+            return None
+        
+        hours_match = cls.HOURS_PATTERN.search(query_lower)
         if hours_match:
             hours = int(hours_match.group(1))
-            cutoff_time = (datetime.now() - timedelta(hours=hours)).strftime("%Y-%m-%d %H:%M:%S")
+            cutoff_time = cls._format_cutoff(datetime.now(), timedelta(hours=hours), "%Y-%m-%d %H:%M:%S")
             return {
                 "field": "last_update",
                 "operator": "<=",
@@ -567,11 +1043,19 @@ class SmartFilterEngine:
         
         return None
     
+    @staticmethod
+    def _format_cutoff(now: datetime, delta: timedelta, fmt: str) -> str:
+        """Render the cutoff timestamp for a time filter"""
+        return (now - delta).strftime(fmt)
+    
     @classmethod
     def _extract_organization_filter(cls, query_lower: str) -> Optional[Dict[str, Any]]:
         """Extract organization/team filters"""
+        if not cls.ORGANIZATION_GATE.search(query_lower):
+            return None
+        
         # Look for specific organization mentions
-        org_match = re.search(r'organization ["\']([^"\']+)["\']|org ["\']([^"\']+)["\']', query_lower)
+        org_match = cls.ORGANIZATION_PATTERN.search(query_lower)
         if org_match:
             org_name = org_match.group(1) or org_match.group(2)
             return {
@@ -582,7 +1066,7 @@ class SmartFilterEngine:
             }
         
         # Look for team mentions
-        team_match = re.search(r'team ["\']([^"\']+)["\']', query_lower)
+        team_match = cls.TEAM_PATTERN.search(query_lower)
         if team_match:
             team_name = team_match.group(1)
             return {
@@ -600,23 +1084,13 @@ class SmartFilterEngine:
         filters = []
         
         # Enhanced team assignment filters for ticket classes
-        if class_name in ["Ticket", "UserRequest", "Incident", "Problem", "Change"]:
-            # More precise team matching patterns
-            team_patterns = [
-                (r'assigned to (?:the )?(\w+(?:\s+\w+){0,2})(?:\s+team|\s*$)', 1),           # "assigned to support team"
-                (r'team ["\']([^"\']+)["\']', 1),                                           # 'team "support"'
-                (r'(\w+(?:\s+\w+){0,1})\s+team(?:\s|$)', 1),                             # "support team", "database team"
-                (r'tickets?\s+(?:for|from|by)\s+(?:the\s+)?(\w+(?:\s+\w+){0,2})\s+team', 1),  # "tickets for support team"
-                (r'(?:for|by)\s+(\w+(?:\s+\w+){0,1})(?:\s+team|\s*$)', 1)                # "for support", "by infrastructure"
-            ]
-            
-            for pattern, group_idx in team_patterns:
-                team_match = re.search(pattern, query_lower)
+        if class_name in cls.TEAM_FILTER_CLASSES:
+            for pattern, group_idx in cls.TEAM_ASSIGNMENT_PATTERNS:
+                team_match = pattern.search(query_lower)
                 if team_match:
                     team_name = team_match.group(group_idx).strip()
                     # Filter out common words and ensure it's a reasonable team name
-                    excluded_words = {'the', 'and', 'for', 'by', 'to', 'in', 'on', 'with', 'from', 'tickets', 'ticket', 'user', 'requests', 'request', 'incidents', 'incident', 'show', 'me'}
-                    if len(team_name) > 2 and team_name not in excluded_words and not any(word in excluded_words for word in team_name.split()):
+                    if len(team_name) > 2 and cls.EXCLUDED_TEAM_WORDS.isdisjoint(team_name.split()):
                         filters.append({
                             "field": "team_name",
                             "operator": "LIKE",
@@ -668,6 +1142,38 @@ class SmartFilterEngine:
                 })
         
         return filters
+    
+    @classmethod
+    def _build_indexes(cls):
+        """Precompute the status and time lookup tables and the shortest keyword length"""
+        cls._TIME_LITERALS = tuple(
+            (pattern, time_key)
+            for time_key, patterns in cls.TIME_PATTERNS.items()
+            for pattern in patterns
+        )
+        cls._TIME_LITERAL_RANKS = {}
+        for rank, (pattern, _) in enumerate(cls._TIME_LITERALS):
+            cls._TIME_LITERAL_RANKS.setdefault(pattern, rank)
+        cls.MIN_KEYWORD_LEN = min(
+            len(keyword)
+            for keywords in (cls.PRIORITY_MAPPINGS, *cls.TIME_PATTERNS.values())
+            for keyword in keywords
+        )
+        cls._STATUS_INDEX = {}
+        for class_name, class_mapping in cls.CLASS_FIELD_MAPPINGS.items():
+            status_field = class_mapping.get("status_field", "status")
+            for status_concept, value in class_mapping.get("status_values", {}).items():
+                if value:
+                    cls._STATUS_INDEX[(class_name, status_concept)] = (status_field, isinstance(value, list), value)
+
+SmartFilterEngine._build_indexes()
+SmartFilterEngine.KEYWORD_AUTOMATON = _build_keyword_automaton(
+    (keyword, keyword)
+    for keyword in dict.fromkeys([
+        *SmartFilterEngine.PRIORITY_MAPPINGS,
+        *(pattern for patterns in SmartFilterEngine.TIME_PATTERNS.values() for pattern in patterns)
+    ])
+)
 
 # =============================================================================
 # Smart Query Builder - Universal OQL Generation
@@ -676,74 +1182,154 @@ class SmartFilterEngine:
 class SmartQueryBuilder:
     """Universal OQL query builder that works across all iTop classes"""
     
+    # Condition templates per operator; IN receives its values pre-joined
+    _OP_FORMATTERS = {
+        "IN": "{f} IN ('{v}')",
+        "LIKE": "{f} LIKE '{v}'",
+        "=": "{f} = '{v}'",
+        "!=": "{f} != '{v}'",
+        ">": "{f} > '{v}'",
+        "<": "{f} < '{v}'",
+        ">=": "{f} >= '{v}'",
+        "<=": "{f} <= '{v}'"
+    }
+    
+    @staticmethod
+    @lru_cache(maxsize=512)
+    def _fragments(field: str, operator: str) -> Optional[tuple]:
+        """Split the operator's condition template for field around the value slot, or None if unsupported"""
+        template = SmartQueryBuilder._OP_FORMATTERS.get(operator)
+        if template is None:
+            return None
+        return tuple(template.format(f=field, v="\0").split("\0"))
+    
+    # OQL string literals escape quotes and backslashes with a backslash
+    _OQL_ESCAPE_TABLE = str.maketrans({"\\": "\\\\", "'": "\\'"})
+    
+    @staticmethod
+    @lru_cache(maxsize=4096, typed=True)
+    def _esc(value: Any) -> str:
+        """Escape a value for use inside a quoted OQL literal"""
+        return str(value).translate(SmartQueryBuilder._OQL_ESCAPE_TABLE)
+    
+    # Built queries keyed by class and the OQL-relevant parts of each filter
+    _QUERY_CACHE_SIZE = 1024
+    _query_cache = _BoundedCache(_QUERY_CACHE_SIZE)
+    _NO_VALUE = object()
+    
+    @staticmethod
+    def _filters_key(filters: List[Dict[str, Any]]) -> tuple:
+        """Hashable key for the fields, operators and values of a filter list.
+        
+        Values are paired with their type because str() renders equal values such as 1 and True differently.
+        """
+        key = []
+        for filter_info in filters:
+            value = filter_info.get("value", SmartQueryBuilder._NO_VALUE)
+            values = filter_info.get("values")
+            key.append((
+                filter_info["field"],
+                filter_info["operator"],
+                value.__class__,
+                value,
+                None if values is None else tuple((item.__class__, item) for item in values)
+            ))
+        return tuple(key)
+    
     @classmethod
     def build_oql_query(cls, class_name: str, filters: List[Dict[str, Any]]) -> str:
-        """Build OQL query from filters"""
+        """Build OQL query from filters, reusing the query built for identical filters"""
+        return cls._cached_query(cls._compose_oql_query, class_name, filters)
+    
+    @classmethod
+    def build_scalar_oql_query(cls, class_name: str, filters: List[Dict[str, Any]]) -> str:
+        """Build OQL query from single-value filters only"""
+        return cls._cached_query(cls._compose_scalar_oql_query, class_name, filters)
+    
+    @classmethod
+    def _cached_query(cls, compose: Callable[[str, List[Dict[str, Any]]], str],
+                      class_name: str, filters: List[Dict[str, Any]]) -> str:
+        """Return the cached output of compose for (class_name, filters), building it on a miss"""
+        try:
+            key = (compose.__name__, class_name, cls._filters_key(filters))
+            oql = cls._query_cache.get(key)
+        except (KeyError, TypeError):
+            # Malformed or unhashable filters are built (and reported) without caching
+            return compose(class_name, filters)
+        if oql is None:
+            oql = compose(class_name, filters)
+            cls._query_cache.put(key, oql)
+        return oql
+    
+    @classmethod
+    def _compose_scalar_oql_query(cls, class_name: str, filters: List[Dict[str, Any]]) -> str:
+        """Assemble the scalar-only OQL dialect used by the Incident and Problem handlers"""
         base_query = f"SELECT {class_name}"
         conditions = []
+        esc = cls._esc
+        
+        for filter_info in filters:
+            operator = filter_info["operator"]
+            
+            # IN filters carry "values" rather than "value" and are not part of this dialect
+            if operator in _SCALAR_OPERATORS:
+                conditions.append(f"{filter_info['field']} {operator} '{esc(filter_info['value'])}'")
+        
+        if conditions:
+            base_query += " WHERE " + " AND ".join(conditions)
+        
+        return base_query
+    
+    @classmethod
+    def _compose_oql_query(cls, class_name: str, filters: List[Dict[str, Any]]) -> str:
+        """Assemble the OQL query string for a list of filters"""
+        base_query = f"SELECT {class_name}"
+        conditions = []
+        fragments = cls._fragments
+        esc = cls._esc
         
         # Group filters by field to avoid duplicates
-        field_filters = {}
+        field_filters = defaultdict(list)
         for filter_info in filters:
-            field = filter_info["field"]
-            if field not in field_filters:
-                field_filters[field] = []
-            field_filters[field].append(filter_info)
+            field_filters[filter_info["field"]].append(filter_info)
         
-        # Build conditions, combining multiple filters for the same field
+        # Build conditions, combining multiple IN filters for the same field
         for field, filter_list in field_filters.items():
-            if len(filter_list) == 1:
-                # Single filter for this field
-                condition = cls._build_condition(filter_list[0])
-                if condition:
-                    conditions.append(condition)
-            else:
-                # Multiple filters for same field - combine with OR if they're IN operators
-                in_values = []
-                other_conditions = []
-                
-                for filter_info in filter_list:
-                    if filter_info["operator"] == "IN":
-                        in_values.extend(filter_info.get("values", []))
-                    else:
-                        condition = cls._build_condition(filter_info)
-                        if condition:
-                            other_conditions.append(condition)
-                
-                if in_values:
-                    # Deduplicate values
-                    unique_values = list(set(in_values))
-                    if len(unique_values) == 1:
-                        conditions.append(f"{field} = '{unique_values[0]}'")
-                    else:
-                        values_str = "', '".join(unique_values)
-                        conditions.append(f"{field} IN ('{values_str}')")
+            merge_in = len(filter_list) > 1
+            in_values = []
+            other_conditions = []
+            
+            for filter_info in filter_list:
+                operator = filter_info["operator"]
+                if merge_in and operator == "IN":
+                    in_values.extend(filter_info.get("values", []))
+                    continue
                 
-                conditions.extend(other_conditions)
+                parts = fragments(field, operator)
+                if parts is None:
+                    continue
+                head, tail = parts
+                if operator == "IN":
+                    other_conditions.append(head + "', '".join(map(esc, filter_info["values"])) + tail)
+                else:
+                    other_conditions.append(head + esc(filter_info["value"]) + tail)
+            
+            if in_values:
+                # Deduplicate values
+                unique_values = list(set(in_values))
+                if len(unique_values) == 1:
+                    head, tail = fragments(field, "=")
+                    conditions.append(head + esc(unique_values[0]) + tail)
+                else:
+                    head, tail = fragments(field, "IN")
+                    conditions.append(head + "', '".join(map(esc, unique_values)) + tail)
+            
+            conditions.extend(other_conditions)
         
         if conditions:
             base_query += " WHERE " + " AND ".join(conditions)
         
         return base_query
-    
-    @classmethod
-    def _build_condition(cls, filter_info: Dict[str, Any]) -> str:
-        """Build a single OQL condition from filter info"""
-        field = filter_info["field"]
-        operator = filter_info["operator"]
-        
-        if operator == "IN":
-            values = filter_info["values"]
-            values_str = "', '".join(values)
-            return f"{field} IN ('{values_str}')"
-        elif operator == "LIKE":
-            value = filter_info["value"]
-            return f"{field} LIKE '{value}'"
-        elif operator in ["=", "!=", ">", "<", ">=", "<="]:
-            value = filter_info["value"]
-            return f"{field} {operator} '{value}'"
-        
-        return ""
 
 # =============================================================================
 # Smart Grouping Engine - Universal Grouping Logic
@@ -763,28 +1349,49 @@ class SmartGroupingEngine:
         "caller": "caller_name"  # Universal field
     }
     
+    # Phrases that request a grouping, per grouping concept
+    GROUPING_PATTERNS = {
+        "status": ["by status", "group by status", "status wise", "breakdown by status"],
+        "priority": ["by priority", "group by priority", "priority wise", "breakdown by priority"],
+        "organization": ["by organization", "by org", "organization wise", "org wise", "group by organization"],
+        "team": ["by team", "group by team", "team wise", "breakdown by team"],
+        "agent": ["by agent", "group by agent", "agent wise", "breakdown by agent"],
+        "type": ["by type", "group by type", "type wise", "breakdown by type"],
+        "caller": ["by caller", "group by caller", "caller wise", "breakdown by caller"]
+    }
+    
+    # Flattened lookups, built by _build_indexes:
+    # (phrase, concept) in scan order, (class_name, concept) -> field and concept -> default field
+    _GROUPING_PHRASES = ()
+    _GROUPING_INDEX = {}
+    _GROUPING_DEFAULTS = {}
+    
+    @classmethod
+    def _build_indexes(cls):
+        """Flatten GROUPING_PATTERNS and GROUPING_MAPPINGS into lookup tables"""
+        cls._GROUPING_PHRASES = tuple(
+            (pattern, group_concept)
+            for group_concept, patterns in cls.GROUPING_PATTERNS.items()
+            for pattern in patterns
+        )
+        cls._GROUPING_INDEX = {}
+        cls._GROUPING_DEFAULTS = {}
+        for group_concept, field_mapping in cls.GROUPING_MAPPINGS.items():
+            if isinstance(field_mapping, dict):
+                cls._GROUPING_DEFAULTS[group_concept] = group_concept
+                for class_name, field in field_mapping.items():
+                    cls._GROUPING_INDEX[(class_name, group_concept)] = field
+            else:
+                cls._GROUPING_DEFAULTS[group_concept] = field_mapping
+    
     @classmethod
     def detect_grouping(cls, query_lower: str, class_name: str) -> Optional[str]:
         """Detect what field to group by from the query"""
-        grouping_patterns = {
-            "status": ["by status", "group by status", "status wise", "breakdown by status"],
-            "priority": ["by priority", "group by priority", "priority wise", "breakdown by priority"],
-            "organization": ["by organization", "by org", "organization wise", "org wise", "group by organization"],
-            "team": ["by team", "group by team", "team wise", "breakdown by team"],
-            "agent": ["by agent", "group by agent", "agent wise", "breakdown by agent"],
-            "type": ["by type", "group by type", "type wise", "breakdown by type"],
-            "caller": ["by caller", "group by caller", "caller wise", "breakdown by caller"]
-        }
-        
-        for group_concept, patterns in grouping_patterns.items():
-            for pattern in patterns:
-                if pattern in query_lower:
-                    # Map to actual field name for this class
-                    field_mapping = cls.GROUPING_MAPPINGS.get(group_concept)
-                    if isinstance(field_mapping, dict):
-                        return field_mapping.get(class_name, group_concept)
-                    else:
-                        return field_mapping
+        for pattern, group_concept in cls._GROUPING_PHRASES:
+            if pattern in query_lower:
+                # Map to actual field name for this class
+                field = cls._GROUPING_INDEX.get((class_name, group_concept))
+                return field if field is not None else cls._GROUPING_DEFAULTS[group_concept]
         
         return None
     
@@ -794,32 +1401,27 @@ class SmartGroupingEngine:
         if not objects:
             return f"**No data to group by {group_field}**\n"
         
-        groups = {}
-        group_details = {}
+        # Interned key: lookups against interned field names short-circuit on identity
+        group_field = sys.intern(group_field)
+        group_details = defaultdict(list)
         
         for obj_key, obj_data in objects.items():
             if obj_data.get("code") == 0:
                 fields = obj_data.get("fields", {})
-                group_value = fields.get(group_field, "Unknown")
-                
-                if group_value not in groups:
-                    groups[group_value] = 0
-                    group_details[group_value] = []
-                
-                groups[group_value] += 1
-                group_details[group_value].append((obj_key, fields))
+                group_details[fields.get(group_field, "Unknown")].append((obj_key, fields))
         
-        output = f"**{class_name} Grouped by {group_field.replace('_', ' ').title()}:**\n\n"
+        parts = [f"**{class_name} Grouped by {group_field.replace('_', ' ').title()}:**\n\n"]
         
-        for group_name in sorted(groups.keys()):
-            count = groups[group_name]
+        for group_name in sorted(group_details):
             details = group_details[group_name]
+            count = len(details)
             
-            output += f"## **{group_name}** ({count} items)\n"
+            parts.append(f"## **{group_name}** ({count} items)\n")
             
             # Show first few items with details (limit to avoid overwhelming)
-            shown_items = min(5, len(details))
-            for i, (obj_key, fields) in enumerate(details[:shown_items], 1):
+            shown_items = min(5, count)
+            remaining = count - shown_items
+            for i, (obj_key, fields) in enumerate(islice(details, shown_items), 1):
                 # Get meaningful identifier
                 identifier = (fields.get("ref") or 
                             fields.get("name") or 
@@ -841,27 +1443,353 @@ class SmartGroupingEngine:
                 elif fields.get("team_name"):
                     context += f" - Team: {fields['team_name']}"
                 
-                output += f"{i}. **{identifier}**{status_info}{context}\n"
+                parts.append(f"{i}. **{identifier}**{status_info}{context}\n")
             
-            if len(details) > shown_items:
-                remaining = len(details) - shown_items
-                output += f"   ... and {remaining} more items\n"
+            if remaining:
+                parts.append(f"   ... and {remaining} more items\n")
             
-            output += "\n"
+            parts.append("\n")
         
-        return output
+        return "".join(parts)
+
+SmartGroupingEngine._build_indexes()
 
 # =============================================================================
 # Universal Smart Handler Base Class
 # =============================================================================
 
+# Keyword screens: one substring scan per keyword list instead of one per word
+def _keyword_regex(*keywords: str) -> re.Pattern:
+    """Compile literal keywords into a single substring alternation"""
+    return re.compile("|".join(map(re.escape, keywords)))
+
+# Intent keyword lists per handler
+_COMPARE_WORDS = ("vs", "versus", "v/s", "compared to")
+_COUNT_WORDS = ("count", "how many", "total")
+_TICKET_GROUP_WORDS = ("group by", "grouped by", "breakdown", "summary", "organization wise", "org wise", "by organization", "by org")
+_COMPARE_KW = _keyword_regex(*_COMPARE_WORDS)
+_COUNT_KW = _keyword_regex(*_COUNT_WORDS)
+_GROUP_KW = _keyword_regex("group by", "grouped by", "breakdown", "summary", "organization wise", "org wise", "by organization", "by org", "by status", "by priority", "by team", "by agent", "by type")
+_ORG_GROUP_KW = _keyword_regex("group by", "breakdown", "summary", "organization wise", "org wise", "by organization", "by org")
+_SUMMARY_KW = _keyword_regex("group by", "breakdown", "summary")
+_SOFTWARE_FOCUS_KW = _keyword_regex("software", "application", "applications", "installed", "softwares")
+_GENERIC_COMPARE_KW = _keyword_regex("vs", "versus", "compared to", "comparison")
+_GENERIC_GROUP_KW = _keyword_regex("organization wise", "organisation wise", "by organization", "by organisation", "breakdown", "group by")
+_GENERIC_COUNT_KW = _keyword_regex("count", "how many")
+
+# The UserRequest and Ticket parsers test many keyword lists against the same query, so one
+# automaton pass collects a bit per list and the parsers test bits instead of rescanning
+(_INTENT_COMPARE, _INTENT_COUNT, _INTENT_TICKET_GROUP, _INTENT_UR_COMPARE, _INTENT_UR_COUNT,
+ _INTENT_UR_STATS, _INTENT_UR_SLA, _INTENT_UR_ORDERING) = (1 << bit for bit in range(8))
+_INTENT_FLAG_WORDS = {
+    _INTENT_COMPARE: _COMPARE_WORDS,
+    _INTENT_COUNT: _COUNT_WORDS,
+    _INTENT_TICKET_GROUP: _TICKET_GROUP_WORDS,
+    _INTENT_UR_COMPARE: (*_COMPARE_WORDS, "compare"),
+    _INTENT_UR_COUNT: ("count", "how many", "number of", "total count"),
+    _INTENT_UR_STATS: ("stats", "statistics", "breakdown", "by status", "group by"),
+    _INTENT_UR_SLA: ("sla", "on time", "late", "overdue", "deadline", "closed on time", "not closed on time"),
+    _INTENT_UR_ORDERING: ("latest", "newest", "recent")
+}
+
+def _build_intent_automaton():
+    """Map each intent keyword to the combined bits of every list containing it"""
+    keyword_bits = defaultdict(int)
+    for bit, words in _INTENT_FLAG_WORDS.items():
+        for word in words:
+            keyword_bits[word] |= bit
+    return _build_keyword_automaton(keyword_bits.items())
+
+_INTENT_AUTOMATON = _build_intent_automaton()
+
+def _intent_flags(query_lower: str) -> int:
+    """Bits of every intent keyword list with a keyword in the lowercased query"""
+    flags = 0
+    for _, bits in _INTENT_AUTOMATON.iter(query_lower):
+        flags |= bits
+    return flags
+
+def _action_table(*ranked: tuple) -> tuple:
+    """Resolve every combination of ranked (bit, action) flags up front; earlier entries win.
+    
+    Returns the mask of the ranked bits and the action for each masked flag value.
+    """
+    mask = 0
+    for bit, _ in ranked:
+        mask |= bit
+    table = {}
+    for flags in range(mask + 1):
+        if flags & ~mask == 0:
+            table[flags] = next((action for bit, action in ranked if flags & bit), "list")
+    return mask, table
+
+_USER_REQUEST_ACTION_MASK, _USER_REQUEST_ACTIONS = _action_table(
+    (_INTENT_UR_COMPARE, "compare"), (_INTENT_UR_COUNT, "count"), (_INTENT_UR_STATS, "stats")
+)
+_TICKET_ACTION_MASK, _TICKET_ACTIONS = _action_table(
+    (_INTENT_COMPARE, "compare"), (_INTENT_COUNT, "count"), (_INTENT_TICKET_GROUP, "group")
+)
+
+# Grouping phrases per handler, in priority order: ((phrases, field), ...)
+def _grouping_detector(*ranked: tuple) -> Callable[[str], Optional[str]]:
+    """Build a one-scan grouping detector; like an if/elif chain of substring checks, earlier entries win.
+    
+    Every phrase starts with "by " and none contains another "by ", so matches never straddle.
+    """
+    own = {}
+    for rank, (phrases, field) in enumerate(ranked):
+        for phrase in phrases:
+            own.setdefault(phrase, (rank, field))
+    # A matched phrase also implies every listed phrase inside it ("by organization" -> "by org")
+    lookup = {phrase: min(hit for inner, hit in own.items() if inner in phrase) for phrase in own}
+    pattern = _keyword_regex(*sorted(lookup, key=len, reverse=True))
+    
+    def detect(query_lower: str) -> Optional[str]:
+        hits = [lookup[match.group()] for match in pattern.finditer(query_lower)]
+        return min(hits)[1] if hits else None
+    return detect
+
+_PC_GROUPING = _grouping_detector(
+    (("by status",), "status"),
+    (("by type",), "type"),
+    (("by organization", "by org"), "org_name"),
+    (("by location",), "location_name"),
+    (("by brand",), "brand_name"),
+    (("by os", "by operating system"), "osfamily_name"),
+    (("by criticality",), "business_criticity"),
+    (("by user",), "user_friendlyname"),
+    (("by owner", "by team"), "owner_friendlyname"),
+)
+_SERVER_GROUPING = _grouping_detector(
+    (("by status",), "status"),
+    (("by organization",), "org_name"),
+    (("by location",), "location_name"),
+    (("by rack",), "rack_name"),
+    (("by os",), "osfamily_name"),
+    (("by criticality",), "business_criticity"),
+    (("by owner", "by team"), "owner_friendlyname"),
+    (("by brand",), "brand_name"),
+)
+_VM_GROUPING = _grouping_detector(
+    (("by status",), "status"),
+    (("by host", "by virtual host"), "virtualhost_name"),
+    (("by organization",), "org_name"),
+    (("by os",), "osfamily_name"),
+    (("by owner", "by team"), "owner_friendlyname"),
+    (("by custodian",), "custodian_friendlyname"),
+)
+_NETWORK_DEVICE_GROUPING = _grouping_detector(
+    (("by type",), "networkdevicetype_name"),
+    (("by status",), "status"),
+    (("by location",), "location_name"),
+    (("by organization",), "org_name"),
+    (("by brand",), "brand_name"),
+    (("by owner", "by team"), "owner_friendlyname"),
+    (("by rack",), "rack_name"),
+)
+_PERSON_GROUPING = _grouping_detector(
+    (("by organization",), "org_name"),
+    (("by location",), "location_name"),
+    (("by function",), "function"),
+    (("by status",), "status"),
+)
+_TEAM_GROUPING = _grouping_detector(
+    (("by organization",), "org_name"),
+    (("by function",), "function"),
+    (("by status",), "status"),
+)
+_ORGANIZATION_GROUPING = _grouping_detector(
+    (("by status",), "status"),
+    (("by parent",), "parent_name"),
+    (("by delivery model",), "deliverymodel_name"),
+)
+
+# Single-value comparison operators the Incident/Problem builders render as-is
+_SCALAR_OPERATORS = frozenset({"=", "!=", ">", "<", ">=", "<="})
+
+# SLA comparison phrasings; queries are lowercased before matching, so no IGNORECASE
+_SLA_PATTERNS = (
+    r"sla.*closed on time.*not closed on time",  # SLA with explicit timing language
+    r"sla.*closed vs not closed",                # SLA mentioned with closed comparison
+    r"closed vs not closed.*sla",                # Closed comparison with SLA mentioned
+    r"sla.*on time vs not on time",              # SLA with timing comparison
+    r"on time vs not on time.*sla",              # Timing comparison with SLA
+    r"met sla vs missed sla",                    # Direct SLA comparison
+    r"sla met vs sla missed",                    # Direct SLA comparison
+    r"support tickets closed on time vs not closed on time based on sla",
+    r"closed vs not closed on time.*sla",
+    r"closed vs not closed.*on time.*sla",
+    r"closed on time.*not closed on time.*based on sla",  # More flexible pattern
+    r"sla.*closed on time.*not closed on time"            # More flexible pattern
+)
+
+# All phrasings in one alternation, so a query is scanned once rather than once per pattern
+_SLA_RE = re.compile("|".join(f"(?:{pattern})" for pattern in dict.fromkeys(_SLA_PATTERNS)))
+
+# Every SLA pattern contains one of these, so they screen out the common "sla" queries cheaply
+_SLA_PREFILTER = _keyword_regex("vs", "closed on time")
+
+def _is_sla_comparison(query_lower: str) -> bool:
+    """Check whether a lowercased query asks for an SLA comparison"""
+    if "sla" not in query_lower or not _SLA_PREFILTER.search(query_lower):
+        return False
+    return _SLA_RE.search(query_lower) is not None
+
+# "<term> vs <term>" comparison terms
+_COMPARISON_RE = re.compile(r'(\w+)\s+(vs|versus|v/s|compared to)\s+(\w+)')
+
+# PC filters given as <keyword> "<value>", found in one pass over the query.
+# Each keyword maps to its slot in _PC_QUOTED_FILTERS, which is also the emit order.
+_PC_QUOTED_FILTER_RE = re.compile(r'(organization|location|user|owner|team) ["\']([^"\']+)["\']')
+_PC_QUOTED_FILTER_SLOTS = {"organization": 0, "location": 1, "user": 2, "owner": 3, "team": 3}
+_PC_QUOTED_FILTERS = (
+    ("org_name", "organization"),
+    ("location_name", "location"),
+    ("user_friendlyname", "user"),
+    ("owner_friendlyname", "owner team"),
+)
+
+# Heading emoji per ticket class for result listings
+_CLASS_EMOJI = {
+    "UserRequest": "🎫",
+    "Ticket": "🎫",
+    "Change": "🔄",
+    "Incident": "🚨",
+    "Problem": "🔍"
+}
+
+# Priority value -> marker shown next to it in record listings
+_PRIORITY_EMOJI = {"1": "🔴", "2": "🟡", "3": "🟢", "4": "⚪"}
+
+# SLA passed flag -> icon; any other value shows ❓
+_SLA_ICONS = {"yes": "✅", "no": "❌"}
+
+# Optional (field, label) detail lines per ticket listing, in display order
+_TICKET_DETAIL_LINES = (("caller_name", "Caller"), ("org_name", "Organization"), ("agent_name", "Agent"))
+_INCIDENT_DETAIL_LINES = (("category", "Category"), ("caller_name", "Caller"), ("agent_name", "Agent"), ("source", "Source"))
+_PROBLEM_DETAIL_LINES = (
+    ("urgency", "Urgency"), ("impact", "Impact"), ("caller_name", "Caller"),
+    ("agent_name", "Agent"), ("service_name", "Service"), ("product", "Product")
+)
+
+
+@lru_cache(maxsize=64)
+def _count_output_fields(grouping: Optional[str]) -> str:
+    """Output fields for a count query: the id, plus the grouping field when there is one"""
+    return f"id,{grouping}" if grouping else "id"
+
+
+# UserRequest detail fields, joined once for the output_fields parameter
+_USER_REQUEST_KEY_FIELDS = (
+    "id", "ref", "title", "status", "priority", "urgency",
+    "caller_name", "agent_name", "org_name", "team_name",
+    "start_date", "resolution_date", "close_date"
+)
+_USER_REQUEST_SLA_FIELDS = (
+    "sla_tto_passed", "sla_ttr_passed",
+    "tto_escalation_deadline", "ttr_escalation_deadline"
+)
+_USER_REQUEST_OUTPUT_FIELDS = ",".join(_USER_REQUEST_KEY_FIELDS)
+_USER_REQUEST_SLA_OUTPUT_FIELDS = ",".join(_USER_REQUEST_KEY_FIELDS + _USER_REQUEST_SLA_FIELDS)
+
+
+def _record_ref(obj_data: dict, fields: dict) -> Any:
+    """Return the record's ref, falling back to its iTop object key ("Class::id") when absent"""
+    if "ref" in fields:
+        return fields["ref"]
+    return f"{obj_data.get('class')}::{obj_data.get('key')}"
+
+
+def _write_pipe_joined(write: Callable[[str], Any], prefix: str, pairs: tuple) -> None:
+    """Write a "prefix Label: value | Label: value" line for the non-empty values, if any"""
+    first = True
+    for label, value in pairs:
+        if value:
+            write(prefix if first else " | ")
+            write(f"{label}: {value}")
+            first = False
+    if not first:
+        write("\n")
+
+def _write_field_lines(write: Callable[[str], Any], get: Callable[[str], Any], labels: tuple) -> None:
+    """Write a "   Label: value" line for each (field, label) pair whose value is set"""
+    for field, label in labels:
+        value = get(field)
+        if value:
+            write(f"   {label}: {value}\n")
+
+
+# Parsed intents per (handler type, class, query); dashboards re-send identical queries
+_INTENT_CACHE_SIZE = 512
+_intent_cache = _BoundedCache(_INTENT_CACHE_SIZE)
+
+# Time filters carry a cutoff computed from the current time, so intents holding them are never cached
+_VOLATILE_FILTER_FIELDS = frozenset(
+    time_config["field"] for time_config in SmartFilterEngine.UNIVERSAL_PATTERNS["time"].values()
+) | {"last_update"}
+
+
+def _copy_intent(intent: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy an intent deep enough that callers can edit its lists, filter dicts and their value lists"""
+    intent = dict(intent)
+    for key, value in intent.items():
+        if isinstance(value, list):
+            intent[key] = [_copy_filter(item) if isinstance(item, dict) else item for item in value]
+    return intent
+
+
+# Filter operators that _row_matches_filters can evaluate against returned fields
+_ROW_FILTER_OPERATORS = frozenset({"=", "!=", "IN"})
+
+
+def _row_matches_filters(fields: Dict[str, Any], filters: List[Dict[str, Any]]) -> bool:
+    """Evaluate equality/IN filters against an object's fields, as the OQL would"""
+    for filter_info in filters:
+        value = fields.get(filter_info["field"])
+        operator = filter_info["operator"]
+        if operator == "IN":
+            if value not in filter_info["values"]:
+                return False
+        elif (value == filter_info["value"]) != (operator == "="):
+            return False
+    return True
+
+
+def _cached_intent(parse):
+    """Memoize a handler's intent parser; intents depend only on the handler, class and query"""
+    @wraps(parse)
+    def wrapper(self, query: str) -> Dict[str, Any]:
+        key = (type(self), self.class_name, query)
+        intent = _intent_cache.get(key)
+        if intent is None:
+            intent = parse(self, query)
+            if any(
+                isinstance(filter_info, dict) and filter_info.get("field") in _VOLATILE_FILTER_FIELDS
+                for filter_info in intent.get("filters", ())
+            ):
+                return intent
+            _intent_cache.put(key, intent)
+        return _copy_intent(intent)
+    
+    return wrapper
+
 class SmartHandlerBase:
     """Universal base handler that all specific handlers inherit from"""
     
     def __init__(self, client: ITopClient, class_name: str):
         self.client = client
         self.class_name = class_name
+        
+        # Class-specific status field and values, resolved once for the comparison handlers
+        self._class_mapping = SmartFilterEngine.CLASS_FIELD_MAPPINGS.get(class_name, {})
+        self._status_field = self._class_mapping.get("status_field", "status")
+        self._status_values = self._class_mapping.get("status_values", {})
+        
+        # Display strings used by the result formatters
+        self._emoji = _CLASS_EMOJI.get(class_name, "📋")
+        self._class_lower = class_name.lower()
     
+    @_cached_intent
     def parse_query_intent(self, query: str) -> Dict[str, Any]:
         """Universal query intent parser"""
         query_lower = query.lower()
@@ -875,9 +1803,9 @@ class SmartHandlerBase:
         }
         
         # Detect action type - Enhanced comparison detection first with high priority
-        is_comparison = any(word in query_lower for word in ["vs", "versus", "v/s", "compared to"])
-        is_count_request = any(word in query_lower for word in ["count", "how many", "total"]) and not is_comparison
-        is_grouping = any(word in query_lower for word in ["group by", "grouped by", "breakdown", "summary", "organization wise", "org wise", "by organization", "by org", "by status", "by priority", "by team", "by agent", "by type"]) and not is_comparison
+        is_comparison = bool(_COMPARE_KW.search(query_lower))
+        is_count_request = bool(_COUNT_KW.search(query_lower)) and not is_comparison
+        is_grouping = bool(_GROUP_KW.search(query_lower)) and not is_comparison
         
         # PRIORITY ORDER: comparison > count > grouping > list
         # This ensures that queries like "grouped by X: A vs B" are treated as comparisons
@@ -891,34 +1819,14 @@ class SmartHandlerBase:
         
         # Enhanced SLA comparison detection - ONLY for explicit SLA mentions
         # Only apply SLA comparison when both "sla" AND comparison terms are present
-        sla_comparison_patterns = [
-            r"sla.*closed on time.*not closed on time",  # SLA with explicit timing language
-            r"sla.*closed vs not closed",                # SLA mentioned with closed comparison
-            r"closed vs not closed.*sla",                # Closed comparison with SLA mentioned
-            r"sla.*on time vs not on time",              # SLA with timing comparison
-            r"on time vs not on time.*sla",              # Timing comparison with SLA
-            r"met sla vs missed sla",                    # Direct SLA comparison
-            r"sla met vs sla missed",                    # Direct SLA comparison
-            r"support tickets closed on time vs not closed on time based on sla",
-            r"closed vs not closed on time.*sla", 
-            r"closed vs not closed.*on time.*sla",
-            r".*closed on time.*not closed on time.*based on sla.*",  # More flexible pattern
-            r".*sla.*closed on time.*not closed on time.*"   # More flexible pattern
-        ]
-        
         # Check if this is an SLA-related comparison (must have explicit SLA mention)
-        is_sla_comparison = False
-        if "sla" in query_lower:  # Only check patterns if SLA is mentioned
-            for pattern in sla_comparison_patterns:
-                if re.search(pattern, query_lower, re.IGNORECASE):
-                    is_sla_comparison = True
-                    intent["action"] = "compare"
-                    intent["comparison"] = True
-                    intent["sla_analysis"] = True
-                    break
+        if _is_sla_comparison(query_lower):
+            intent["action"] = "compare"
+            intent["comparison"] = True
+            intent["sla_analysis"] = True
         
         # Detect SLA analysis
-        if any(word in query_lower for word in ["sla"]):
+        if "sla" in query_lower:
             intent["sla_analysis"] = True
         
         # Extract filters using smart engine
@@ -936,10 +1844,7 @@ class SmartHandlerBase:
     def determine_output_fields(self, intent: Dict[str, Any]) -> str:
         """Universal output field determination"""
         if intent["action"] == "count":
-            if intent["grouping"]:
-                return f"id,{intent['grouping']}"
-            else:
-                return "id"
+            return _count_output_fields(intent["grouping"])
         
         # For detailed queries, use all fields
         return "*+"
@@ -979,34 +1884,69 @@ class SmartHandlerBase:
         except Exception as e:
             return f"❌ **{self.class_name} Handler Error**: {str(e)}"
     
+    async def _count_comparison_buckets(self, comparisons: List[tuple], output_fields: str, limit: int) -> tuple:
+        """Count each (term, filters) bucket of a comparison.
+        
+        Tries one query for the union of all buckets and counts the rows client-side; falls
+        back to one count query per bucket when the union result may be truncated.
+        Returns the per-term OQL (for display) and the per-term count or error message.
+        """
+        oqls = {term: SmartQueryBuilder.build_oql_query(self.class_name, filters) for term, filters in comparisons}
+        # Every request differs only in its OQL key
+        operation = {
+            "operation": "core/get",
+            "class": self.class_name,
+            "output_fields": output_fields,
+            "limit": limit
+        }
+        
+        # The union needs filters it can evaluate from the returned fields
+        fetched_fields = set(output_fields.split(","))
+        conditions = [oqls[term].partition(" WHERE ")[2] for term, _ in comparisons]
+        if all(conditions) and all(
+            f["operator"] in _ROW_FILTER_OPERATORS and f["field"] in fetched_fields
+            for _, filters in comparisons for f in filters
+        ):
+            union_oql = f"SELECT {self.class_name} WHERE " + " OR ".join(f"({condition})" for condition in conditions)
+            result = await self.client.make_request({**operation, "key": union_oql})
+            objects = result.get("objects") or {}
+            if (result.get("code") == 0 and len(objects) < limit
+                    and _extract_count_from_message(result.get("message", "")) <= len(objects)):
+                results = {term: 0 for term, _ in comparisons}
+                for obj in objects.values():
+                    fields = obj.get("fields", {})
+                    for term, filters in comparisons:
+                        if _row_matches_filters(fields, filters):
+                            results[term] += 1
+                return oqls, results
+        
+        # Fall back to one query per bucket, executed concurrently
+        operations = [{**operation, "key": oqls[term]} for term, _ in comparisons]
+        results = {}
+        term_results = await self.client.make_requests_batch(operations)
+        for (term, _), result in zip(comparisons, term_results):
+            if result.get("code") == 0:
+                # Without a message there is no total to parse, so count the returned rows
+                message = result.get("message")
+                results[term] = _extract_count_from_message(message) if message else len(result.get("objects") or {})
+            else:
+                results[term] = f"Error: {result.get('message')}"
+        return oqls, results
+    
+    def _status_term_filters(self, term: str) -> List[Dict[str, Any]]:
+        """Filters selecting a comparison term's status; empty when the class has no such status"""
+        status_filter = SmartFilterEngine.build_status_filter(self.class_name, term, term)
+        return [status_filter] if status_filter else []
+    
     async def _handle_comparison_query(self, query: str, intent: Dict[str, Any], limit: int) -> str:
         """Universal comparison query handler"""
         query_lower = query.lower()
         
         # Enhanced SLA comparison detection - ONLY when SLA is explicitly mentioned
-        sla_patterns = [
-            r"sla.*closed on time.*not closed on time",  # SLA with explicit timing language
-            r"sla.*closed vs not closed",                # SLA mentioned with closed comparison
-            r"closed vs not closed.*sla",                # Closed comparison with SLA mentioned
-            r"sla.*on time vs not on time",              # SLA with timing comparison
-            r"on time vs not on time.*sla",              # Timing comparison with SLA
-            r"met sla vs missed sla",                    # Direct SLA comparison
-            r"sla met vs sla missed",                    # Direct SLA comparison
-            r"support tickets closed on time vs not closed on time based on sla",
-            r"closed vs not closed on time.*sla", 
-            r"closed vs not closed.*on time.*sla",
-            r".*closed on time.*not closed on time.*based on sla.*",  # More flexible pattern
-            r".*sla.*closed on time.*not closed on time.*"   # More flexible pattern
-        ]
-        
         # Check if this is an SLA-related comparison (SLA must be explicitly mentioned)
         # BUT only apply SLA logic for UserRequest/Incident classes, not generic Ticket
-        is_sla_comparison = False
-        if "sla" in query_lower and self.class_name in ["UserRequest", "Incident"]:  
-            is_sla_comparison = any(re.search(pattern, query_lower, re.IGNORECASE) for pattern in sla_patterns)
-        
         # Apply SLA comparison only if SLA is explicitly mentioned AND class supports it
-        if is_sla_comparison:
+        if self.class_name in ["UserRequest", "Incident"] and _is_sla_comparison(query_lower):
             return await self._handle_sla_comparison(query, intent, limit)
         
         # Handle "closed vs not closed" or "completed vs not completed" comparisons
@@ -1014,97 +1954,48 @@ class SmartHandlerBase:
             return await self._handle_closed_vs_open_comparison(query, intent, limit)
         
         # Extract comparison terms
-        comparison_match = re.search(r'(\w+)\s+(vs|versus|v/s|compared to)\s+(\w+)', query_lower)
+        comparison_match = _COMPARISON_RE.search(query_lower)
         if not comparison_match:
             return "❌ Could not parse comparison query"
         
         term1, _, term2 = comparison_match.groups()
         
-        results = {}
-        oqls = {}
+        status_field = self._status_field
         
-        # Get class-specific status field
-        class_mapping = SmartFilterEngine.CLASS_FIELD_MAPPINGS.get(self.class_name, {})
-        status_field = class_mapping.get("status_field", "status")
-        status_values = class_mapping.get("status_values", {})
+        # Map each term to its class-specific status filter before any query is built
+        comparisons = [(term, self._status_term_filters(term)) for term in (term1, term2)]
         
-        # Execute query for each term
-        for term in [term1, term2]:
-            term_intent = intent.copy()
-            term_intent["filters"] = []
-            
-            # Map term to class-specific status values
-            if term in status_values:
-                class_status_value = status_values[term]
-                if isinstance(class_status_value, list):
-                    term_intent["filters"].append({
-                        "field": status_field,
-                        "operator": "IN",
-                        "values": class_status_value,
-                        "display_name": term
-                    })
-                else:
-                    term_intent["filters"].append({
-                        "field": status_field,
-                        "operator": "=",
-                        "value": class_status_value,
-                        "display_name": term
-                    })
-            
-            oql_query = self.build_oql_query(term_intent)
-            oqls[term] = oql_query
-            
-            operation = {
-                "operation": "core/get",
-                "class": self.class_name,
-                "key": oql_query,
-                "output_fields": f"id,{status_field}",
-                "limit": limit
-            }
-            
-            result = await self.client.make_request(operation)
-            
-            if result.get("code") == 0:
-                count = _extract_count_from_message(result.get("message", ""))
-                if count is None:
-                    count = len(result.get("objects", {}))
-                results[term] = count
-            else:
-                results[term] = f"Error: {result.get('message')}"
+        oqls, results = await self._count_comparison_buckets(comparisons, f"id,{status_field}", limit)
         
         # Format results
-        output = f"**🔄 {self.class_name} Comparison: {term1.title()} vs {term2.title()}**\n\n"
-        output += f"**Query**: \"{query}\"\n\n"
+        parts = [f"**🔄 {self.class_name} Comparison: {term1.title()} vs {term2.title()}**\n\n"]
+        parts.append(f"**Query**: \"{query}\"\n\n")
         
         for term in [term1, term2]:
-            output += f"**OQL for {term.title()}**: `{oqls[term]}`\n"
-        output += "\n"
+            parts.append(f"**OQL for {term.title()}**: `{oqls[term]}`\n")
+        parts.append("\n")
         
         for term, count in results.items():
             if isinstance(count, int):
-                output += f"📊 **{term.title()}**: {count} {self.class_name.lower()}s\n"
+                parts.append(f"📊 **{term.title()}**: {count} {self._class_lower}s\n")
             else:
-                output += f"❌ **{term.title()}**: {count}\n"
+                parts.append(f"❌ **{term.title()}**: {count}\n")
         
-        return output
+        return "".join(parts)
     
     async def _handle_closed_vs_open_comparison(self, query: str, intent: Dict[str, Any], limit: int) -> str:
         """Handle closed vs open/not closed comparisons - always show both counts"""
         
-        # Get class-specific status field
-        class_mapping = SmartFilterEngine.CLASS_FIELD_MAPPINGS.get(self.class_name, {})
-        status_field = class_mapping.get("status_field", "status")
-        status_values = class_mapping.get("status_values", {})
-        
-        results = {}
-        oqls = {}
+        status_field = self._status_field
+        status_values = self._status_values
+        # "completed" contains "complete", so one substring test covers both spellings
+        is_completion = self.class_name == "Change" and "complete" in query.lower()
         
         # Handle Change requests "completed vs not completed" 
-        if self.class_name == "Change" and ("completed" in query.lower() or "complete" in query.lower()):
+        if is_completion:
             # Query 1: Completed changes (implemented or closed)
-            completed_intent = intent.copy()
             completed_values = status_values.get("completed", ["implemented", "closed"])
-            completed_intent["filters"] = [
+            completed_filters = [
                 {
                     "field": status_field,
                     "operator": "IN",
@@ -1114,9 +2005,8 @@ class SmartHandlerBase:
             ]
             
             # Query 2: Not completed changes (new, approved, rejected)
-            not_completed_intent = intent.copy()
             not_completed_values = status_values.get("not_completed", ["new", "approved", "rejected"])
-            not_completed_intent["filters"] = [
+            not_completed_filters = [
                 {
                     "field": status_field,
                     "operator": "IN", 
@@ -1126,14 +2016,13 @@ class SmartHandlerBase:
             ]
             
             comparisons = [
-                ("completed", completed_intent),
-                ("not_completed", not_completed_intent)
+                ("completed", completed_filters),
+                ("not_completed", not_completed_filters)
             ]
         else:
             # Standard closed vs open comparison
             # Query 1: Closed items
-            closed_intent = intent.copy()
-            closed_intent["filters"] = [
+            closed_filters = [
                 {
                     "field": status_field,
                     "operator": "=",
@@ -1143,9 +2032,8 @@ class SmartHandlerBase:
             ]
             
             # Query 2: Open/ongoing items (not closed)
-            open_intent = intent.copy()
             if self.class_name == "Ticket":
-                open_intent["filters"] = [
+                open_filters = [
                     {
                         "field": status_field,
                         "operator": "=",
@@ -1155,7 +2043,7 @@ class SmartHandlerBase:
                 ]
             else:
                 # For other classes, use a more generic approach
-                open_intent["filters"] = [
+                open_filters = [
                     {
                         "field": status_field,
                         "operator": "!=",
@@ -1165,78 +2053,54 @@ class SmartHandlerBase:
                 ]
             
             comparisons = [
-                ("closed", closed_intent),
-                ("open", open_intent)
+                ("closed", closed_filters),
+                ("open", open_filters)
             ]
         
-        for term, term_intent in comparisons:
-            oql_query = self.build_oql_query(term_intent)
-            oqls[term] = oql_query
-            
-            operation = {
-                "operation": "core/get",
-                "class": self.class_name,
-                "key": oql_query,
-                "output_fields": f"id,{status_field}",
-                "limit": limit
-            }
-            
-            result = await self.client.make_request(operation)
-            
-            if result.get("code") == 0:
-                count = _extract_count_from_message(result.get("message", ""))
-                if count is None:
-                    count = len(result.get("objects", {}))
-                results[term] = count
-            else:
-                results[term] = f"Error: {result.get('message')}"
+        oqls, results = await self._count_comparison_buckets(comparisons, f"id,{status_field}", limit)
         
         # Format results - always show both counts
-        if self.class_name == "Change" and ("completed" in query.lower() or "complete" in query.lower()):
-            output = f"**🔄 {self.class_name} Completion Comparison**\n\n"
-            output += f"**Query**: \"{query}\"\n\n"
+        if is_completion:
+            parts = [f"**🔄 {self.class_name} Completion Comparison**\n\n"]
+            parts.append(f"**Query**: \"{query}\"\n\n")
             
-            output += f"**OQL for Completed**: `{oqls.get('completed', 'N/A')}`\n"
-            output += f"**OQL for Not Completed**: `{oqls.get('not_completed', 'N/A')}`\n\n"
+            parts.append(f"**OQL for Completed**: `{oqls.get('completed', 'N/A')}`\n")
+            parts.append(f"**OQL for Not Completed**: `{oqls.get('not_completed', 'N/A')}`\n\n")
             
             completed_count = results.get('completed', 0)
             not_completed_count = results.get('not_completed', 0)
             
-            output += f"📊 **Completed**: {completed_count} {self.class_name.lower()}s\n"
-            output += f"📊 **Not Completed**: {not_completed_count} {self.class_name.lower()}s\n"
+            parts.append(f"📊 **Completed**: {completed_count} {self._class_lower}s\n")
+            parts.append(f"📊 **Not Completed**: {not_completed_count} {self._class_lower}s\n")
         else:
-            output = f"**🔄 {self.class_name} Status Comparison**\n\n"
-            output += f"**Query**: \"{query}\"\n\n"
+            parts = [f"**🔄 {self.class_name} Status Comparison**\n\n"]
+            parts.append(f"**Query**: \"{query}\"\n\n")
             
-            output += f"**OQL for Closed**: `{oqls.get('closed', 'N/A')}`\n"
-            output += f"**OQL for Open**: `{oqls.get('open', 'N/A')}`\n\n"
+            parts.append(f"**OQL for Closed**: `{oqls.get('closed', 'N/A')}`\n")
+            parts.append(f"**OQL for Open**: `{oqls.get('open', 'N/A')}`\n\n")
             
             closed_count = results.get('closed', 0)
             open_count = results.get('open', 0)
             
-            output += f"📊 **Closed**: {closed_count} {self.class_name.lower()}s\n"
-            output += f"📊 **Open/Ongoing**: {open_count} {self.class_name.lower()}s\n"
+            parts.append(f"📊 **Closed**: {closed_count} {self._class_lower}s\n")
+            parts.append(f"📊 **Open/Ongoing**: {open_count} {self._class_lower}s\n")
         
         # Calculate total for both cases
         all_counts = [v for v in results.values() if isinstance(v, int)]
         total = sum(all_counts)
         if total > 0:
-            output += f"📊 **Total**: {total} {self.class_name.lower()}s\n"
+            parts.append(f"📊 **Total**: {total} {self._class_lower}s\n")
         
-        return output
+        return "".join(parts)
     
     async def _handle_sla_comparison(self, query: str, intent: Dict[str, Any], limit: int) -> str:
         """Universal SLA comparison handler"""
         if self.class_name not in ["UserRequest", "Incident"]:
             return f"❌ SLA comparison not supported for {self.class_name}"
         
-        results = {}
-        oqls = {}
-        
         # Query 1: Closed on time (status=closed AND sla_ttr_passed=no) - CORRECTED LOGIC
         # sla_ttr_passed="no" means SLA was NOT passed/missed, i.e., closed on time
-        closed_on_time_intent = intent.copy()
-        closed_on_time_intent["filters"] = [
+        closed_on_time_filters = [
             {
                 "field": "status",
                 "operator": "=",
@@ -1253,8 +2117,7 @@ class SmartHandlerBase:
         
         # Query 2: Not closed on time (sla_ttr_passed=yes) - CORRECTED LOGIC  
         # sla_ttr_passed="yes" means SLA was passed/missed, i.e., closed late
-        not_closed_on_time_intent = intent.copy()
-        not_closed_on_time_intent["filters"] = [
+        not_closed_on_time_filters = [
             {
                 "field": "sla_ttr_passed",
                 "operator": "=",
@@ -1264,46 +2127,26 @@ class SmartHandlerBase:
         ]
         
         comparisons = [
-            ("closed_on_time", closed_on_time_intent),
-            ("not_closed_on_time", not_closed_on_time_intent)
+            ("closed_on_time", closed_on_time_filters),
+            ("not_closed_on_time", not_closed_on_time_filters)
         ]
         
-        for term, term_intent in comparisons:
-            oql_query = self.build_oql_query(term_intent)
-            oqls[term] = oql_query
-            
-            operation = {
-                "operation": "core/get",
-                "class": self.class_name,
-                "key": oql_query,
-                "output_fields": "id,status,sla_ttr_passed",
-                "limit": limit
-            }
-            
-            result = await self.client.make_request(operation)
-            
-            if result.get("code") == 0:
-                count = _extract_count_from_message(result.get("message", ""))
-                if count is None:
-                    count = len(result.get("objects", {}))
-                results[term] = count
-            else:
-                results[term] = f"Error: {result.get('message')}"
+        oqls, results = await self._count_comparison_buckets(comparisons, "id,status,sla_ttr_passed", limit)
         
         # Format results
-        output = f"**🔄 {self.class_name} SLA Comparison: Closed On Time vs Not Closed On Time**\n\n"
-        output += f"**Query**: \"{query}\"\n\n"
+        parts = [f"**🔄 {self.class_name} SLA Comparison: Closed On Time vs Not Closed On Time**\n\n"]
+        parts.append(f"**Query**: \"{query}\"\n\n")
         
-        output += f"**OQL for Closed On Time**: `{oqls['closed_on_time']}`\n"
-        output += f"**OQL for Not Closed On Time**: `{oqls['not_closed_on_time']}`\n\n"
+        parts.append(f"**OQL for Closed On Time**: `{oqls['closed_on_time']}`\n")
+        parts.append(f"**OQL for Not Closed On Time**: `{oqls['not_closed_on_time']}`\n\n")
         
         closed_count = results.get('closed_on_time', 0)
         not_closed_count = results.get('not_closed_on_time', 0)
         
-        output += f"📊 **Closed On Time**: {closed_count} {self.class_name.lower()}s\n"
-        output += f"📊 **Not Closed On Time**: {not_closed_count} {self.class_name.lower()}s\n"
+        parts.append(f"📊 **Closed On Time**: {closed_count} {self._class_lower}s\n")
+        parts.append(f"📊 **Not Closed On Time**: {not_closed_count} {self._class_lower}s\n")
         
-        return output
+        return "".join(parts)
     
     def _format_results(self, result: dict, intent: Dict[str, Any], query: str, oql_query: str) -> str:
         """Universal results formatter"""
@@ -1314,136 +2157,122 @@ class SmartHandlerBase:
         message = result.get("message", "")
         total_count = _extract_count_from_message(message)
         
-        # Get appropriate emoji for class
-        emoji_map = {
-            "UserRequest": "🎫",
-            "Ticket": "🎫", 
-            "Change": "🔄",
-            "Incident": "🚨",
-            "Problem": "🔍"
-        }
-        emoji = emoji_map.get(self.class_name, "📋")
-        
-        output = f"**{emoji} {self.class_name} Query Results**\n\n"
-        output += f"**Query**: \"{query}\"\n"
-        output += f"**OQL Used**: `{oql_query}`\n"
+        parts = [f"**{self._emoji} {self.class_name} Query Results**\n\n"]
+        parts.append(f"**Query**: \"{query}\"\n")
+        parts.append(f"**OQL Used**: `{oql_query}`\n")
         
         if intent["filters"]:
-            filter_descriptions = [f.get("display_name", "unknown filter") for f in intent["filters"] if f and isinstance(f, dict)]
-            if filter_descriptions:
-                output += f"**Filters Applied**: {', '.join(filter_descriptions)}\n"
+            filter_descriptions = [f.get("display_name", "unknown filter") for f in intent["filters"]]
+            parts.append(f"**Filters Applied**: {', '.join(filter_descriptions)}\n")
         
         if total_count is not None:
-            output += f"**Total Found**: {total_count}\n"
-        output += f"**Returned**: {len(objects) if objects else 0}\n\n"
+            parts.append(f"**Total Found**: {total_count}\n")
+        returned = len(objects) if objects else 0
+        parts.append(f"**Returned**: {returned}\n\n")
         
         if not objects:
-            return output + f"No {self.class_name.lower()}s found matching your criteria."
-        
-        if intent["action"] == "count":
-            return output + f"**Total {self.class_name}s**: {total_count or (len(objects) if objects else 0)}"
+            parts.append(f"No {self._class_lower}s found matching your criteria.")
+        elif intent["action"] == "count":
+            parts.append(f"**Total {self.class_name}s**: {total_count or returned}")
         elif intent["action"] == "group":
-            return output + SmartGroupingEngine.format_grouped_results(objects, intent["grouping"], self.class_name)
+            parts.append(SmartGroupingEngine.format_grouped_results(objects, intent["grouping"], self.class_name))
         else:
-            return output + self._format_detailed_results(objects, intent)
+            self._write_detailed_results(parts.append, objects, intent)
+        return "".join(parts)
     
     def _format_detailed_results(self, objects: dict, intent: Dict[str, Any]) -> str:
         """Universal detailed results formatter"""
-        output = ""
-        
+        parts = []
+        self._write_detailed_results(parts.append, objects, intent)
+        return "".join(parts)
+    
+    def _write_detailed_results(self, write: Callable[[str], Any], objects: dict, intent: Dict[str, Any]) -> None:
+        """Universal detailed results writer"""
         # Group by type if it's a generic Ticket query
         if self.class_name == "Ticket":
-            type_groups = {}
+            type_groups = defaultdict(list)
             for obj_key, obj_data in objects.items():
                 if obj_data.get("code") == 0:
-                    fields = obj_data.get("fields", {})
-                    ticket_type = fields.get("finalclass", "Unknown")
-                    if ticket_type not in type_groups:
-                        type_groups[ticket_type] = []
-                    type_groups[ticket_type].append((obj_key, obj_data))
+                    type_groups[obj_data.get("fields", {}).get("finalclass", "Unknown")].append((obj_key, obj_data))
             
             for ticket_type, tickets in type_groups.items():
                 if tickets:
-                    output += f"### {ticket_type} ({len(tickets)})\n"
-                    output += self._format_ticket_group(tickets)
-                    output += "\n"
+                    write(f"### {ticket_type} ({len(tickets)})\n")
+                    self._write_ticket_group(write, tickets)
+                    write("\n")
         else:
             # Single class formatting
             for i, (obj_key, obj_data) in enumerate(objects.items(), 1):
                 if obj_data.get("code") == 0:
-                    output += self._format_single_record(i, obj_key, obj_data, intent)
-        
-        return output
+                    self._write_single_record(write, i, obj_key, obj_data, intent)
     
     def _format_ticket_group(self, tickets: list) -> str:
         """Format a group of tickets"""
-        output = ""
+        parts = []
+        self._write_ticket_group(parts.append, tickets)
+        return "".join(parts)
+    
+    def _write_ticket_group(self, write: Callable[[str], Any], tickets: list) -> None:
+        """Write a group of tickets"""
         for i, (obj_key, obj_data) in enumerate(tickets, 1):
-            output += self._format_single_record(i, obj_key, obj_data, {})
-        return output
+            self._write_single_record(write, i, obj_key, obj_data, {})
     
     def _format_single_record(self, index: int, obj_key: str, obj_data: dict, intent: Dict[str, Any]) -> str:
         """Format a single record universally"""
+        parts = []
+        self._write_single_record(parts.append, index, obj_key, obj_data, intent)
+        return "".join(parts)
+    
+    def _write_single_record(self, write: Callable[[str], Any], index: int, obj_key: str, obj_data: dict, intent: Dict[str, Any]) -> None:
+        """Write a single record's lines with write (list.append, StringIO.write, ...)"""
         fields = obj_data.get("fields", {})
+        get = fields.get
         
-        # Get key identifiers
-        ref = fields.get("ref", obj_key)
-        title = fields.get("title", fields.get("name", fields.get("friendlyname", "No title")))
+        # Get key identifiers; fallbacks are only looked up when the preferred field is absent
+        ref = get("ref", obj_key)
+        title = fields["title"] if "title" in fields else fields["name"] if "name" in fields else get("friendlyname", "No title")
         
         # Get status (adapt to class)
-        status = fields.get("status", fields.get("operational_status", "Unknown"))
+        status = fields["status"] if "status" in fields else get("operational_status", "Unknown")
         
-        output = f"{index}. **{ref}** - {title}\n"
-        output += f"   Status: {status}"
+        write(f"{index}. **{ref}** - {title}\n")
+        write(f"   Status: {status}")
         
         # Add priority if available
-        if fields.get("priority"):
-            priority_emoji = {"1": "🔴", "2": "🟡", "3": "🟢", "4": "⚪"}.get(str(fields["priority"]), "")
-            output += f" | Priority: {priority_emoji} {fields['priority']}"
+        priority = get("priority")
+        if priority:
+            write(f" | Priority: {_PRIORITY_EMOJI.get(str(priority), '')} {priority}")
         
         # Add urgency if available
-        if fields.get("urgency"):
-            output += f" | Urgency: {fields['urgency']}"
+        urgency = get("urgency")
+        if urgency:
+            write(f" | Urgency: {urgency}")
         
-        output += "\n"
+        write("\n")
         
         # Add people info
-        people_info = []
-        if fields.get("caller_name"):
-            people_info.append(f"Caller: {fields['caller_name']}")
-        if fields.get("agent_name"):
-            people_info.append(f"Agent: {fields['agent_name']}")
-        if people_info:
-            output += f"   👤 {' | '.join(people_info)}\n"
+        _write_pipe_joined(write, "   👤 ", (("Caller", get("caller_name")), ("Agent", get("agent_name"))))
         
         # Add org/team info
-        org_info = []
-        if fields.get("org_name"):
-            org_info.append(f"Org: {fields['org_name']}")
-        if fields.get("team_name"):
-            org_info.append(f"Team: {fields['team_name']}")
-        if org_info:
-            output += f"   🏢 {' | '.join(org_info)}\n"
+        _write_pipe_joined(write, "   🏢 ", (("Org", get("org_name")), ("Team", get("team_name"))))
         
         # Add dates
-        if fields.get("start_date"):
-            output += f"   📅 Created: {fields['start_date']}\n"
+        start_date = get("start_date")
+        if start_date:
+            write(f"   📅 Created: {start_date}\n")
         
         # Add SLA info if doing SLA analysis
         if intent.get("sla_analysis"):
-            tto_passed = fields.get('sla_tto_passed', '')
-            ttr_passed = fields.get('sla_ttr_passed', '')
+            tto_passed = get('sla_tto_passed', '')
+            ttr_passed = get('sla_ttr_passed', '')
             if tto_passed or ttr_passed:
-                tto_icon = '✅' if tto_passed == 'yes' else '❌' if tto_passed == 'no' else '❓'
-                ttr_icon = '✅' if ttr_passed == 'yes' else '❌' if ttr_passed == 'no' else '❓'
-                output += f"   ⏰ SLA - TTO: {tto_icon} | TTR: {ttr_icon}\n"
+                write(f"   ⏰ SLA - TTO: {_SLA_ICONS.get(tto_passed, '❓')} | TTR: {_SLA_ICONS.get(ttr_passed, '❓')}\n")
         
         # Add class-specific info
-        if self.class_name == "Change" and fields.get("outage") == "yes":
-            output += f"   ⚠️ Planned Outage: Yes\n"
+        if self.class_name == "Change" and get("outage") == "yes":
+            write(f"   ⚠️ Planned Outage: Yes\n")
         
-        output += "\n"
-        return output
+        write("\n")
 
 # =============================================================================
 # Updated Handlers Using Smart Base
@@ -1452,84 +2281,115 @@ class SmartHandlerBase:
 class UserRequestHandler(SmartHandlerBase):
     """Specialized handler for UserRequest queries"""
     
+    # Field mappings based on docs.txt
+    field_mappings = {
+        # Status fields
+        "status": "status",
+        "operational_status": "operational_status", 
+        "state": "status",
+        
+        # Priority/Urgency
+        "priority": "priority",
+        "urgency": "urgency",
+        "impact": "impact",
+        
+        # People
+        "caller": "caller_name",
+        "agent": "agent_name",
+        "approver": "approver_name",
+        "user": "caller_name",
+        
+        # Organization/Team
+        "organization": "org_name",
+        "org": "org_name",
+        "team": "team_name",
+        
+        # Service
+        "service": "service_name",
+        "category": "servicesubcategory_name",
+        
+        # Dates
+        "start_date": "start_date",
+        "end_date": "end_date",
+        "close_date": "close_date",
+        "resolution_date": "resolution_date",
+        "assignment_date": "assignment_date",
+        
+        # SLA fields
+        "sla_tto_passed": "sla_tto_passed",
+        "sla_ttr_passed": "sla_ttr_passed",
+        "tto_escalation_deadline": "tto_escalation_deadline",
+        "ttr_escalation_deadline": "ttr_escalation_deadline",
+        
+        # Content
+        "title": "title",
+        "description": "description",
+        "ref": "ref",
+        "origin": "origin"
+    }
+    
+    # Status value mappings
+    status_values = {
+        "new": "new",
+        "assigned": "assigned", 
+        "pending": "pending",
+        "resolved": "resolved",
+        "closed": "closed",
+        "open": ["new", "assigned", "pending"],
+        "active": ["new", "assigned", "pending", "in_progress"],
+        "ongoing": ["new", "assigned", "pending", "in_progress"],
+        "escalated": ["escalated_tto", "escalated_ttr"],
+        "waiting": "waiting_for_approval",
+        "approved": "approved",
+        "rejected": "rejected",
+        "in_progress": "in_progress",
+        "awaiting_support": "awaiting_support"
+    }
+    
+    # Priority mappings
+    priority_values = {
+        "critical": "1",
+        "high": "2", 
+        "medium": "3",
+        "low": "4"
+    }
+    
     def __init__(self, client: ITopClient):
         super().__init__(client, "UserRequest")
+        self._schema_task = None
+    
+    async def get_schema(self, include_samples: bool = False) -> Dict[str, Any]:
+        """Get UserRequest schema; a pending or successful probe is shared, a failed or empty one is retried.
         
-        # Field mappings based on docs.txt
-        self.field_mappings = {
-            # Status fields
-            "status": "status",
-            "operational_status": "operational_status", 
-            "state": "status",
-            
-            # Priority/Urgency
-            "priority": "priority",
-            "urgency": "urgency",
-            "impact": "impact",
-            
-            # People
-            "caller": "caller_name",
-            "agent": "agent_name",
-            "approver": "approver_name",
-            "user": "caller_name",
-            
-            # Organization/Team
-            "organization": "org_name",
-            "org": "org_name",
-            "team": "team_name",
-            
-            # Service
-            "service": "service_name",
-            "category": "servicesubcategory_name",
-            
-            # Dates
-            "start_date": "start_date",
-            "end_date": "end_date",
-            "close_date": "close_date",
-            "resolution_date": "resolution_date",
-            "assignment_date": "assignment_date",
-            
-            # SLA fields
-            "sla_tto_passed": "sla_tto_passed",
-            "sla_ttr_passed": "sla_ttr_passed",
-            "tto_escalation_deadline": "tto_escalation_deadline",
-            "ttr_escalation_deadline": "ttr_escalation_deadline",
-            
-            # Content
-            "title": "title",
-            "description": "description",
-            "ref": "ref",
-            "origin": "origin"
-        }
-        
-        # Status value mappings
-        self.status_values = {
-            "new": "new",
-            "assigned": "assigned", 
-            "pending": "pending",
-            "resolved": "resolved",
-            "closed": "closed",
-            "open": ["new", "assigned", "pending"],
-            "active": ["new", "assigned", "pending", "in_progress"],
-            "ongoing": ["new", "assigned", "pending", "in_progress"],
-            "escalated": ["escalated_tto", "escalated_ttr"],
-            "waiting": "waiting_for_approval",
-            "approved": "approved",
-            "rejected": "rejected",
-            "in_progress": "in_progress",
-            "awaiting_support": "awaiting_support"
-        }
-        
-        # Priority mappings
-        self.priority_values = {
-            "critical": "1",
-            "high": "2", 
-            "medium": "3",
-            "low": "4"
-        }
+        Sample values (truncated to 100 characters) are only rendered when include_samples is set.
+        """
+        if self._schema_task is None:
+            self._schema_task = asyncio.ensure_future(self._fetch_schema_fields())
+            self._schema_task.add_done_callback(self._forget_failed_schema_probe)
+        fields = await self._schema_task
+        if fields is None:
+            return {}
         
-    async def get_schema(self) -> Dict[str, Any]:
-        """Get UserRequest schema by fetching one record with all fields"""
+        schema = {"field_names": list(fields)}
+        if include_samples:
+            schema["sample_values"] = {k: str(v)[:100] if v else "" for k, v in fields.items()}
+        schema["total_fields"] = len(fields)
+        return schema
+    
+    async def process_query_with_schema(self, query: str, limit: int = 100) -> tuple:
+        """Process a query with the schema probe running concurrently; returns (results, schema)"""
+        results, schema = await asyncio.gather(self.process_query(query, limit), self.get_schema())
+        return results, schema
+    
+    def _forget_failed_schema_probe(self, task: asyncio.Future) -> None:
+        """Drop a probe that raised, was cancelled or read no fields so the next get_schema() retries"""
+        if self._schema_task is not task:
+            return
+        if task.cancelled() or task.exception() is not None or task.result() is None:
+            self._schema_task = None
+    
+    async def _fetch_schema_fields(self) -> Optional[Dict[str, Any]]:
+        """Fetch the fields of one UserRequest record, or None when none can be read"""
         operation = {
             "operation": "core/get",
             "class": self.class_name,
@@ -1541,23 +2401,19 @@ class UserRequestHandler(SmartHandlerBase):
         result = await self.client.make_request(operation)
         
         if result.get("code") != 0:
-            return {}
+            return None
             
         objects = result.get("objects", {})
         if not objects:
-            return {}
+            return None
             
         first_obj = next(iter(objects.values()))
         if first_obj.get("code") == 0:
-            fields = first_obj.get("fields", {})
-            return {
-                "field_names": list(fields.keys()),
-                "sample_values": {k: str(v)[:100] if v else "" for k, v in fields.items()},
-                "total_fields": len(fields)
-            }
+            return first_obj.get("fields", {})
         
-        return {}
+        return None
     
+    @_cached_intent
     def parse_query_intent(self, query: str) -> Dict[str, Any]:
         """Parse natural language query for UserRequest-specific intent"""
         query_lower = query.lower()
@@ -1573,55 +2429,27 @@ class UserRequestHandler(SmartHandlerBase):
         }
         
         # Detect action type - Enhanced comparison detection first with high priority
-        is_comparison = any(word in query_lower for word in ["vs", "versus", "v/s", "compared to", "compare"])
-        is_count_request = any(word in query_lower for word in ["count", "how many", "number of", "total count"]) and not is_comparison
-        is_stats_request = any(word in query_lower for word in ["stats", "statistics", "breakdown", "by status", "group by"]) and not is_comparison
-        
         # PRIORITY ORDER: comparison > count > stats > list
         # This ensures that queries like "count of tickets vs" are treated as comparisons
-        if is_comparison:
-            intent["action"] = "compare"
-            intent["comparison"] = True
-        elif is_count_request:
-            intent["action"] = "count"
-        elif is_stats_request:
-            intent["action"] = "stats"
+        flags = _intent_flags(query_lower)
+        intent["action"] = _USER_REQUEST_ACTIONS[flags & _USER_REQUEST_ACTION_MASK]
+        intent["comparison"] = intent["action"] == "compare"
         
         # Enhanced SLA comparison detection - ONLY for explicit SLA mentions
         # Only apply SLA comparison when both "sla" AND comparison terms are present
-        sla_comparison_patterns = [
-            r"sla.*closed on time.*not closed on time",  # SLA with explicit timing language
-            r"sla.*closed vs not closed",                # SLA mentioned with closed comparison
-            r"closed vs not closed.*sla",                # Closed comparison with SLA mentioned
-            r"sla.*on time vs not on time",              # SLA with timing comparison
-            r"on time vs not on time.*sla",              # Timing comparison with SLA
-            r"met sla vs missed sla",                    # Direct SLA comparison
-            r"sla met vs sla missed",                    # Direct SLA comparison
-            r"support tickets closed on time vs not closed on time based on sla",
-            r"closed vs not closed on time.*sla", 
-            r"closed vs not closed.*on time.*sla",
-            r".*closed on time.*not closed on time.*based on sla.*",  # More flexible pattern
-            r".*sla.*closed on time.*not closed on time.*"   # More flexible pattern
-        ]
-        
         # Check if this is an SLA-related comparison (must have explicit SLA mention)
-        is_sla_comparison = False
-        if "sla" in query_lower:  # Only check patterns if SLA is mentioned
-            for pattern in sla_comparison_patterns:
-                if re.search(pattern, query_lower, re.IGNORECASE):
-                    is_sla_comparison = True
-                    intent["action"] = "compare"
-                    intent["comparison"] = True
-                    intent["sla_analysis"] = True
-                    break
+        if _is_sla_comparison(query_lower):
+            intent["action"] = "compare"
+            intent["comparison"] = True
+            intent["sla_analysis"] = True
         
         # Detect SLA-related queries
-        if any(word in query_lower for word in ["sla", "on time", "late", "overdue", "deadline", "closed on time", "not closed on time"]):
+        if flags & _INTENT_UR_SLA:
             intent["sla_analysis"] = True
             intent["time_analysis"] = True
         
         # Detect ordering requirements
-        if "latest" in query_lower or "newest" in query_lower or "recent" in query_lower:
+        if flags & _INTENT_UR_ORDERING:
             intent["ordering"] = "start_date DESC"
         
         # Extract filters
@@ -1645,27 +2473,12 @@ class UserRequestHandler(SmartHandlerBase):
     def determine_output_fields(self, intent: Dict[str, Any]) -> str:
         """Determine which fields to return based on query intent"""
         if intent["action"] == "count":
-            if intent["grouping"]:
-                return f"id,{intent['grouping']}"
-            else:
-                return "id"
-        
-        # For detailed queries, return key fields
-        key_fields = [
-            "id", "ref", "title", "status", "priority", "urgency",
-            "caller_name", "agent_name", "org_name", "team_name",
-            "start_date", "resolution_date", "close_date"
-        ]
+            return _count_output_fields(intent["grouping"])
         
-        # Add SLA fields if doing SLA analysis
+        # For detailed queries, return key fields, plus the SLA fields when doing SLA analysis
         if intent["sla_analysis"]:
-            sla_fields = [
-                "sla_tto_passed", "sla_ttr_passed", 
-                "tto_escalation_deadline", "ttr_escalation_deadline"
-            ]
-            key_fields.extend(sla_fields)
-        
-        return ",".join(key_fields)
+            return _USER_REQUEST_SLA_OUTPUT_FIELDS
+        return _USER_REQUEST_OUTPUT_FIELDS
     
     async def process_query(self, query: str, limit: int = 100) -> str:
         """Main entry point for processing UserRequest queries"""
@@ -1700,178 +2513,36 @@ class UserRequestHandler(SmartHandlerBase):
             
         except Exception as e:
             return f"❌ **UserRequest Query Error**: {str(e)}"
-    
-
-    
-
-
-    def _format_results(self, result: dict, intent: Dict[str, Any], query: str, oql_query: str) -> str:
-        """Universal results formatter"""
-        if result.get("code") != 0:
-            return f"❌ **{self.class_name} Query Error**: {result.get('message', 'Unknown error')}"
-        
-        objects = result.get("objects", {})
-        message = result.get("message", "")
-        total_count = _extract_count_from_message(message)
-        
-        # Get appropriate emoji for class
-        emoji_map = {
-            "UserRequest": "🎫",
-            "Ticket": "🎫", 
-            "Change": "🔄",
-            "Incident": "🚨",
-            "Problem": "🔍"
-        }
-        emoji = emoji_map.get(self.class_name, "📋")
-        
-        output = f"**{emoji} {self.class_name} Query Results**\n\n"
-        output += f"**Query**: \"{query}\"\n"
-        output += f"**OQL Used**: `{oql_query}`\n"
-        
-        if intent["filters"]:
-            filter_descriptions = [f.get("display_name", "unknown filter") for f in intent["filters"] if f and isinstance(f, dict)]
-            if filter_descriptions:
-                output += f"**Filters Applied**: {', '.join(filter_descriptions)}\n"
-        
-        if total_count is not None:
-            output += f"**Total Found**: {total_count}\n"
-        output += f"**Returned**: {len(objects) if objects else 0}\n\n"
-        
-        if not objects:
-            return output + f"No {self.class_name.lower()}s found matching your criteria."
-        
-        if intent["action"] == "count":
-            return output + f"**Total {self.class_name}s**: {total_count or (len(objects) if objects else 0)}"
-        elif intent["action"] == "group":
-            return output + SmartGroupingEngine.format_grouped_results(objects, intent["grouping"], self.class_name)
-        else:
-            return output + self._format_detailed_results(objects, intent)
-    
-    def _format_detailed_results(self, objects: dict, intent: Dict[str, Any]) -> str:
-        """Universal detailed results formatter"""
-        output = ""
-        
-        # Group by type if it's a generic Ticket query
-        if self.class_name == "Ticket":
-            type_groups = {}
-            for obj_key, obj_data in objects.items():
-                if obj_data.get("code") == 0:
-                    fields = obj_data.get("fields", {})
-                    ticket_type = fields.get("finalclass", "Unknown")
-                    if ticket_type not in type_groups:
-                        type_groups[ticket_type] = []
-                    type_groups[ticket_type].append((obj_key, obj_data))
-            
-            for ticket_type, tickets in type_groups.items():
-                if tickets:
-                    output += f"### {ticket_type} ({len(tickets)})\n"
-                    output += self._format_ticket_group(tickets)
-                    output += "\n"
-        else:
-            # Single class formatting
-            for i, (obj_key, obj_data) in enumerate(objects.items(), 1):
-                if obj_data.get("code") == 0:
-                    output += self._format_single_record(i, obj_key, obj_data, intent)
-        
-        return output
-    
-    def _format_ticket_group(self, tickets: list) -> str:
-        """Format a group of tickets"""
-        output = ""
-        for i, (obj_key, obj_data) in enumerate(tickets, 1):
-            output += self._format_single_record(i, obj_key, obj_data, {})
-        return output
-    
-    def _format_single_record(self, index: int, obj_key: str, obj_data: dict, intent: Dict[str, Any]) -> str:
-        """Format a single record universally"""
-        fields = obj_data.get("fields", {})
-        
-        # Get key identifiers
-        ref = fields.get("ref", obj_key)
-        title = fields.get("title", fields.get("name", fields.get("friendlyname", "No title")))
-        
-        # Get status (adapt to class)
-        status = fields.get("status", fields.get("operational_status", "Unknown"))
-        
-        output = f"{index}. **{ref}** - {title}\n"
-        output += f"   Status: {status}"
-        
-        # Add priority if available
-        if fields.get("priority"):
-            priority_emoji = {"1": "🔴", "2": "🟡", "3": "🟢", "4": "⚪"}.get(str(fields["priority"]), "")
-            output += f" | Priority: {priority_emoji} {fields['priority']}"
-        
-        # Add urgency if available
-        if fields.get("urgency"):
-            output += f" | Urgency: {fields['urgency']}"
-        
-        output += "\n"
-        
-        # Add people info
-        people_info = []
-        if fields.get("caller_name"):
-            people_info.append(f"Caller: {fields['caller_name']}")
-        if fields.get("agent_name"):
-            people_info.append(f"Agent: {fields['agent_name']}")
-        if people_info:
-            output += f"   👤 {' | '.join(people_info)}\n"
-        
-        # Add org/team info
-        org_info = []
-        if fields.get("org_name"):
-            org_info.append(f"Org: {fields['org_name']}")
-        if fields.get("team_name"):
-            org_info.append(f"Team: {fields['team_name']}")
-        if org_info:
-            output += f"   🏢 {' | '.join(org_info)}\n"
-        
-        # Add dates
-        if fields.get("start_date"):
-            output += f"   📅 Created: {fields['start_date']}\n"
-        
-        # Add SLA info if doing SLA analysis
-        if intent.get("sla_analysis"):
-            tto_passed = fields.get('sla_tto_passed', '')
-            ttr_passed = fields.get('sla_ttr_passed', '')
-            if tto_passed or ttr_passed:
-                tto_icon = '✅' if tto_passed == 'yes' else '❌' if tto_passed == 'no' else '❓'
-                ttr_icon = '✅' if ttr_passed == 'yes' else '❌' if ttr_passed == 'no' else '❓'
-                output += f"   ⏰ SLA - TTO: {tto_icon} | TTR: {ttr_icon}\n"
-        
-        # Add class-specific info
-        if self.class_name == "Change" and fields.get("outage") == "yes":
-            output += f"   ⚠️ Planned Outage: Yes\n"
-        
-        output += "\n"
-        return output
 
 class TicketHandler(SmartHandlerBase):
     """Specialized handler for generic Ticket queries - covers all ticket types"""
     
+    schema_fields = {
+        # Core ticket fields from documentation
+        "ref": "Ticket reference",
+        "title": "Ticket title",
+        "description": "Ticket description", 
+        "operational_status": "Status (ongoing/resolved/closed)",
+        "start_date": "Start date",
+        "end_date": "End date",
+        "close_date": "Close date",
+        "last_update": "Last update",
+        
+        # People and teams
+        "org_name": "Organization",
+        "caller_name": "Caller",
+        "team_name": "Team",
+        "agent_name": "Agent",
+        
+        # Sub-class identification
+        "finalclass": "Ticket type (UserRequest/Change/Incident/Problem)",
+        "friendlyname": "Display name"
+    }
+    
     def __init__(self, client: ITopClient):
         super().__init__(client, "Ticket")
-        self.schema_fields = {
-            # Core ticket fields from documentation
-            "ref": "Ticket reference",
-            "title": "Ticket title",
-            "description": "Ticket description", 
-            "operational_status": "Status (ongoing/resolved/closed)",
-            "start_date": "Start date",
-            "end_date": "End date",
-            "close_date": "Close date",
-            "last_update": "Last update",
-            
-            # People and teams
-            "org_name": "Organization",
-            "caller_name": "Caller",
-            "team_name": "Team",
-            "agent_name": "Agent",
-            
-            # Sub-class identification
-            "finalclass": "Ticket type (UserRequest/Change/Incident/Problem)",
-            "friendlyname": "Display name"
-        }
     
+    @_cached_intent
     def parse_query_intent(self, query: str) -> Dict[str, Any]:
         """Parse query intent for tickets"""
         query_lower = query.lower()
@@ -1886,18 +2557,11 @@ class TicketHandler(SmartHandlerBase):
         }
         
         # Detect action type - Enhanced comparison detection first with high priority
-        is_comparison = any(word in query_lower for word in ["vs", "versus", "v/s", "compared to"])
-        is_count_request = any(word in query_lower for word in ["count", "how many", "total"]) and not is_comparison
-        is_grouping = any(word in query_lower for word in ["group by", "grouped by", "breakdown", "summary", "organization wise", "org wise", "by organization", "by org"]) and not is_comparison
-        
         # PRIORITY ORDER: comparison > count > grouping > list
-        if is_comparison:
-            intent["action"] = "compare"
-            intent["comparison"] = True
-        elif is_count_request:
-            intent["action"] = "count"
-        elif is_grouping:
-            intent["action"] = "group"
+        flags = _intent_flags(query_lower)
+        intent["action"] = _TICKET_ACTIONS[flags & _TICKET_ACTION_MASK]
+        intent["comparison"] = intent["action"] == "compare"
+        if intent["action"] == "group":
             intent["grouping"] = SmartGroupingEngine.detect_grouping(query_lower, self.class_name)
         
         # Add filters using smart engine (NO SLA logic for generic tickets)
@@ -1912,10 +2576,7 @@ class TicketHandler(SmartHandlerBase):
     def determine_output_fields(self, intent: Dict[str, Any]) -> str:
         """Determine output fields"""
         if intent["action"] == "count":
-            if intent["grouping"]:
-                return f"id,{intent['grouping']}"
-            else:
-                return "id"
+            return _count_output_fields(intent["grouping"])
         
         # Return all fields for detailed view since Ticket covers multiple classes
         return "*+"
@@ -1926,12 +2587,13 @@ class TicketHandler(SmartHandlerBase):
         
         # SPECIAL HANDLING: If query mentions "critical" tickets, delegate to UserRequest 
         # since Ticket class doesn't have priority field but UserRequest does
-        if "critical" in query_lower and ("ticket" in query_lower or "tickets" in query_lower):
+        if "critical" in query_lower and "ticket" in query_lower:
             user_request_handler = UserRequestHandler(self.client)
-            modified_query = query.replace("ticket", "user request").replace("tickets", "user requests")
+            # One pass covers both forms: "tickets" becomes "user requests"
+            modified_query = query.replace("ticket", "user request")
             result = await user_request_handler.process_query(modified_query, limit)
             # Update the result header to reflect it's showing UserRequests (which are tickets)
-            result = result.replace("UserRequest Query Results", "Critical Ticket Query Results (UserRequests)")
+            result = result.replace("UserRequest Query Results", "Critical Ticket Query Results (UserRequests)", 1)
             result += f"\n**Note**: Showing UserRequests since generic Ticket class doesn't have priority field. Other ticket types (Incident, Problem, Change) would need separate queries."
             return result
         
@@ -1957,29 +2619,6 @@ class TicketHandler(SmartHandlerBase):
         result = await self.client.make_request(operation)
         return self._format_results(result, intent, query, oql_query)
     
-    def _parse_query_intent(self, query: str) -> Dict[str, Any]:
-        """Parse query intent for tickets"""
-        query_lower = query.lower()
-        
-        intent = {
-            "action": "list",
-            "filters": [],
-            "grouping": None,
-            "fields": []
-        }
-        
-        # Determine action
-        if any(word in query_lower for word in ["count", "how many", "total"]):
-            intent["action"] = "count"
-        elif any(word in query_lower for word in ["group by", "breakdown", "summary", "organization wise", "org wise", "by organization", "by org"]):
-            intent["action"] = "group"
-            intent["grouping"] = SmartGroupingEngine.detect_grouping(query_lower, self.class_name)
-        
-        # Add filters using smart engine
-        intent["filters"] = SmartFilterEngine.extract_filters(query_lower, self.class_name)
-        
-        return intent
-    
     def _extract_filters(self, query_lower: str) -> List[Dict[str, Any]]:
         """Extract filters from query using smart filter engine"""
         return SmartFilterEngine.extract_filters(query_lower, self.class_name)
@@ -1993,109 +2632,97 @@ class TicketHandler(SmartHandlerBase):
         message = result.get("message", "")
         total_count = _extract_count_from_message(message)
         
-        output = f"**🎫 Ticket Query Results**\n\n"
-        output += f"**Query**: \"{query}\"\n"
-        output += f"**OQL Used**: `{oql_query}`\n"
+        parts = [f"**🎫 Ticket Query Results**\n\n"]
+        parts.append(f"**Query**: \"{query}\"\n")
+        parts.append(f"**OQL Used**: `{oql_query}`\n")
         
         if intent["filters"]:
-            filter_descriptions = [f.get("display_name", "unknown filter") for f in intent["filters"] if f and isinstance(f, dict)]
-            if filter_descriptions:
-                output += f"**Filters Applied**: {', '.join(filter_descriptions)}\n"
+            filter_descriptions = [f.get("display_name", "unknown filter") for f in intent["filters"]]
+            parts.append(f"**Filters Applied**: {', '.join(filter_descriptions)}\n")
         
         if total_count is not None:
-            output += f"**Total Found**: {total_count}\n"
-        output += f"**Returned**: {len(objects) if objects else 0}\n\n"
+            parts.append(f"**Total Found**: {total_count}\n")
+        returned = len(objects) if objects else 0
+        parts.append(f"**Returned**: {returned}\n\n")
         
         if not objects:
-            return output + "No tickets found matching your criteria."
-        
-        if intent["action"] == "count":
-            return output + f"**Total Tickets**: {total_count or (len(objects) if objects else 0)}"
+            parts.append("No tickets found matching your criteria.")
+        elif intent["action"] == "count":
+            parts.append(f"**Total Tickets**: {total_count or returned}")
         elif intent["action"] == "group":
-            return output + SmartGroupingEngine.format_grouped_results(objects, intent["grouping"], self.class_name)
+            parts.append(SmartGroupingEngine.format_grouped_results(objects, intent["grouping"], self.class_name))
         else:
-            return output + self._format_detailed_results(objects)
+            self._write_detailed_results(parts.append, objects)
+        return "".join(parts)
     
     def _format_detailed_results(self, objects: dict) -> str:
         """Format detailed ticket results"""
-        output = ""
-        
+        parts = []
+        self._write_detailed_results(parts.append, objects)
+        return "".join(parts)
+    
+    def _write_detailed_results(self, write: Callable[[str], Any], objects: dict) -> None:
+        """Write detailed ticket results"""
         # Group by ticket type for better organization
-        type_groups = {}
+        type_groups = defaultdict(list)
         for obj_key, obj_data in objects.items():
             if obj_data.get("code") == 0:
-                fields = obj_data.get("fields", {})
-                ticket_type = fields.get("finalclass", "Unknown")
-                if ticket_type not in type_groups:
-                    type_groups[ticket_type] = []
-                type_groups[ticket_type].append((obj_key, obj_data))
+                type_groups[obj_data.get("fields", {}).get("finalclass", "Unknown")].append((obj_key, obj_data))
         
         for ticket_type, tickets in type_groups.items():
             if tickets:
-                output += f"### {ticket_type} ({len(tickets)})\n"
+                write(f"### {ticket_type} ({len(tickets)})\n")
                 
                 for i, (obj_key, obj_data) in enumerate(tickets, 1):
-                    fields = obj_data.get("fields", {})
-                    
-                    ref = fields.get("ref", obj_key)
-                    title = fields.get("title", "No title")
-                    status = fields.get("operational_status", "Unknown")
-                    
-                    output += f"{i}. **{ref}** - {title}\n"
-                    output += f"   Status: {status}\n"
-                    
-                    if fields.get("caller_name"):
-                        output += f"   Caller: {fields['caller_name']}\n"
-                    if fields.get("org_name"):
-                        output += f"   Organization: {fields['org_name']}\n"
-                    if fields.get("agent_name"):
-                        output += f"   Agent: {fields['agent_name']}\n"
+                    get = obj_data.get("fields", {}).get
                     
-                    output += "\n"
+                    write(f"{i}. **{get('ref', obj_key)}** - {get('title', 'No title')}\n")
+                    write(f"   Status: {get('operational_status', 'Unknown')}\n")
+                    _write_field_lines(write, get, _TICKET_DETAIL_LINES)
+                    write("\n")
                 
-                output += "\n"
-        
-        return output
+                write("\n")
 
 class ChangeHandler(SmartHandlerBase):
     """Specialized handler for Change requests and their subtypes"""
     
+    schema_fields = {
+        # Inherited from Ticket
+        "ref": "Change reference",
+        "title": "Change title", 
+        "description": "Change description",
+        "operational_status": "Operational status",
+        "status": "Change status (new/validated/approved/implemented/closed)",
+        
+        # Change-specific fields
+        "creation_date": "Creation date",
+        "impact": "Impact description",
+        "outage": "Planned outage (yes/no)",
+        "fallback": "Fallback plan",
+        "reason": "Rejection reason",
+        
+        # People involved
+        "caller_name": "Caller",
+        "requestor_id": "Requestor", 
+        "supervisor_group_name": "Supervisor team",
+        "supervisor_id": "Supervisor",
+        "manager_group_name": "Manager team",
+        "manager_id": "Manager",
+        "agent_name": "Assigned agent",
+        
+        # Relationships
+        "parent_name": "Parent change",
+        "related_request_list": "Related user requests",
+        "related_incident_list": "Related incidents", 
+        "related_problems_list": "Related problems",
+        "child_changes_list": "Child changes",
+        
+        # Sub-class info
+        "finalclass": "Change type (NormalChange/EmergencyChange/RoutineChange)"
+    }
+    
     def __init__(self, client: ITopClient):
         super().__init__(client, "Change")
-        self.schema_fields = {
-            # Inherited from Ticket
-            "ref": "Change reference",
-            "title": "Change title", 
-            "description": "Change description",
-            "operational_status": "Operational status",
-            "status": "Change status (new/validated/approved/implemented/closed)",
-            
-            # Change-specific fields
-            "creation_date": "Creation date",
-            "impact": "Impact description",
-            "outage": "Planned outage (yes/no)",
-            "fallback": "Fallback plan",
-            "reason": "Rejection reason",
-            
-            # People involved
-            "caller_name": "Caller",
-            "requestor_id": "Requestor", 
-            "supervisor_group_name": "Supervisor team",
-            "supervisor_id": "Supervisor",
-            "manager_group_name": "Manager team",
-            "manager_id": "Manager",
-            "agent_name": "Assigned agent",
-            
-            # Relationships
-            "parent_name": "Parent change",
-            "related_request_list": "Related user requests",
-            "related_incident_list": "Related incidents", 
-            "related_problems_list": "Related problems",
-            "child_changes_list": "Child changes",
-            
-            # Sub-class info
-            "finalclass": "Change type (NormalChange/EmergencyChange/RoutineChange)"
-        }
     
     async def process_query(self, query: str, limit: int = 100) -> str:
         """Process change query"""
@@ -2115,6 +2742,7 @@ class ChangeHandler(SmartHandlerBase):
         result = await self.client.make_request(operation)
         return self._format_results(result, intent, query, oql_query)
     
+    @_cached_intent
     def _parse_query_intent(self, query: str) -> Dict[str, Any]:
         """Parse change query intent"""
         query_lower = query.lower()
@@ -2127,9 +2755,9 @@ class ChangeHandler(SmartHandlerBase):
         }
         
         # Determine action
-        if any(word in query_lower for word in ["count", "how many", "total"]):
+        if _COUNT_KW.search(query_lower):
             intent["action"] = "count"
-        elif any(word in query_lower for word in ["group by", "breakdown", "summary"]):
+        elif _SUMMARY_KW.search(query_lower):
             intent["action"] = "group"
             intent["grouping"] = SmartGroupingEngine.detect_grouping(query_lower, self.class_name)
         
@@ -2143,7 +2771,7 @@ class ChangeHandler(SmartHandlerBase):
     def determine_output_fields(self, intent: Dict[str, Any]) -> str:
         """Determine output fields for changes"""
         if intent["action"] == "count":
-            return f"id,{intent['grouping']}" if intent["grouping"] else "id"
+            return _count_output_fields(intent["grouping"])
         
         # Return comprehensive fields for changes
         return "*+"
@@ -2157,103 +2785,111 @@ class ChangeHandler(SmartHandlerBase):
         message = result.get("message", "")
         total_count = _extract_count_from_message(message)
         
-        output = f"**🔄 Change Request Results**\n\n"
-        output += f"**Query**: \"{query}\"\n"
-        output += f"**OQL Used**: `{oql_query}`\n"
+        parts = [f"**🔄 Change Request Results**\n\n"]
+        parts.append(f"**Query**: \"{query}\"\n")
+        parts.append(f"**OQL Used**: `{oql_query}`\n")
         
         if intent["filters"]:
-            filter_descriptions = [f.get("display_name", "unknown filter") for f in intent["filters"] if f and isinstance(f, dict)]
-            if filter_descriptions:
-                output += f"**Filters Applied**: {', '.join(filter_descriptions)}\n"
+            filter_descriptions = [f.get("display_name", "unknown filter") for f in intent["filters"]]
+            parts.append(f"**Filters Applied**: {', '.join(filter_descriptions)}\n")
         
         if total_count is not None:
-            output += f"**Total Found**: {total_count}\n"
-        output += f"**Returned**: {len(objects) if objects else 0}\n\n"
+            parts.append(f"**Total Found**: {total_count}\n")
+        returned = len(objects) if objects else 0
+        parts.append(f"**Returned**: {returned}\n\n")
         
         if not objects:
-            return output + "No change requests found matching your criteria."
-        
-        if intent["action"] == "count":
-            return output + f"**Total Changes**: {total_count or (len(objects) if objects else 0)}"
+            parts.append("No change requests found matching your criteria.")
+        elif intent["action"] == "count":
+            parts.append(f"**Total Changes**: {total_count or returned}")
         elif intent["action"] == "group":
-            return output + SmartGroupingEngine.format_grouped_results(objects, intent["grouping"], self.class_name)
+            parts.append(SmartGroupingEngine.format_grouped_results(objects, intent["grouping"], self.class_name))
         else:
-            return output + self._format_detailed_results(objects)
+            self._write_detailed_results(parts.append, objects)
+        return "".join(parts)
     
     def _format_detailed_results(self, objects: dict) -> str:
         """Format detailed change results"""
-        output = ""
-        
-        for i, (obj_key, obj_data) in enumerate(objects.items(), 1):
+        parts = []
+        self._write_detailed_results(parts.append, objects)
+        return "".join(parts)
+    
+    def _write_detailed_results(self, write: Callable[[str], Any], objects: dict) -> None:
+        """Write detailed change results"""
+        for i, obj_data in enumerate(objects.values(), 1):
             if obj_data.get("code") == 0:
                 fields = obj_data.get("fields", {})
+                get = fields.get
                 
-                ref = fields.get("ref", obj_key)
-                title = fields.get("title", "No title")
-                status = fields.get("status", "Unknown")
-                change_type = fields.get("finalclass", "Change")
+                ref = _record_ref(obj_data, fields)
+                title = get("title", "No title")
+                status = get("status", "Unknown")
+                change_type = get("finalclass", "Change")
+                caller_name = get("caller_name")
+                org_name = get("org_name")
+                creation_date = get("creation_date")
+                impact = get("impact")
                 
-                output += f"{i}. **{ref}** - {title}\n"
-                output += f"   Type: {change_type}\n"
-                output += f"   Status: {status}\n"
-                output += f"   Operational Status: {fields.get('operational_status', 'Unknown')}\n"
+                write(f"{i}. **{ref}** - {title}\n")
+                write(f"   Type: {change_type}\n")
+                write(f"   Status: {status}\n")
+                write(f"   Operational Status: {get('operational_status', 'Unknown')}\n")
                 
-                if fields.get("caller_name"):
-                    output += f"   Caller: {fields['caller_name']}\n"
-                if fields.get("org_name"):
-                    output += f"   Organization: {fields['org_name']}\n"
-                if fields.get("creation_date"):
-                    output += f"   Created: {fields['creation_date']}\n"
-                if fields.get("outage") == "yes":
-                    output += f"   ⚠️ Planned Outage: Yes\n"
-                if fields.get("impact"):
-                    output += f"   Impact: {fields['impact']}\n"
+                if caller_name:
+                    write(f"   Caller: {caller_name}\n")
+                if org_name:
+                    write(f"   Organization: {org_name}\n")
+                if creation_date:
+                    write(f"   Created: {creation_date}\n")
+                if get("outage") == "yes":
+                    write(f"   ⚠️ Planned Outage: Yes\n")
+                if impact:
+                    write(f"   Impact: {impact}\n")
                 
-                output += "\n"
-        
-        return output
+                write("\n")
 
 class IncidentHandler(SmartHandlerBase):
     """Specialized handler for Incident tickets"""
     
+    schema_fields = {
+        # Inherited from Ticket
+        "ref": "Incident reference",
+        "title": "Incident title",
+        "description": "Incident description",
+        "operational_status": "Operational status",
+        "status": "Incident status (new/assigned/resolved/closed)",
+        
+        # Incident-specific fields
+        "priority": "Priority (1-4)",
+        "urgency": "Urgency (1-4)", 
+        "impact": "Impact (1-3)",
+        "service_name": "Affected service",
+        "servicesubcategory_name": "Service subcategory",
+        "assignment_date": "Assignment date",
+        "resolution_date": "Resolution date",
+        "resolution_code": "Resolution code",
+        "solution": "Solution description",
+        "time_spent": "Time spent on resolution",
+        "user_satisfaction": "User satisfaction (1-4)",
+        "category": "Category (operational/security)",
+        "source": "Source (opensearch/wazuh/zabbix)",
+        
+        # People
+        "caller_name": "Caller",
+        "agent_name": "Assigned agent",
+        "org_name": "Organization",
+        "team_name": "Team",
+        
+        # Relationships
+        "parent_incident_id": "Parent incident",
+        "parent_problem_id": "Parent problem",
+        "parent_change_id": "Parent change",
+        "related_request_list": "Related user requests",
+        "child_incidents_list": "Child incidents"
+    }
+    
     def __init__(self, client: ITopClient):
         super().__init__(client, "Incident")
-        self.schema_fields = {
-            # Inherited from Ticket
-            "ref": "Incident reference",
-            "title": "Incident title",
-            "description": "Incident description",
-            "operational_status": "Operational status",
-            "status": "Incident status (new/assigned/resolved/closed)",
-            
-            # Incident-specific fields
-            "priority": "Priority (1-4)",
-            "urgency": "Urgency (1-4)", 
-            "impact": "Impact (1-3)",
-            "service_name": "Affected service",
-            "servicesubcategory_name": "Service subcategory",
-            "assignment_date": "Assignment date",
-            "resolution_date": "Resolution date",
-            "resolution_code": "Resolution code",
-            "solution": "Solution description",
-            "time_spent": "Time spent on resolution",
-            "user_satisfaction": "User satisfaction (1-4)",
-            "category": "Category (operational/security)",
-            "source": "Source (opensearch/wazuh/zabbix)",
-            
-            # People
-            "caller_name": "Caller",
-            "agent_name": "Assigned agent",
-            "org_name": "Organization",
-            "team_name": "Team",
-            
-            # Relationships
-            "parent_incident_id": "Parent incident",
-            "parent_problem_id": "Parent problem",
-            "parent_change_id": "Parent change",
-            "related_request_list": "Related user requests",
-            "child_incidents_list": "Child incidents"
-        }
     
     async def process_query(self, query: str, limit: int = 100) -> str:
         """Process incident query with error handling for missing class"""
@@ -2285,6 +2921,7 @@ class IncidentHandler(SmartHandlerBase):
         except Exception as e:
             return f"❌ **Incident Handler Error**: {str(e)}"
     
+    @_cached_intent
     def _parse_query_intent(self, query: str) -> Dict[str, Any]:
         """Parse incident query intent"""
         query_lower = query.lower()
@@ -2297,9 +2934,9 @@ class IncidentHandler(SmartHandlerBase):
         }
         
         # Determine action
-        if any(word in query_lower for word in ["count", "how many", "total"]):
+        if _COUNT_KW.search(query_lower):
             intent["action"] = "count"
-        elif any(word in query_lower for word in ["group by", "breakdown", "summary", "organization wise", "org wise", "by organization", "by org"]):
+        elif _ORG_GROUP_KW.search(query_lower):
             intent["action"] = "group"
             if "priority" in query_lower:
                 intent["grouping"] = "priority"
@@ -2320,26 +2957,12 @@ class IncidentHandler(SmartHandlerBase):
     
     def build_oql_query(self, intent: Dict[str, Any]) -> str:
         """Build OQL query for incidents"""
-        base_query = f"SELECT {self.class_name}"
-        conditions = []
-        
-        for filter_info in intent["filters"]:
-            field = filter_info["field"]
-            operator = filter_info["operator"]
-            value = filter_info["value"]
-            
-            if operator in ["=", "!=", ">", "<", ">=", "<="]:
-                conditions.append(f"{field} {operator} '{value}'")
-        
-        if conditions:
-            base_query += " WHERE " + " AND ".join(conditions)
-        
-        return base_query
+        return SmartQueryBuilder.build_scalar_oql_query(self.class_name, intent["filters"])
     
     def determine_output_fields(self, intent: Dict[str, Any]) -> str:
         """Determine output fields for incidents"""
         if intent["action"] == "count":
-            return f"id,{intent['grouping']}" if intent["grouping"] else "id"
+            return _count_output_fields(intent["grouping"])
         
         return "*+"
     
@@ -2352,111 +2975,111 @@ class IncidentHandler(SmartHandlerBase):
         message = result.get("message", "")
         total_count = _extract_count_from_message(message)
         
-        output = f"**🚨 Incident Results**\n\n"
-        output += f"**Query**: \"{query}\"\n"
-        output += f"**OQL Used**: `{oql_query}`\n"
+        parts = [f"**🚨 Incident Results**\n\n"]
+        parts.append(f"**Query**: \"{query}\"\n")
+        parts.append(f"**OQL Used**: `{oql_query}`\n")
         
         if intent.get("filters"):
-            filter_descriptions = [f.get("display_name", "unknown filter") for f in intent["filters"] if f and isinstance(f, dict)]
-            if filter_descriptions:
-                output += f"**Filters Applied**: {', '.join(filter_descriptions)}\n"
+            filter_descriptions = [f.get("display_name", "unknown filter") for f in intent["filters"]]
+            parts.append(f"**Filters Applied**: {', '.join(filter_descriptions)}\n")
         
         if total_count is not None:
-            output += f"**Total Found**: {total_count}\n"
-        output += f"**Returned**: {len(objects) if objects else 0}\n\n"
+            parts.append(f"**Total Found**: {total_count}\n")
+        returned = len(objects) if objects else 0
+        parts.append(f"**Returned**: {returned}\n\n")
         
         if not objects:
-            return output + "No incidents found matching your criteria."
-        
-        if intent["action"] == "count":
-            return output + f"**Total Incidents**: {total_count or (len(objects) if objects else 0)}"
+            parts.append("No incidents found matching your criteria.")
+        elif intent["action"] == "count":
+            parts.append(f"**Total Incidents**: {total_count or returned}")
         elif intent["action"] == "group":
-            return output + self._format_grouped_results(objects, intent["grouping"])
+            self._write_grouped_results(parts.append, objects, intent["grouping"])
         else:
-            return output + self._format_detailed_results(objects)
+            self._write_detailed_results(parts.append, objects)
+        return "".join(parts)
     
     def _format_grouped_results(self, objects: dict, group_field: str) -> str:
         """Format grouped incident results - Fixed"""
+        parts = []
+        self._write_grouped_results(parts.append, objects, group_field)
+        return "".join(parts)
+    
+    def _write_grouped_results(self, write: Callable[[str], Any], objects: dict, group_field: str) -> None:
+        """Write grouped incident results"""
         if not objects:
-            return f"**No data to group by {group_field}**\n"
+            write(f"**No data to group by {group_field}**\n")
+            return
             
-        groups = {}
-        for obj_data in objects.values():
-            if obj_data.get("code") == 0:
-                fields = obj_data.get("fields", {})
-                group_value = fields.get(group_field, "Unknown")
-                groups[group_value] = groups.get(group_value, 0) + 1
+        groups = Counter(
+            obj_data.get("fields", {}).get(group_field, "Unknown")
+            for obj_data in objects.values()
+            if obj_data.get("code") == 0
+        )
         
-        output = f"**Breakdown by {group_field}:**\n"
+        write(f"**Breakdown by {group_field}:**\n")
         for group, count in sorted(groups.items()):
-            output += f"- {group}: {count}\n"
-        
-        return output
+            write(f"- {group}: {count}\n")
     
     def _format_detailed_results(self, objects: dict) -> str:
         """Format detailed incident results"""
-        output = ""
-        
-        for i, (obj_key, obj_data) in enumerate(objects.items(), 1):
+        parts = []
+        self._write_detailed_results(parts.append, objects)
+        return "".join(parts)
+    
+    def _write_detailed_results(self, write: Callable[[str], Any], objects: dict) -> None:
+        """Write detailed incident results"""
+        for i, obj_data in enumerate(objects.values(), 1):
             if obj_data.get("code") == 0:
                 fields = obj_data.get("fields", {})
+                get = fields.get
                 
-                ref = fields.get("ref", obj_key)
-                title = fields.get("title", "No title")
-                status = fields.get("status", "Unknown")
-                priority = fields.get("priority", "Unknown")
-                
-                output += f"{i}. **{ref}** - {title}\n"
-                output += f"   Status: {status} | Priority: {priority}\n"
+                ref = _record_ref(obj_data, fields)
+                title = get("title", "No title")
+                status = get("status", "Unknown")
+                priority = get("priority", "Unknown")
                 
-                if fields.get("category"):
-                    output += f"   Category: {fields['category']}\n"
-                if fields.get("caller_name"):
-                    output += f"   Caller: {fields['caller_name']}\n"
-                if fields.get("agent_name"):
-                    output += f"   Agent: {fields['agent_name']}\n"
-                if fields.get("source"):
-                    output += f"   Source: {fields['source']}\n"
+                write(f"{i}. **{ref}** - {title}\n")
+                write(f"   Status: {status} | Priority: {priority}\n")
+                _write_field_lines(write, get, _INCIDENT_DETAIL_LINES)
                 
-                output += "\n"
-        
-        return output
+                write("\n")
 
 class ProblemHandler(SmartHandlerBase):
     """Specialized handler for Problem tickets"""
     
+    schema_fields = {
+        # Inherited from Ticket
+        "ref": "Problem reference",
+        "title": "Problem title",
+        "description": "Problem description",
+        "operational_status": "Operational status",
+        "status": "Problem status (new/assigned/resolved/closed)",
+        
+        # Problem-specific fields
+        "priority": "Priority (1-4)",
+        "urgency": "Urgency (1-4)",
+        "impact": "Impact (1-3)",
+        "service_name": "Affected service",
+        "servicesubcategory_name": "Service subcategory",
+        "product": "Product",
+        "assignment_date": "Assignment date",
+        "resolution_date": "Resolution date",
+        
+        # People
+        "caller_name": "Caller",
+        "agent_name": "Assigned agent",
+        "org_name": "Organization",
+        "team_name": "Team",
+        
+        # Relationships
+        "related_change_id": "Related change",
+        "knownerrors_list": "Known errors",
+        "related_request_list": "Related user requests", 
+        "related_incident_list": "Related incidents"
+    }
+    
     def __init__(self, client: ITopClient):
         super().__init__(client, "Problem")
-        self.schema_fields = {
-            # Inherited from Ticket
-            "ref": "Problem reference",
-            "title": "Problem title",
-            "description": "Problem description",
-            "operational_status": "Operational status",
-            "status": "Problem status (new/assigned/resolved/closed)",
-            
-            # Problem-specific fields
-            "priority": "Priority (1-4)",
-            "urgency": "Urgency (1-4)",
-            "impact": "Impact (1-3)",
-            "service_name": "Affected service",
-            "servicesubcategory_name": "Service subcategory",
-            "product": "Product",
-            "assignment_date": "Assignment date",
-            "resolution_date": "Resolution date",
-            
-            # People
-            "caller_name": "Caller",
-            "agent_name": "Assigned agent",
-            "org_name": "Organization",
-            "team_name": "Team",
-            
-            # Relationships
-            "related_change_id": "Related change",
-            "knownerrors_list": "Known errors",
-            "related_request_list": "Related user requests", 
-            "related_incident_list": "Related incidents"
-        }
     
     async def process_query(self, query: str, limit: int = 100) -> str:
         """Process problem query with error handling for missing class"""
@@ -2488,6 +3111,7 @@ class ProblemHandler(SmartHandlerBase):
         except Exception as e:
             return f"❌ **Problem Handler Error**: {str(e)}"
     
+    @_cached_intent
     def _parse_query_intent(self, query: str) -> Dict[str, Any]:
         """Parse problem query intent"""
         query_lower = query.lower()
@@ -2500,9 +3124,9 @@ class ProblemHandler(SmartHandlerBase):
         }
         
         # Determine action
-        if any(word in query_lower for word in ["count", "how many", "total"]):
+        if _COUNT_KW.search(query_lower):
             intent["action"] = "count"
-        elif any(word in query_lower for word in ["group by", "breakdown", "summary"]):
+        elif _SUMMARY_KW.search(query_lower):
             intent["action"] = "group"
             if "priority" in query_lower:
                 intent["grouping"] = "priority"
@@ -2519,26 +3143,12 @@ class ProblemHandler(SmartHandlerBase):
     
     def build_oql_query(self, intent: Dict[str, Any]) -> str:
         """Build OQL query for problems"""
-        base_query = f"SELECT {self.class_name}"
-        conditions = []
-        
-        for filter_info in intent["filters"]:
-            field = filter_info["field"]
-            operator = filter_info["operator"]
-            value = filter_info["value"]
-            
-            if operator in ["=", "!=", ">", "<", ">=", "<="]:
-                conditions.append(f"{field} {operator} '{value}'")
-        
-        if conditions:
-            base_query += " WHERE " + " AND ".join(conditions)
-        
-        return base_query
+        return SmartQueryBuilder.build_scalar_oql_query(self.class_name, intent["filters"])
     
     def determine_output_fields(self, intent: Dict[str, Any]) -> str:
         """Determine output fields for problems"""
         if intent["action"] == "count":
-            return f"id,{intent['grouping']}" if intent["grouping"] else "id"
+            return _count_output_fields(intent["grouping"])
         
         return "*+"
     
@@ -2551,158 +3161,155 @@ class ProblemHandler(SmartHandlerBase):
         message = result.get("message", "")
         total_count = _extract_count_from_message(message)
         
-        output = f"**🔍 Problem Analysis Results**\n\n"
-        output += f"**Query**: \"{query}\"\n"
-        output += f"**OQL Used**: `{oql_query}`\n"
+        parts = [f"**🔍 Problem Analysis Results**\n\n"]
+        parts.append(f"**Query**: \"{query}\"\n")
+        parts.append(f"**OQL Used**: `{oql_query}`\n")
         
         if intent["filters"]:
-            filter_descriptions = [f.get("display_name", "unknown filter") for f in intent["filters"] if f and isinstance(f, dict)]
-            if filter_descriptions:
-                output += f"**Filters Applied**: {', '.join(filter_descriptions)}\n"
+            filter_descriptions = [f.get("display_name", "unknown filter") for f in intent["filters"]]
+            parts.append(f"**Filters Applied**: {', '.join(filter_descriptions)}\n")
         
         if total_count is not None:
-            output += f"**Total Found**: {total_count}\n"
-        output += f"**Returned**: {len(objects) if objects else 0}\n\n"
+            parts.append(f"**Total Found**: {total_count}\n")
+        returned = len(objects) if objects else 0
+        parts.append(f"**Returned**: {returned}\n\n")
         
         if not objects:
-            return output + "No problems found matching your criteria."
-        
-        if intent["action"] == "count":
-            return output + f"**Total Problems**: {total_count or (len(objects) if objects else 0)}"
+            parts.append("No problems found matching your criteria.")
+        elif intent["action"] == "count":
+            parts.append(f"**Total Problems**: {total_count or returned}")
         elif intent["action"] == "group":
-            return output + self._format_grouped_results(objects, intent["grouping"])
+            self._write_grouped_results(parts.append, objects, intent["grouping"])
         else:
-            return output + self._format_detailed_results(objects)
+            self._write_detailed_results(parts.append, objects)
+        return "".join(parts)
     
     def _format_grouped_results(self, objects: dict, group_field: str) -> str:
         """Format grouped problem results"""
+        parts = []
+        self._write_grouped_results(parts.append, objects, group_field)
+        return "".join(parts)
+    
+    def _write_grouped_results(self, write: Callable[[str], Any], objects: dict, group_field: str) -> None:
+        """Write grouped problem results"""
         if not objects:
-            return f"**No data to group by {group_field}**\n"
+            write(f"**No data to group by {group_field}**\n")
+            return
             
-        groups = {}
-        for obj_data in objects.values():
-            if obj_data.get("code") == 0:
-                fields = obj_data.get("fields", {})
-                group_value = fields.get(group_field, "Unknown")
-                groups[group_value] = groups.get(group_value, 0) + 1
+        groups = Counter(
+            obj_data.get("fields", {}).get(group_field, "Unknown")
+            for obj_data in objects.values()
+            if obj_data.get("code") == 0
+        )
         
-        output = f"**Breakdown by {group_field}:**\n"
+        write(f"**Breakdown by {group_field}:**\n")
         for group, count in sorted(groups.items()):
-            output += f"- {group}: {count}\n"
-        
-        return output
+            write(f"- {group}: {count}\n")
     
     def _format_detailed_results(self, objects: dict) -> str:
         """Format detailed problem results"""
-        output = ""
-        
-        for i, (obj_key, obj_data) in enumerate(objects.items(), 1):
+        parts = []
+        self._write_detailed_results(parts.append, objects)
+        return "".join(parts)
+    
+    def _write_detailed_results(self, write: Callable[[str], Any], objects: dict) -> None:
+        """Write detailed problem results"""
+        for i, obj_data in enumerate(objects.values(), 1):
             if obj_data.get("code") == 0:
                 fields = obj_data.get("fields", {})
+                get = fields.get
                 
-                ref = fields.get("ref", obj_key)
-                title = fields.get("title", "No title")
-                status = fields.get("status", "Unknown")
-                priority = fields.get("priority", "Unknown")
-                
-                # Priority emoji mapping
-                priority_emoji = {"1": "🔴", "2": "🟡", "3": "🟢", "4": "⚪"}.get(str(priority), "")
+                ref = _record_ref(obj_data, fields)
+                title = get("title", "No title")
+                status = get("status", "Unknown")
+                priority = get("priority", "Unknown")
                 
-                output += f"{i}. **{ref}** - {title}\n"
-                output += f"   Status: {status}\n"
-                output += f"   Priority: {priority_emoji} {priority}\n"
+                priority_emoji = _PRIORITY_EMOJI.get(str(priority), "")
                 
-                if fields.get("urgency"):
-                    output += f"   Urgency: {fields['urgency']}\n"
-                if fields.get("impact"):
-                    output += f"   Impact: {fields['impact']}\n"
-                if fields.get("caller_name"):
-                    output += f"   Caller: {fields['caller_name']}\n"
-                if fields.get("agent_name"):
-                    output += f"   Agent: {fields['agent_name']}\n"
-                if fields.get("service_name"):
-                    output += f"   Service: {fields['service_name']}\n"
-                if fields.get("product"):
-                    output += f"   Product: {fields['product']}\n"
+                write(f"{i}. **{ref}** - {title}\n")
+                write(f"   Status: {status}\n")
+                write(f"   Priority: {priority_emoji} {priority}\n")
+                _write_field_lines(write, get, _PROBLEM_DETAIL_LINES)
                 
-                output += "\n"
-        
-        return output
+                write("\n")
 
 class PCHandler(SmartHandlerBase):
     """Handler for PC (Personal Computer) queries"""
     
+    # Status values
+    status_values = {
+        "stock": "stock",
+        "implementation": "implementation", 
+        "production": "production",
+        "obsolete": "obsolete",
+        "active": ["stock", "implementation", "production"],
+        "inactive": "obsolete"
+    }
+    
+    # Business criticality values
+    criticality_values = {
+        "critical": "critical",
+        "high": "high",
+        "medium": "medium", 
+        "low": "low"
+    }
+    
+    # PC type keywords, first match wins
+    TYPE_TERMS = ("desktop", "laptop")
+    
+    # Field mappings based on docs.txt
+    field_mappings = {
+        # Core fields
+        "name": "name",
+        "description": "description",
+        "organization": "org_name",
+        "org": "org_name",
+        
+        # Status and lifecycle
+        "status": "status",  # stock/implementation/production/obsolete
+        "business_criticality": "business_criticity",  # critical/high/medium/low
+        "move_to_production": "move2production",
+        
+        # Hardware details
+        "serial_number": "serialnumber",
+        "brand": "brand_name",
+        "model": "model_name",
+        "asset_number": "asset_number",
+        "cpu": "cpu",
+        "ram": "ram",
+        "type": "type",  # desktop/laptop
+        
+        # Location and ownership relationships
+        "location": "location_name",
+        "user": "user_friendlyname",  # Person assigned to PC
+        "owner": "owner_friendlyname",  # Team that owns the PC
+        "contingency": "contingency_friendlyname",  # Backup PC
+        
+        # OS information (detailed)
+        "os_family": "osfamily_name",
+        "os_version": "osversion_name", 
+        "os_license": "oslicence_name",
+        "os_comment": "ocs_oscomment",
+        
+        # Security ratings
+        "confidentiality": "confidentiality",  # 1-4
+        "integrity": "integrity",  # 1-4  
+        "availability": "availability",  # 1-4
+        "score": "score",
+        "cvss": "cvss",
+        
+        # Dates
+        "purchase_date": "purchase_date",
+        "warranty_end": "end_of_warranty",
+        
+        # Network and relationships
+        "contacts": "contacts_list",
+        "softwares": "softwares_list",
+        "tickets": "tickets_list",
+    }
+    
     def __init__(self, client: ITopClient):
         super().__init__(client, "PC")
-        
-        # Field mappings based on docs.txt
-        self.field_mappings = {
-            # Core fields
-            "name": "name",
-            "description": "description",
-            "organization": "org_name",
-            "org": "org_name",
-            
-            # Status and lifecycle
-            "status": "status",  # stock/implementation/production/obsolete
-            "business_criticality": "business_criticity",  # critical/high/medium/low
-            "move_to_production": "move2production",
-            
-            # Hardware details
-            "serial_number": "serialnumber",
-            "brand": "brand_name",
-            "model": "model_name",
-            "asset_number": "asset_number",
-            "cpu": "cpu",
-            "ram": "ram",
-            "type": "type",  # desktop/laptop
-            
-            # Location and ownership relationships
-            "location": "location_name",
-            "user": "user_friendlyname",  # Person assigned to PC
-            "owner": "owner_friendlyname",  # Team that owns the PC
-            "contingency": "contingency_friendlyname",  # Backup PC
-            
-            # OS information (detailed)
-            "os_family": "osfamily_name",
-            "os_version": "osversion_name", 
-            "os_license": "oslicence_name",
-            "os_comment": "ocs_oscomment",
-            
-            # Security ratings
-            "confidentiality": "confidentiality",  # 1-4
-            "integrity": "integrity",  # 1-4  
-            "availability": "availability",  # 1-4
-            "score": "score",
-            "cvss": "cvss",
-            
-            # Dates
-            "purchase_date": "purchase_date",
-            "warranty_end": "end_of_warranty",
-            
-            # Network and relationships
-            "contacts": "contacts_list",
-            "softwares": "softwares_list",
-            "tickets": "tickets_list",
-        }
-        
-        # Status values
-        self.status_values = {
-            "stock": "stock",
-            "implementation": "implementation", 
-            "production": "production",
-            "obsolete": "obsolete",
-            "active": ["stock", "implementation", "production"],
-            "inactive": "obsolete"
-        }
-        
-        # Business criticality values
-        self.criticality_values = {
-            "critical": "critical",
-            "high": "high",
-            "medium": "medium", 
-            "low": "low"
-        }
     
     async def process_query(self, query: str, limit: int = 100) -> str:
         """Process PC query"""
@@ -2722,6 +3329,7 @@ class PCHandler(SmartHandlerBase):
         result = await self.client.make_request(operation)
         return self._format_results(result, intent, query, oql_query)
     
+    @_cached_intent
     def _parse_query_intent(self, query: str) -> Dict[str, Any]:
         """Parse PC query intent"""
         query_lower = query.lower()
@@ -2734,9 +3342,9 @@ class PCHandler(SmartHandlerBase):
         }
         
         # Determine action
-        if any(word in query_lower for word in ["count", "how many", "total"]):
+        if _COUNT_KW.search(query_lower):
             intent["action"] = "count"
-        elif any(word in query_lower for word in ["group by", "breakdown", "summary"]):
+        elif _SUMMARY_KW.search(query_lower):
             intent["action"] = "group"
             intent["grouping"] = self._detect_grouping(query_lower)
         
@@ -2745,33 +3353,18 @@ class PCHandler(SmartHandlerBase):
     
     def _detect_grouping(self, query_lower: str) -> Optional[str]:
         """Detect grouping field for PCs"""
-        if "by status" in query_lower:
-            return "status"
-        elif "by type" in query_lower:
-            return "type"
-        elif "by organization" in query_lower or "by org" in query_lower:
-            return "org_name"
-        elif "by location" in query_lower:
-            return "location_name"
-        elif "by brand" in query_lower:
-            return "brand_name"
-        elif "by os" in query_lower or "by operating system" in query_lower:
-            return "osfamily_name"
-        elif "by criticality" in query_lower:
-            return "business_criticity"
-        elif "by user" in query_lower:
-            return "user_friendlyname"
-        elif "by owner" in query_lower or "by team" in query_lower:
-            return "owner_friendlyname"
-        return None
+        return _PC_GROUPING(query_lower)
     
     def _extract_filters(self, query_lower: str) -> List[Dict[str, Any]]:
         """Extract PC-specific filters"""
         filters = []
         
+        # Every status, type and criticality term in the query, found in one pass
+        terms = {term for _, term in self.KEYWORD_AUTOMATON.iter(query_lower)}
+        
         # Status filters
         for status_term, status_value in self.status_values.items():
-            if status_term in query_lower:
+            if status_term in terms:
                 if isinstance(status_value, list):
                     filters.append({
                         "field": "status",
@@ -2788,103 +3381,56 @@ class PCHandler(SmartHandlerBase):
                     })
         
         # PC type filters
-        if "desktop" in query_lower:
-            filters.append({
-                "field": "type",
-                "operator": "=",
-                "value": "desktop",
-                "display_name": "desktop PCs"
-            })
-        elif "laptop" in query_lower:
+        pc_type = next((term for term in self.TYPE_TERMS if term in terms), None)
+        if pc_type:
             filters.append({
                 "field": "type",
                 "operator": "=",
-                "value": "laptop", 
-                "display_name": "laptop PCs"
+                "value": pc_type,
+                "display_name": f"{pc_type} PCs"
             })
         
         # Criticality filters - DYNAMIC: Handle any combination of criticality values
-        found_criticalities = []
+        # Terms and values are deduplicated in table order (dicts keep insertion order)
+        crit_terms = {}
+        crit_values = {}
         for crit_term, crit_value in self.criticality_values.items():
-            if crit_term in query_lower:
-                found_criticalities.append((crit_term, crit_value))
-        
-        if len(found_criticalities) == 1:
-            # Single criticality
-            crit_term, crit_value = found_criticalities[0]
-            filters.append({
-                "field": "business_criticity",
-                "operator": "=",
-                "value": crit_value,
-                "display_name": f"{crit_term} criticality"
-            })
-        elif len(found_criticalities) > 1:
-            # Multiple criticalities - use IN operator for OR logic
-            unique_values = list(set([crit_value for _, crit_value in found_criticalities]))
-            unique_terms = list(set([crit_term for crit_term, _ in found_criticalities]))
-            
-            if len(unique_values) == 1:
-                # Multiple terms mapping to same criticality value
+            if crit_term in terms:
+                crit_terms.setdefault(crit_term, None)
+                crit_values.setdefault(crit_value, None)
+        
+        if crit_terms:
+            display_name = f"{'/'.join(crit_terms)} criticality"
+            if len(crit_values) == 1:
+                # One criticality, possibly named by several terms
                 filters.append({
                     "field": "business_criticity",
                     "operator": "=",
-                    "value": unique_values[0],
-                    "display_name": f"{'/'.join(unique_terms)} criticality"
+                    "value": next(iter(crit_values)),
+                    "display_name": display_name
                 })
             else:
-                # Multiple different criticalities - support any combination
+                # Multiple criticalities - use IN operator for OR logic
                 filters.append({
                     "field": "business_criticity",
                     "operator": "IN",
-                    "values": unique_values,
-                    "display_name": f"{'/'.join(unique_terms)} criticality"
-                })
-        
-        # Organization filters
-        org_match = re.search(r'organization ["\']([^"\']+)["\']', query_lower)
-        if org_match:
-            org_name = org_match.group(1)
-            filters.append({
-                "field": "org_name",
-                "operator": "LIKE",
-                "value": f"%{org_name}%",
-                "display_name": f"organization contains '{org_name}'"
-            })
-        
-        # Location filters
-        if "location" in query_lower:
-            location_match = re.search(r'location ["\']([^"\']+)["\']', query_lower)
-            if location_match:
-                location_name = location_match.group(1)
-                filters.append({
-                    "field": "location_name",
-                    "operator": "LIKE",
-                    "value": f"%{location_name}%",
-                    "display_name": f"location contains '{location_name}'"
-                })
-        
-        # User assignment filters (who uses the PC)
-        if "user" in query_lower:
-            user_match = re.search(r'user ["\']([^"\']+)["\']', query_lower)
-            if user_match:
-                user_name = user_match.group(1)
-                filters.append({
-                    "field": "user_friendlyname",
-                    "operator": "LIKE",
-                    "value": f"%{user_name}%",
-                    "display_name": f"user contains '{user_name}'"
+                    "values": list(crit_values),
+                    "display_name": display_name
                 })
         
-        # Owner/Team filters (which team owns the PC)
-        if "owner" in query_lower or "team" in query_lower:
-            owner_match = re.search(r'(?:owner|team) ["\']([^"\']+)["\']', query_lower)
-            if owner_match:
-                owner_name = owner_match.group(1)
+        # Organization, location, user and owner/team filters (first quoted value of each)
+        quoted_values = [None] * len(_PC_QUOTED_FILTERS)
+        for match in _PC_QUOTED_FILTER_RE.finditer(query_lower):
+            slot = _PC_QUOTED_FILTER_SLOTS[match.group(1)]
+            if quoted_values[slot] is None:
+                quoted_values[slot] = match.group(2)
+        for (field, label), value in zip(_PC_QUOTED_FILTERS, quoted_values):
+            if value is not None:
                 filters.append({
-                    "field": "owner_friendlyname",
+                    "field": field,
                     "operator": "LIKE",
-                    "value": f"%{owner_name}%",
-                    "display_name": f"owner team contains '{owner_name}'"
+                    "value": f"%{value}%",
+                    "display_name": f"{label} contains '{value}'"
                 })
         
         # OS filters
@@ -2919,7 +3465,7 @@ class PCHandler(SmartHandlerBase):
     def determine_output_fields(self, intent: Dict[str, Any]) -> str:
         """Determine output fields for PCs"""
         if intent["action"] == "count":
-            return f"id,{intent['grouping']}" if intent["grouping"] else "id"
+            return _count_output_fields(intent["grouping"])
         return "*+"
     
     def _format_results(self, result: dict, intent: Dict[str, Any], query: str, oql_query: str) -> str:
@@ -3000,64 +3546,70 @@ class PCHandler(SmartHandlerBase):
         return output
 
 
+PCHandler.KEYWORD_AUTOMATON = _build_keyword_automaton(
+    (term, term)
+    for term in dict.fromkeys([*PCHandler.status_values, *PCHandler.TYPE_TERMS, *PCHandler.criticality_values])
+)
+
+
 class ServerHandler(SmartHandlerBase):
     """Handler for Server queries"""
     
+    field_mappings = {
+        # Core fields  
+        "name": "name",
+        "description": "description",
+        "organization": "org_name",
+        "status": "status",
+        "business_criticality": "business_criticity",
+        
+        # Hardware and location
+        "serial_number": "serialnumber", 
+        "brand": "brand_name",
+        "model": "model_name",
+        "cpu": "cpu",
+        "ram": "ram",
+        "asset_number": "asset_number",
+        
+        # Datacenter placement
+        "rack": "rack_name",
+        "enclosure": "enclosure_name",
+        "location": "location_name",
+        "rack_units": "nb_u",
+        
+        # OS information
+        "os_family": "osfamily_name",
+        "os_version": "osversion_name", 
+        "os_license": "oslicence_name",
+        "os_comment": "ocs_oscomment",
+        
+        # Network
+        "management_ip": "managementip",
+        
+        # Power connections
+        "power_a": "powerA_name",
+        "power_b": "powerB_name",
+        
+        # Security
+        "confidentiality": "confidentiality",
+        "integrity": "integrity",
+        "availability": "availability",
+        "cvss": "cvss",
+        
+        # Ownership and relationships
+        "owner": "owner_friendlyname",  # Team that owns the server
+        "custodians": "custodian_list",  # People responsible for the server
+        "contingency": "contingency_friendlyname",  # Backup server
+        
+        # Related objects
+        "contacts": "contacts_list",
+        "softwares": "softwares_list",
+        "tickets": "tickets_list",
+        "logical_volumes": "logicalvolumes_list",
+    }
+    
     def __init__(self, client: ITopClient):
         super().__init__(client, "Server")
-        
-        self.field_mappings = {
-            # Core fields  
-            "name": "name",
-            "description": "description",
-            "organization": "org_name",
-            "status": "status",
-            "business_criticality": "business_criticity",
-            
-            # Hardware and location
-            "serial_number": "serialnumber", 
-            "brand": "brand_name",
-            "model": "model_name",
-            "cpu": "cpu",
-            "ram": "ram",
-            "asset_number": "asset_number",
-            
-            # Datacenter placement
-            "rack": "rack_name",
-            "enclosure": "enclosure_name",
-            "location": "location_name",
-            "rack_units": "nb_u",
-            
-            # OS information
-            "os_family": "osfamily_name",
-            "os_version": "osversion_name", 
-            "os_license": "oslicence_name",
-            "os_comment": "ocs_oscomment",
-            
-            # Network
-            "management_ip": "managementip",
-            
-            # Power connections
-            "power_a": "powerA_name",
-            "power_b": "powerB_name",
-            
-            # Security
-            "confidentiality": "confidentiality",
-            "integrity": "integrity",
-            "availability": "availability",
-            "cvss": "cvss",
-            
-            # Ownership and relationships
-            "owner": "owner_friendlyname",  # Team that owns the server
-            "custodians": "custodian_list",  # People responsible for the server
-            "contingency": "contingency_friendlyname",  # Backup server
-            
-            # Related objects
-            "contacts": "contacts_list",
-            "softwares": "softwares_list",
-            "tickets": "tickets_list",
-            "logical_volumes": "logicalvolumes_list",
-        }
     
     async def process_query(self, query: str, limit: int = 100) -> str:
         """Process server query"""
@@ -3077,6 +3629,7 @@ class ServerHandler(SmartHandlerBase):
         result = await self.client.make_request(operation)
         return self._format_results(result, intent, query, oql_query)
     
+    @_cached_intent
     def _parse_query_intent(self, query: str) -> Dict[str, Any]:
         """Parse server query intent"""
         query_lower = query.lower()
@@ -3090,12 +3643,12 @@ class ServerHandler(SmartHandlerBase):
         }
         
         # Detect if query is specifically about software/applications
-        if any(word in query_lower for word in ["software", "application", "applications", "installed", "softwares"]):
+        if _SOFTWARE_FOCUS_KW.search(query_lower):
             intent["focus"] = "software"
         
-        if any(word in query_lower for word in ["count", "how many", "total"]):
+        if _COUNT_KW.search(query_lower):
             intent["action"] = "count"
-        elif any(word in query_lower for word in ["group by", "breakdown", "summary"]):
+        elif _SUMMARY_KW.search(query_lower):
             intent["action"] = "group"
             intent["grouping"] = self._detect_grouping(query_lower)
         
@@ -3104,23 +3657,7 @@ class ServerHandler(SmartHandlerBase):
     
     def _detect_grouping(self, query_lower: str) -> Optional[str]:
         """Detect grouping for servers"""
-        if "by status" in query_lower:
-            return "status"
-        elif "by organization" in query_lower:
-            return "org_name"
-        elif "by location" in query_lower:
-            return "location_name"
-        elif "by rack" in query_lower:
-            return "rack_name"
-        elif "by os" in query_lower:
-            return "osfamily_name"
-        elif "by criticality" in query_lower:
-            return "business_criticity"
-        elif "by owner" in query_lower or "by team" in query_lower:
-            return "owner_friendlyname"
-        elif "by brand" in query_lower:
-            return "brand_name"
-        return None
+        return _SERVER_GROUPING(query_lower)
     
     def _extract_filters(self, query_lower: str) -> List[Dict[str, Any]]:
         """Extract server-specific filters"""
@@ -3257,7 +3794,7 @@ class ServerHandler(SmartHandlerBase):
     def determine_output_fields(self, intent: Dict[str, Any]) -> str:
         """Determine output fields for servers"""
         if intent["action"] == "count":
-            return f"id,{intent['grouping']}" if intent["grouping"] else "id"
+            return _count_output_fields(intent["grouping"])
         
         # Use *+ to get all fields including relationships - this works better than explicit field lists
         return "*+"
@@ -3505,44 +4042,44 @@ class ServerHandler(SmartHandlerBase):
 class VirtualMachineHandler(SmartHandlerBase):
     """Handler for Virtual Machine queries"""
     
+    field_mappings = {
+        "name": "name",
+        "description": "description", 
+        "organization": "org_name",
+        "status": "status",
+        "business_criticality": "business_criticity",
+        
+        # Virtual infrastructure
+        "virtual_host": "virtualhost_name",
+        
+        # OS information
+        "os_family": "osfamily_name",
+        "os_version": "osversion_name",
+        "os_license": "oslicence_name",
+        
+        # Resources
+        "cpu": "cpu",
+        "ram": "ram",
+        "management_ip": "managementip",
+        
+        # Ownership and management
+        "owner": "owner_friendlyname",  # Team that owns the VM
+        "custodian": "custodian_friendlyname",  # Person responsible for the VM
+        
+        # Security
+        "confidentiality": "confidentiality",
+        "integrity": "integrity", 
+        "availability": "availability",
+        "cvss": "cvss",
+        
+        # Related objects
+        "contacts": "contacts_list",
+        "softwares": "softwares_list", 
+        "tickets": "tickets_list",
+    }
+    
     def __init__(self, client: ITopClient):
         super().__init__(client, "VirtualMachine")
-        
-        self.field_mappings = {
-            "name": "name",
-            "description": "description", 
-            "organization": "org_name",
-            "status": "status",
-            "business_criticality": "business_criticity",
-            
-            # Virtual infrastructure
-            "virtual_host": "virtualhost_name",
-            
-            # OS information
-            "os_family": "osfamily_name",
-            "os_version": "osversion_name",
-            "os_license": "oslicence_name",
-            
-            # Resources
-            "cpu": "cpu",
-            "ram": "ram",
-            "management_ip": "managementip",
-            
-            # Ownership and management
-            "owner": "owner_friendlyname",  # Team that owns the VM
-            "custodian": "custodian_friendlyname",  # Person responsible for the VM
-            
-            # Security
-            "confidentiality": "confidentiality",
-            "integrity": "integrity", 
-            "availability": "availability",
-            "cvss": "cvss",
-            
-            # Related objects
-            "contacts": "contacts_list",
-            "softwares": "softwares_list", 
-            "tickets": "tickets_list",
-        }
     
     async def process_query(self, query: str, limit: int = 100) -> str:
         """Process virtual machine query"""
@@ -3562,6 +4099,7 @@ class VirtualMachineHandler(SmartHandlerBase):
         result = await self.client.make_request(operation)
         return self._format_results(result, intent, query, oql_query)
     
+    @_cached_intent
     def _parse_query_intent(self, query: str) -> Dict[str, Any]:
         """Parse VM query intent"""
         query_lower = query.lower()
@@ -3573,9 +4111,9 @@ class VirtualMachineHandler(SmartHandlerBase):
             "fields": []
         }
         
-        if any(word in query_lower for word in ["count", "how many", "total"]):
+        if _COUNT_KW.search(query_lower):
             intent["action"] = "count"
-        elif any(word in query_lower for word in ["group by", "breakdown", "summary"]):
+        elif _SUMMARY_KW.search(query_lower):
             intent["action"] = "group"
             intent["grouping"] = self._detect_grouping(query_lower)
         
@@ -3584,19 +4122,7 @@ class VirtualMachineHandler(SmartHandlerBase):
     
     def _detect_grouping(self, query_lower: str) -> Optional[str]:
         """Detect grouping for VMs"""
-        if "by status" in query_lower:
-            return "status"
-        elif "by host" in query_lower or "by virtual host" in query_lower:
-            return "virtualhost_name"
-        elif "by organization" in query_lower:
-            return "org_name"
-        elif "by os" in query_lower:
-            return "osfamily_name"
-        elif "by owner" in query_lower or "by team" in query_lower:
-            return "owner_friendlyname"
-        elif "by custodian" in query_lower:
-            return "custodian_friendlyname"
-        return None
+        return _VM_GROUPING(query_lower)
     
     def _extract_filters(self, query_lower: str) -> List[Dict[str, Any]]:
         """Extract VM-specific filters"""
@@ -3667,7 +4193,7 @@ class VirtualMachineHandler(SmartHandlerBase):
     def determine_output_fields(self, intent: Dict[str, Any]) -> str:
         """Determine output fields for VMs"""
         if intent["action"] == "count":
-            return f"id,{intent['grouping']}" if intent["grouping"] else "id"
+            return _count_output_fields(intent["grouping"])
         return "*+"
     
     def _format_results(self, result: dict, intent: Dict[str, Any], query: str, oql_query: str) -> str:
@@ -3748,66 +4274,66 @@ class VirtualMachineHandler(SmartHandlerBase):
 class NetworkDeviceHandler(SmartHandlerBase):
     """Handler for Network Device queries"""
     
+    field_mappings = {
+        "name": "name",
+        "description": "description",
+        "organization": "org_name", 
+        "status": "status",
+        "business_criticality": "business_criticity",
+        
+        # Location and infrastructure
+        "location": "location_name",
+        "brand": "brand_name",
+        "model": "model_name",
+        "asset_number": "asset_number",
+        "serial_number": "serialnumber",
+        
+        # Network specific
+        "network_type": "networkdevicetype_name",
+        "ios_version": "iosversion_name",
+        "management_ip": "managementip",
+        "ram": "ram",
+        
+        # Datacenter placement
+        "rack": "rack_name",
+        "enclosure": "enclosure_name",
+        "rack_units": "nb_u",
+        
+        # Power connections
+        "power_a": "powerA_name",
+        "power_b": "powerB_name",
+        
+        # Security ratings (missing from original)
+        "confidentiality": "confidentiality",
+        "integrity": "integrity",
+        "availability": "availability",
+        "score": "score",
+        "cvss": "cvss",
+        
+        # Ownership and relationships (corrected field names)
+        "owner": "owner_friendlyname",  # Team that owns the device
+        "custodians": "custodian_list",  # People responsible for the device
+        "contingency": "contingency_friendlyname",  # Backup device
+        
+        # Related objects
+        "contacts": "contacts_list",
+        "connected_devices": "connectablecis_list",
+        "softwares": "softwares_list",
+        "tickets": "tickets_list",
+        "documents": "documents_list",
+        "services": "services_list",
+        "fiber_interfaces": "fiberinterfacelist_list",
+        "sans": "san_list",
+        "physical_interfaces": "physicalinterface_list",
+        
+        # Dates
+        "purchase_date": "purchase_date",
+        "warranty_end": "end_of_warranty",
+        "move_to_production": "move2production",
+    }
+    
     def __init__(self, client: ITopClient):
         super().__init__(client, "NetworkDevice")
-        
-        self.field_mappings = {
-            "name": "name",
-            "description": "description",
-            "organization": "org_name", 
-            "status": "status",
-            "business_criticality": "business_criticity",
-            
-            # Location and infrastructure
-            "location": "location_name",
-            "brand": "brand_name",
-            "model": "model_name",
-            "asset_number": "asset_number",
-            "serial_number": "serialnumber",
-            
-            # Network specific
-            "network_type": "networkdevicetype_name",
-            "ios_version": "iosversion_name",
-            "management_ip": "managementip",
-            "ram": "ram",
-            
-            # Datacenter placement
-            "rack": "rack_name",
-            "enclosure": "enclosure_name",
-            "rack_units": "nb_u",
-            
-            # Power connections
-            "power_a": "powerA_name",
-            "power_b": "powerB_name",
-            
-            # Security ratings (missing from original)
-            "confidentiality": "confidentiality",
-            "integrity": "integrity",
-            "availability": "availability",
-            "score": "score",
-            "cvss": "cvss",
-            
-            # Ownership and relationships (corrected field names)
-            "owner": "owner_friendlyname",  # Team that owns the device
-            "custodians": "custodian_list",  # People responsible for the device
-            "contingency": "contingency_friendlyname",  # Backup device
-            
-            # Related objects
-            "contacts": "contacts_list",
-            "connected_devices": "connectablecis_list",
-            "softwares": "softwares_list",
-            "tickets": "tickets_list",
-            "documents": "documents_list",
-            "services": "services_list",
-            "fiber_interfaces": "fiberinterfacelist_list",
-            "sans": "san_list",
-            "physical_interfaces": "physicalinterface_list",
-            
-            # Dates
-            "purchase_date": "purchase_date",
-            "warranty_end": "end_of_warranty",
-            "move_to_production": "move2production",
-        }
     
     async def process_query(self, query: str, limit: int = 100) -> str:
         """Process network device query"""
@@ -3827,6 +4353,7 @@ class NetworkDeviceHandler(SmartHandlerBase):
         result = await self.client.make_request(operation)
         return self._format_results(result, intent, query, oql_query)
     
+    @_cached_intent
     def _parse_query_intent(self, query: str) -> Dict[str, Any]:
         """Parse network device query intent"""
         query_lower = query.lower()
@@ -3838,9 +4365,9 @@ class NetworkDeviceHandler(SmartHandlerBase):
             "fields": []
         }
         
-        if any(word in query_lower for word in ["count", "how many", "total"]):
+        if _COUNT_KW.search(query_lower):
             intent["action"] = "count"
-        elif any(word in query_lower for word in ["group by", "breakdown", "summary"]):
+        elif _SUMMARY_KW.search(query_lower):
             intent["action"] = "group"
             intent["grouping"] = self._detect_grouping(query_lower)
         
@@ -3849,21 +4376,7 @@ class NetworkDeviceHandler(SmartHandlerBase):
     
     def _detect_grouping(self, query_lower: str) -> Optional[str]:
         """Detect grouping for network devices"""
-        if "by type" in query_lower:
-            return "networkdevicetype_name"
-        elif "by status" in query_lower:
-            return "status"
-        elif "by location" in query_lower:
-            return "location_name"
-        elif "by organization" in query_lower:
-            return "org_name"
-        elif "by brand" in query_lower:
-            return "brand_name"
-        elif "by owner" in query_lower or "by team" in query_lower:
-            return "owner_friendlyname"
-        elif "by rack" in query_lower:
-            return "rack_name"
-        return None
+        return _NETWORK_DEVICE_GROUPING(query_lower)
     
     def _extract_filters(self, query_lower: str) -> List[Dict[str, Any]]:
         """Extract network device specific filters"""
@@ -3955,7 +4468,7 @@ class NetworkDeviceHandler(SmartHandlerBase):
     def determine_output_fields(self, intent: Dict[str, Any]) -> str:
         """Determine output fields for network devices"""
         if intent["action"] == "count":
-            return f"id,{intent['grouping']}" if intent["grouping"] else "id"
+            return _count_output_fields(intent["grouping"])
         return "*+"
     
     def _format_results(self, result: dict, intent: Dict[str, Any], query: str, oql_query: str) -> str:
@@ -4054,46 +4567,46 @@ class NetworkDeviceHandler(SmartHandlerBase):
 class PersonHandler(SmartHandlerBase):
     """Handler for Person queries"""
     
+    field_mappings = {
+        "name": "name",  # Last name
+        "first_name": "first_name",
+        "full_name": "friendlyname",
+        "email": "email",
+        "phone": "phone",
+        "mobile": "mobile_phone",
+        "status": "status",  # active/inactive
+        "organization": "org_name",
+        "function": "function",
+        "employee_number": "employee_number",
+        "location": "location_name",
+        "manager": "manager_name",
+        "business_criticality": "business_criticity",
+        
+        # Security ratings (from docs)
+        "confidentiality": "confidentiality",
+        "integrity": "integrity", 
+        "availability": "availability",
+        "score": "score",
+        
+        # Relationships
+        "contingency": "contingency_friendlyname",  # Backup person
+        "teams": "team_list",  # Teams this person belongs to
+        "users": "user_list",  # User accounts for this person
+        "tickets": "tickets_list",  # Tickets assigned to this person
+        "cis": "cis_list",  # CIs this person is contact for
+        
+        # Additional fields
+        "notify": "notify",  # Notification setting
+        "picture": "picture",  # Profile picture
+    }
+    
+    status_values = {
+        "active": "active",
+        "inactive": "inactive"
+    }
+    
     def __init__(self, client: ITopClient):
         super().__init__(client, "Person")
-        
-        self.field_mappings = {
-            "name": "name",  # Last name
-            "first_name": "first_name",
-            "full_name": "friendlyname",
-            "email": "email",
-            "phone": "phone",
-            "mobile": "mobile_phone",
-            "status": "status",  # active/inactive
-            "organization": "org_name",
-            "function": "function",
-            "employee_number": "employee_number",
-            "location": "location_name",
-            "manager": "manager_name",
-            "business_criticality": "business_criticity",
-            
-            # Security ratings (from docs)
-            "confidentiality": "confidentiality",
-            "integrity": "integrity", 
-            "availability": "availability",
-            "score": "score",
-            
-            # Relationships
-            "contingency": "contingency_friendlyname",  # Backup person
-            "teams": "team_list",  # Teams this person belongs to
-            "users": "user_list",  # User accounts for this person
-            "tickets": "tickets_list",  # Tickets assigned to this person
-            "cis": "cis_list",  # CIs this person is contact for
-            
-            # Additional fields
-            "notify": "notify",  # Notification setting
-            "picture": "picture",  # Profile picture
-        }
-        
-        self.status_values = {
-            "active": "active",
-            "inactive": "inactive"
-        }
     
     async def process_query(self, query: str, limit: int = 100) -> str:
         """Process person query"""
@@ -4113,6 +4626,7 @@ class PersonHandler(SmartHandlerBase):
         result = await self.client.make_request(operation)
         return self._format_results(result, intent, query, oql_query)
     
+    @_cached_intent
     def _parse_query_intent(self, query: str) -> Dict[str, Any]:
         """Parse person query intent"""
         query_lower = query.lower()
@@ -4124,9 +4638,9 @@ class PersonHandler(SmartHandlerBase):
             "fields": []
         }
         
-        if any(word in query_lower for word in ["count", "how many", "total"]):
+        if _COUNT_KW.search(query_lower):
             intent["action"] = "count"
-        elif any(word in query_lower for word in ["group by", "breakdown", "summary"]):
+        elif _SUMMARY_KW.search(query_lower):
             intent["action"] = "group"
             intent["grouping"] = self._detect_grouping(query_lower)
         
@@ -4135,15 +4649,7 @@ class PersonHandler(SmartHandlerBase):
     
     def _detect_grouping(self, query_lower: str) -> Optional[str]:
         """Detect grouping for people"""
-        if "by organization" in query_lower:
-            return "org_name"
-        elif "by location" in query_lower:
-            return "location_name"
-        elif "by function" in query_lower:
-            return "function"
-        elif "by status" in query_lower:
-            return "status"
-        return None
+        return _PERSON_GROUPING(query_lower)
     
     def _extract_filters(self, query_lower: str) -> List[Dict[str, Any]]:
         """Extract person-specific filters"""
@@ -4194,7 +4700,7 @@ class PersonHandler(SmartHandlerBase):
     def determine_output_fields(self, intent: Dict[str, Any]) -> str:
         """Determine output fields for people"""
         if intent["action"] == "count":
-            return f"id,{intent['grouping']}" if intent["grouping"] else "id"
+            return _count_output_fields(intent["grouping"])
         return "*+"
     
     def _format_results(self, result: dict, intent: Dict[str, Any], query: str, oql_query: str) -> str:
@@ -4269,23 +4775,23 @@ class PersonHandler(SmartHandlerBase):
 class TeamHandler(SmartHandlerBase):
     """Handler for Team queries"""
     
+    field_mappings = {
+        "name": "name",
+        "status": "status",  # active/inactive
+        "organization": "org_name",
+        "email": "email",
+        "phone": "phone",
+        "function": "function",
+        
+        # Team specific fields
+        "members": "persons_list",  # Team members
+        "tickets": "tickets_list",  # Tickets assigned to team
+        "cis": "cis_list",  # CIs this team is contact for
+        "notify": "notify",  # Notification setting
+    }
+    
     def __init__(self, client: ITopClient):
         super().__init__(client, "Team")
-        
-        self.field_mappings = {
-            "name": "name",
-            "status": "status",  # active/inactive
-            "organization": "org_name",
-            "email": "email",
-            "phone": "phone",
-            "function": "function",
-            
-            # Team specific fields
-            "members": "persons_list",  # Team members
-            "tickets": "tickets_list",  # Tickets assigned to team
-            "cis": "cis_list",  # CIs this team is contact for
-            "notify": "notify",  # Notification setting
-        }
     
     async def process_query(self, query: str, limit: int = 100) -> str:
         """Process team query"""
@@ -4305,6 +4811,7 @@ class TeamHandler(SmartHandlerBase):
         result = await self.client.make_request(operation)
         return self._format_results(result, intent, query, oql_query)
     
+    @_cached_intent
     def _parse_query_intent(self, query: str) -> Dict[str, Any]:
         """Parse team query intent"""
         query_lower = query.lower()
@@ -4316,9 +4823,9 @@ class TeamHandler(SmartHandlerBase):
             "fields": []
         }
         
-        if any(word in query_lower for word in ["count", "how many", "total"]):
+        if _COUNT_KW.search(query_lower):
             intent["action"] = "count"
-        elif any(word in query_lower for word in ["group by", "breakdown", "summary"]):
+        elif _SUMMARY_KW.search(query_lower):
             intent["action"] = "group"
             intent["grouping"] = self._detect_grouping(query_lower)
         
@@ -4327,13 +4834,7 @@ class TeamHandler(SmartHandlerBase):
     
     def _detect_grouping(self, query_lower: str) -> Optional[str]:
         """Detect grouping for teams"""
-        if "by organization" in query_lower:
-            return "org_name"
-        elif "by function" in query_lower:
-            return "function"
-        elif "by status" in query_lower:
-            return "status"
-        return None
+        return _TEAM_GROUPING(query_lower)
     
     def _extract_filters(self, query_lower: str) -> List[Dict[str, Any]]:
         """Extract team-specific filters"""
@@ -4356,7 +4857,7 @@ class TeamHandler(SmartHandlerBase):
     def determine_output_fields(self, intent: Dict[str, Any]) -> str:
         """Determine output fields for teams"""
         if intent["action"] == "count":
-            return f"id,{intent['grouping']}" if intent["grouping"] else "id"
+            return _count_output_fields(intent["grouping"])
         return "*+"
     
     def _format_results(self, result: dict, intent: Dict[str, Any], query: str, oql_query: str) -> str:
@@ -4421,16 +4922,16 @@ class TeamHandler(SmartHandlerBase):
 class OrganizationHandler(SmartHandlerBase):
     """Handler for Organization queries"""
     
+    field_mappings = {
+        "name": "name",
+        "code": "code", 
+        "status": "status",  # active/inactive
+        "parent": "parent_name",
+        "delivery_model": "deliverymodel_name",
+    }
+    
     def __init__(self, client: ITopClient):
         super().__init__(client, "Organization")
-        
-        self.field_mappings = {
-            "name": "name",
-            "code": "code", 
-            "status": "status",  # active/inactive
-            "parent": "parent_name",
-            "delivery_model": "deliverymodel_name",
-        }
     
     async def process_query(self, query: str, limit: int = 100) -> str:
         """Process organization query"""
@@ -4450,6 +4951,7 @@ class OrganizationHandler(SmartHandlerBase):
         result = await self.client.make_request(operation)
         return self._format_results(result, intent, query, oql_query)
     
+    @_cached_intent
     def _parse_query_intent(self, query: str) -> Dict[str, Any]:
         """Parse organization query intent"""
         query_lower = query.lower()
@@ -4461,9 +4963,9 @@ class OrganizationHandler(SmartHandlerBase):
             "fields": []
         }
         
-        if any(word in query_lower for word in ["count", "how many", "total"]):
+        if _COUNT_KW.search(query_lower):
             intent["action"] = "count"
-        elif any(word in query_lower for word in ["group by", "breakdown", "summary"]):
+        elif _SUMMARY_KW.search(query_lower):
             intent["action"] = "group"
             intent["grouping"] = self._detect_grouping(query_lower)
         
@@ -4472,13 +4974,7 @@ class OrganizationHandler(SmartHandlerBase):
     
     def _detect_grouping(self, query_lower: str) -> Optional[str]:
         """Detect grouping for organizations"""
-        if "by status" in query_lower:
-            return "status"
-        elif "by parent" in query_lower:
-            return "parent_name"
-        elif "by delivery model" in query_lower:
-            return "deliverymodel_name"
-        return None
+        return _ORGANIZATION_GROUPING(query_lower)
     
     def _extract_filters(self, query_lower: str) -> List[Dict[str, Any]]:
         """Extract organization-specific filters"""
@@ -4501,7 +4997,7 @@ class OrganizationHandler(SmartHandlerBase):
     def determine_output_fields(self, intent: Dict[str, Any]) -> str:
         """Determine output fields for organizations"""
         if intent["action"] == "count":
-            return f"id,{intent['grouping']}" if intent["grouping"] else "id"
+            return _count_output_fields(intent["grouping"])
         return "*+"
     
     def _format_results(self, result: dict, intent: Dict[str, Any], query: str, oql_query: str) -> str:
@@ -4635,15 +5131,15 @@ async def _generic_handler(query: str, class_name: str, client: ITopClient, limi
     query_lower = query.lower()
     
     # Handle comparison queries (vs, compared to, etc.)
-    if any(comp_word in query_lower for comp_word in ["vs", "versus", "compared to", "comparison"]):
+    if _GENERIC_COMPARE_KW.search(query_lower):
         return await _handle_generic_comparison(query, class_name, client, limit)
     
     # Handle grouping/breakdown queries
-    if any(group_word in query_lower for group_word in ["organization wise", "organisation wise", "by organization", "by organisation", "breakdown", "group by"]):
+    if _GENERIC_GROUP_KW.search(query_lower):
         return await _handle_generic_grouping(query, class_name, client, limit)
     
     # Simple count or list query
-    if any(word in query_lower for word in ["count", "how many"]):
+    if _GENERIC_COUNT_KW.search(query_lower):
         operation = {
             "operation": "core/get",
             "class": class_name,
@@ -4725,11 +5221,12 @@ async def _handle_generic_grouping(query: str, class_name: str, client: ITopClie
     
     # Try to detect grouping field
     grouping_field = None
-    if "organization" in query.lower() or "organisation" in query.lower():
+    query_lower = query.lower()
+    if "organization" in query_lower or "organisation" in query_lower:
         grouping_field = "org_name"
-    elif "status" in query.lower():
+    elif "status" in query_lower:
         grouping_field = "status"
-    elif "location" in query.lower():
+    elif "location" in query_lower:
         grouping_field = "location_name"
     
     if not grouping_field:
@@ -4755,14 +5252,11 @@ async def _handle_generic_grouping(query: str, class_name: str, client: ITopClie
     total_count = _extract_count_from_message(result.get("message", ""))
     
     # Group results
-    groups = {}
-    for obj_key, obj_data in objects.items():
-        if obj_data.get("code") == 0:
-            fields = obj_data.get("fields", {})
-            group_value = fields.get(grouping_field, "Unknown")
-            if group_value not in groups:
-                groups[group_value] = 0
-            groups[group_value] += 1
+    groups = Counter(
+        obj_data.get("fields", {}).get(grouping_field, "Unknown")
+        for obj_data in objects.values()
+        if obj_data.get("code") == 0
+    )
     
     output = f"**📊 {class_name} Grouped by {grouping_field.replace('_', ' ').title()}**\n\n"
     output += f"**Query**: \"{query}\"\n"
@@ -4788,13 +5282,15 @@ def _get_interesting_fields_for_class(class_name: str) -> List[str]:
     }
     
     return class_specific.get(class_name, common_fields)
+# list_operations never varies, so its request payload is encoded once at import
+_LIST_OPERATIONS_PAYLOAD = quote_plus(_json_dumps({"operation": "list_operations"}))
+
 @mcp.tool()
 async def list_operations() -> str:
     """List all available operations in the iTop REST API."""
     try:
         client = get_itop_client()
-        operation_data = {"operation": "list_operations"}
-        result = await client.make_request(operation_data)
+        result = await client.make_encoded_request(_LIST_OPERATIONS_PAYLOAD)
         
         if result.get("code") != 0:
             return f"Error: {result.get('message', 'Unknown error')}"
@@ -0,0 +1,582 @@
+"""
+Unit Tests for the Smart Query V2 engines
+
+These tests exercise the query parsing helpers and do not need a live iTop instance.
+"""
+
+import asyncio
+import io
+import json
+import os
+import sys
+from urllib.parse import unquote_plus
+
+# Add the main module to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import (
+    ITopClient,
+    IncidentHandler,
+    PCHandler,
+    ProblemHandler,
+    SmartFilterEngine,
+    SmartGroupingEngine,
+    SmartHandlerBase,
+    SmartQueryBuilder,
+    TicketHandler,
+    UserRequestHandler,
+    _BoundedCache,
+    _KeywordAutomaton,
+    _encode_operation,
+    _is_sla_comparison,
+    _extract_count_from_message,
+    smart_class_detection
+)
+
+
+class TestExtractCount:
+    """Unit tests for count extraction from iTop API messages."""
+
+    def test_found_formats(self):
+        """Test the common iTop 'Found' message formats."""
+        assert _extract_count_from_message("Found: 92") == 92
+        assert _extract_count_from_message("found:7") == 7
+        assert _extract_count_from_message("92 objects found") == 92
+
+    def test_other_formats(self):
+        """Test alternative message formats."""
+        assert _extract_count_from_message("returned 12 objects") == 12
+        assert _extract_count_from_message("Total: 5") == 5
+        assert _extract_count_from_message("Query took 3s, 40 results") == 40
+
+    def test_no_count(self):
+        """Test messages without a usable count."""
+        assert _extract_count_from_message("") == 0
+        assert _extract_count_from_message("OK") == 0
+        assert _extract_count_from_message("Found: 99999999") == 0
+
+    def test_pattern_preference(self):
+        """Test that preferred patterns win over earlier, less specific matches."""
+        assert _extract_count_from_message("count 3 records 7 found") == 7
+        assert _extract_count_from_message("Found: 2000000 (total 15)") == 15
+
+
+class TestKeywordAutomaton:
+    """Unit tests for the pure-Python keyword automaton fallback."""
+
+    def test_reports_overlapping_matches(self):
+        """Test that every keyword occurrence is reported, including overlaps."""
+        automaton = _KeywordAutomaton()
+        for word in ["change", "changes", "hang", "user request"]:
+            automaton.add_word(word, word)
+        automaton.make_automaton()
+
+        matches = list(automaton.iter("user requests and changes"))
+        assert (11, "user request") in matches
+        assert {value for _, value in matches} == {"user request", "change", "changes", "hang"}
+
+    def test_no_match(self):
+        """Test scanning text without keywords."""
+        automaton = _KeywordAutomaton()
+        automaton.add_word("server", "server")
+        automaton.make_automaton()
+        assert list(automaton.iter("")) == []
+        assert list(automaton.iter("serve")) == []
+
+
+class TestSmartClassDetection:
+    """Unit tests for routing queries to iTop classes."""
+
+    def test_priority_rules(self):
+        """Test the priority routing rules."""
+        assert smart_class_detection("network devices and their location")[0] == "NetworkDevice"
+        assert smart_class_detection("software installed on server")[0] == "Server"
+        assert smart_class_detection("show me tickets")[0] == "Ticket"
+        assert smart_class_detection("support tickets with sla issues")[0] == "UserRequest"
+
+    def test_taxonomy_scoring(self):
+        """Test keyword and class name scoring."""
+        assert smart_class_detection("list all servers")[:2] == ("Server", 0.9)
+        assert smart_class_detection("emergency change")[:2] == ("Change", 1.0)
+        assert smart_class_detection("vm")[2]["category"] == "Virtual Machines"
+
+    def test_fallback(self):
+        """Test fallback when nothing matches."""
+        assert smart_class_detection("hello") == ("UserRequest", 0.1, {"action": "list", "fallback": True})
+
+
+class TestOperationEncoding:
+    """Unit tests for REST operation payload encoding."""
+
+    def test_round_trip(self):
+        """Test that the encoded payload decodes back to the operation."""
+        operation = {"operation": "core/get", "class": "UserRequest", "key": "SELECT UserRequest WHERE status = 'new'"}
+        assert json.loads(unquote_plus(_encode_operation(operation))) == operation
+
+    def test_cache_keeps_types_apart(self):
+        """Test that equal-comparing values of different types are encoded separately."""
+        assert json.loads(unquote_plus(_encode_operation({"operation": "core/get", "limit": 1})))["limit"] == 1
+        assert json.loads(unquote_plus(_encode_operation({"operation": "core/get", "limit": True})))["limit"] is True
+
+
+class TestRequestCoalescing:
+    """Unit tests for sharing concurrent identical requests."""
+
+    def test_identical_reads_share_one_request(self):
+        """Test that concurrent identical reads hit iTop once while writes are always sent."""
+        client = ITopClient("http://itop", "user", "secret")
+        sent = []
+
+        async def fake_send(encoded_json_data):
+            sent.append(encoded_json_data)
+            await asyncio.sleep(0)
+            return {"code": 0, "objects": None}
+
+        client.make_encoded_request = fake_send
+        read = {"operation": "core/get", "class": "Server", "key": "SELECT Server"}
+        write = {"operation": "core/create", "class": "Server", "fields": {"name": "a"}}
+
+        async def run():
+            return await asyncio.gather(client.make_request(read), client.make_request(read),
+                                        client.make_request(write), client.make_request(write))
+
+        results = asyncio.run(run())
+        assert len(sent) == 3 and results[0] is results[1]
+        assert client._inflight == {}
+
+    def test_reads_reused_until_write_or_bust(self):
+        """Test that a repeated read is served from cache until a write or an explicit bust."""
+        client = ITopClient("http://itop", "user", "secret")
+        sent = []
+
+        async def fake_send(encoded_json_data):
+            sent.append(encoded_json_data)
+            return {"code": 0, "objects": None}
+
+        client.make_encoded_request = fake_send
+        read = {"operation": "core/get", "class": "Server", "key": "SELECT Server"}
+
+        async def run():
+            await client.make_request(read)
+            await client.make_request(read)
+            await client.make_request(read, cache_bust=True)
+            await client.make_request({"operation": "core/delete", "class": "Server", "key": 1})
+            await client.make_request(read)
+
+        asyncio.run(run())
+        assert len(sent) == 4
+
+    def test_read_overlapping_write_is_not_cached(self):
+        """Test that a read still in flight when a write is sent is neither cached nor joined."""
+        client = ITopClient("http://itop", "user", "secret")
+        sent = []
+        state = {"value": "old"}
+        release = asyncio.Event()
+
+        async def fake_send(encoded_json_data):
+            sent.append(encoded_json_data)
+            if "update" in encoded_json_data:
+                state["value"] = "new"
+                return {"code": 0}
+            value = state["value"]
+            if len(sent) == 1:
+                # The first read is answered only after the write has gone through
+                await release.wait()
+            return {"code": 0, "objects": {"Server::1": value}}
+
+        client.make_encoded_request = fake_send
+        read = {"operation": "core/get", "class": "Server", "key": "SELECT Server"}
+
+        async def run():
+            stale = asyncio.ensure_future(client.make_request(read))
+            while not sent:
+                await asyncio.sleep(0)
+            await client.make_request({"operation": "core/update", "class": "Server", "key": 1, "fields": {}})
+            # Joining the in-flight read would wait on the release below, so bound it
+            fresh = await asyncio.wait_for(client.make_request(read), 1)
+            release.set()
+            return await stale, fresh, await client.make_request(read)
+
+        stale, fresh, repeat = asyncio.run(run())
+        assert stale["objects"]["Server::1"] == "old"
+        assert fresh["objects"]["Server::1"] == "new" and repeat is fresh
+        assert len(sent) == 3
+
+    def test_read_during_write_is_not_cached(self):
+        """Test that a read started while a write is on the wire is not served after the write."""
+        client = ITopClient("http://itop", "user", "secret")
+        sent = []
+        state = {"value": "old"}
+        commit = asyncio.Event()
+
+        async def fake_send(encoded_json_data):
+            sent.append(encoded_json_data)
+            if "update" in encoded_json_data:
+                # The write is committed only after a read has been answered
+                await commit.wait()
+                state["value"] = "new"
+                return {"code": 0}
+            return {"code": 0, "objects": {"Server::1": state["value"]}}
+
+        client.make_encoded_request = fake_send
+        read = {"operation": "core/get", "class": "Server", "key": "SELECT Server"}
+
+        async def run():
+            write = asyncio.ensure_future(
+                client.make_request({"operation": "core/update", "class": "Server", "key": 1, "fields": {}}))
+            while not sent:
+                await asyncio.sleep(0)
+            during = await client.make_request(read)
+            commit.set()
+            await write
+            return during, await client.make_request(read)
+
+        during, after = asyncio.run(run())
+        assert during["objects"]["Server::1"] == "old"
+        assert after["objects"]["Server::1"] == "new"
+        assert len(sent) == 3
+
+
+class TestBoundedCache:
+    """Unit tests for the shared bounded cache."""
+
+    def test_evicts_oldest_and_refreshes_rewritten_keys(self):
+        """Test that a full cache drops its oldest entry and a re-put key becomes the newest."""
+        cache = _BoundedCache(2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.put("a", 3)
+        cache.put("c", 4)
+        assert cache == {"a": 3, "c": 4}
+
+
+class TestGroupedResults:
+    """Unit tests for grouped result formatting."""
+
+    def test_groups_and_counts(self):
+        """Test that objects are bucketed, counted and sorted by group value."""
+        objects = {
+            f"UserRequest::{i}": {"code": 0, "fields": {"ref": f"R-{i}", "status": status}}
+            for i, status in enumerate(["new", "closed", "new", "assigned"])
+        }
+        objects["UserRequest::9"] = {"code": 1, "fields": {"status": "new"}}
+        output = SmartGroupingEngine.format_grouped_results(objects, "status", "UserRequest")
+
+        assert output.index("## **assigned** (1 items)") < output.index("## **closed** (1 items)")
+        assert "## **new** (2 items)" in output
+        assert "1. **R-0** (Status: new)" in output
+
+    def test_truncates_large_groups(self):
+        """Test that only the first five items of a group are listed."""
+        objects = {f"Server::{i}": {"code": 0, "fields": {"name": f"srv{i}"}} for i in range(8)}
+        output = SmartGroupingEngine.format_grouped_results(objects, "org_name", "Server")
+
+        assert "## **Unknown** (8 items)" in output
+        assert "5. **srv4**" in output and "srv5" not in output
+        assert "... and 3 more items" in output
+
+
+class TestQueryBuilder:
+    """Unit tests for OQL generation from filters."""
+
+    def test_operators(self):
+        """Test the condition template for each operator."""
+        filters = [
+            {"field": "status", "operator": "IN", "values": ["new", "assigned"]},
+            {"field": "title", "operator": "LIKE", "value": "%vpn%"},
+            {"field": "start_date", "operator": ">=", "value": "2024-01-01"}
+        ]
+        assert SmartQueryBuilder.build_oql_query("UserRequest", filters) == (
+            "SELECT UserRequest WHERE status IN ('new', 'assigned') "
+            "AND title LIKE '%vpn%' AND start_date >= '2024-01-01'"
+        )
+
+    def test_merged_in_filters(self):
+        """Test that IN filters on the same field are merged and deduplicated."""
+        filters = [
+            {"field": "priority", "operator": "IN", "values": ["1"]},
+            {"field": "priority", "operator": "IN", "values": ["1"]}
+        ]
+        assert SmartQueryBuilder.build_oql_query("Incident", filters) == "SELECT Incident WHERE priority = '1'"
+        assert SmartQueryBuilder.build_oql_query("Server", []) == "SELECT Server"
+
+    def test_escapes_literals(self):
+        """Test that quotes and backslashes in values are escaped for OQL."""
+        filters = [
+            {"field": "org_name", "operator": "=", "value": "L'Oréal"},
+            {"field": "team_name", "operator": "IN", "values": ["R&D", "Ops\\EU"]}
+        ]
+        assert SmartQueryBuilder.build_oql_query("Ticket", filters) == (
+            "SELECT Ticket WHERE org_name = 'L\\'Oréal' AND team_name IN ('R&D', 'Ops\\\\EU')"
+        )
+
+    def test_cache_keeps_types_apart(self):
+        """Test that cached queries are keyed on value types and ignore display names."""
+        assert SmartQueryBuilder.build_oql_query("Server", [{"field": "cpu", "operator": ">", "value": 1}]) == "SELECT Server WHERE cpu > '1'"
+        assert SmartQueryBuilder.build_oql_query("Server", [{"field": "cpu", "operator": ">", "value": True}]) == "SELECT Server WHERE cpu > 'True'"
+        first = SmartQueryBuilder.build_oql_query("Server", [{"field": "name", "operator": "=", "value": "a", "display_name": "x"}])
+        assert SmartQueryBuilder.build_oql_query("Server", [{"field": "name", "operator": "=", "value": "a", "display_name": "y"}]) is first
+
+    def test_scalar_dialect_cached_separately(self):
+        """Test that the scalar-only dialect escapes values and does not share cache entries."""
+        filters = [{"field": "title", "operator": "=", "value": "it's"},
+                   {"field": "status", "operator": "IN", "values": ["x", "y"]}]
+        assert SmartQueryBuilder.build_scalar_oql_query("Incident", filters) == "SELECT Incident WHERE title = 'it\\'s'"
+        assert SmartQueryBuilder.build_oql_query("Incident", filters) == "SELECT Incident WHERE title = 'it\\'s' AND status IN ('x', 'y')"
+
+    def test_scalar_dialect_skips_extracted_in_filters(self):
+        """Test that IN filters from the filter engine are skipped, not looked up by "value"."""
+        filters = SmartFilterEngine.extract_filters("p1 and p2 incidents", "Incident")
+        assert [f["operator"] for f in filters] == ["IN"]
+        assert SmartQueryBuilder.build_scalar_oql_query("Incident", filters) == "SELECT Incident"
+
+
+class TestFilterExtraction:
+    """Unit tests for filter extraction from natural language."""
+
+    def test_priority_order(self):
+        """Test that multiple priorities keep mapping order in values and display name."""
+        filters = SmartFilterEngine.extract_filters("p2 and p1 requests", "UserRequest")
+        assert filters == [{"field": "priority", "operator": "IN", "values": ["1", "2"], "display_name": "p1/p2 priority"}]
+
+    def test_synonyms_collapse(self):
+        """Test that terms naming the same priority produce a single equality filter."""
+        filters = SmartFilterEngine.extract_filters("urgent critical incidents", "Incident")
+        assert filters == [{"field": "priority", "operator": "=", "value": "1", "display_name": "critical/urgent priority"}]
+        assert SmartFilterEngine.extract_filters("x", "Incident") == []
+
+
+class TestIntentParsing:
+    """Unit tests for query intent detection."""
+
+    def test_sla_comparison(self):
+        """Test SLA comparison detection and its keyword prefilter."""
+        assert _is_sla_comparison("support tickets closed on time vs not closed on time based on sla")
+        assert _is_sla_comparison("sla met vs sla missed")
+        assert not _is_sla_comparison("requests with sla issues")
+        assert not _is_sla_comparison("closed vs not closed requests")
+
+    def test_shared_keywords_set_every_list(self):
+        """Test that a keyword listed for several intents triggers each of them."""
+        intent = UserRequestHandler(client=None).parse_query_intent("latest requests group by sla")
+        assert (intent["action"], intent["ordering"], intent["sla_analysis"]) == ("stats", "start_date DESC", True)
+        assert TicketHandler(client=None).parse_query_intent("tickets group by org")["action"] == "group"
+        assert UserRequestHandler(client=None).parse_query_intent("compare count of requests")["action"] == "compare"
+
+    def test_cached_intent_is_copied(self):
+        """Test that repeated parses return independent copies of the cached intent."""
+        handler = PCHandler(client=None)
+        first = handler._parse_query_intent("count laptops in production")
+        first["filters"].append({"field": "name", "operator": "=", "value": "x"})
+        first["filters"][0]["value"] = "changed"
+
+        second = handler._parse_query_intent("count laptops in production")
+        assert second["action"] == "count"
+        assert {"field": "name", "operator": "=", "value": "x"} not in second["filters"]
+        assert all(f["value"] != "changed" for f in second["filters"] if "value" in f)
+
+        # Nested value lists are copied too, so they never leak into the caches or static tables
+        handler._parse_query_intent("active pcs")["filters"][0]["values"].append("obsolete")
+        assert handler._parse_query_intent("active pcs")["filters"][0]["values"] == ["stock", "implementation", "production"]
+        UserRequestHandler(client=None).parse_query_intent("p1 and p2 requests")["filters"][0]["values"].append("9")
+        SmartFilterEngine.extract_filters("p1 and p2 requests", "UserRequest")[0]["values"].append("8")
+        assert UserRequestHandler(client=None).parse_query_intent("p1 and p2 requests")["filters"][0]["values"] == ["1", "2"]
+        assert SmartFilterEngine.extract_filters("p1 and p2 requests", "UserRequest")[0]["values"] == ["1", "2"]
+
+    def test_grouping_follows_priority_not_position(self):
+        """Test that the earliest-listed grouping phrase wins wherever it appears in the query."""
+        handler = PCHandler(client=None)
+        assert handler._detect_grouping("pcs by team then by organization") == "org_name"
+        assert handler._detect_grouping("pcs by operating system") == "osfamily_name"
+        assert handler._detect_grouping("pcs in production") is None
+
+    def test_pc_criticality_order_is_stable(self):
+        """Test that several criticalities are listed in table order, not set order."""
+        filters = PCHandler(client=None)._extract_filters("low or critical pcs")
+        assert filters == [{"field": "business_criticity", "operator": "IN", "values": ["critical", "low"],
+                            "display_name": "critical/low criticality"}]
+
+    def test_pc_quoted_filters_keep_order(self):
+        """Test that quoted PC filters keep their fixed order and the first value per field."""
+        filters = PCHandler(client=None)._extract_filters('pcs for team "ops" at location "paris" in team "dev"')
+        assert [(f["field"], f["value"]) for f in filters] == [("location_name", "%paris%"), ("owner_friendlyname", "%ops%")]
+
+
+class FakeClient:
+    """Records operations and answers them with a canned result."""
+
+    def __init__(self, respond):
+        self.respond = respond
+        self.operations = []
+
+    async def make_request(self, operation):
+        self.operations.append(operation)
+        return self.respond(operation)
+
+    async def make_requests_batch(self, operations):
+        return [await self.make_request(operation) for operation in operations]
+
+
+class TestComparisonBuckets:
+    """Unit tests for counting comparison buckets."""
+
+    COMPARISONS = [
+        ("closed", [{"field": "status", "operator": "=", "value": "closed"}]),
+        ("open", [{"field": "status", "operator": "IN", "values": ["new", "assigned"]}])
+    ]
+
+    def test_single_union_query(self):
+        """Test that a complete union result is bucketed client-side in one request."""
+        statuses = ["closed", "new", "assigned", "closed", "closed"]
+        objects = {f"UserRequest::{i}": {"code": 0, "fields": {"id": str(i), "status": status}} for i, status in enumerate(statuses)}
+        client = FakeClient(lambda op: {"code": 0, "message": "Found: 5", "objects": objects})
+        handler = SmartHandlerBase(client, "UserRequest")
+
+        oqls, results = asyncio.run(handler._count_comparison_buckets(self.COMPARISONS, "id,status", 100))
+        assert results == {"closed": 3, "open": 2}
+        assert oqls["open"] == "SELECT UserRequest WHERE status IN ('new', 'assigned')"
+        assert [op["key"] for op in client.operations] == [
+            "SELECT UserRequest WHERE (status = 'closed') OR (status IN ('new', 'assigned'))"
+        ]
+
+    def test_truncated_union_falls_back(self):
+        """Test that a truncated union result falls back to one count query per bucket."""
+        objects = {f"UserRequest::{i}": {"code": 0, "fields": {"id": str(i), "status": "closed"}} for i in range(3)}
+        client = FakeClient(lambda op: {"code": 0, "message": "Found: 42", "objects": objects})
+        handler = SmartHandlerBase(client, "UserRequest")
+
+        _, results = asyncio.run(handler._count_comparison_buckets(self.COMPARISONS, "id,status", 3))
+        assert results == {"closed": 42, "open": 42}
+        assert len(client.operations) == 3
+
+    def test_fallback_without_message(self):
+        """Test that buckets answered without a message are counted from the returned rows."""
+        objects = {f"UserRequest::{i}": {"code": 0, "fields": {"id": str(i), "status": "closed"}} for i in range(2)}
+        client = FakeClient(lambda op: {"code": 0, "message": "", "objects": objects})
+        handler = SmartHandlerBase(client, "UserRequest")
+
+        _, results = asyncio.run(handler._count_comparison_buckets(self.COMPARISONS, "id,status", 2))
+        assert results == {"closed": 2, "open": 2}
+
+
+class TestSchemaProbe:
+    """Unit tests for the UserRequest schema probe."""
+
+    def test_probe_runs_once_alongside_query(self):
+        """Test that the schema probe is shared and overlaps with the data query."""
+        record = {"code": 0, "fields": {"ref": "R-1", "status": "new"}}
+        client = FakeClient(lambda op: {"code": 0, "message": "Found: 1", "objects": {"UserRequest::1": record}})
+        handler = UserRequestHandler(client)
+
+        async def run():
+            results, schema = await handler.process_query_with_schema("list new requests", 10)
+            return results, schema, await handler.get_schema(include_samples=True)
+
+        results, schema, detailed = asyncio.run(run())
+        assert "R-1" in results
+        assert schema == {"field_names": ["ref", "status"], "total_fields": 2}
+        assert detailed["sample_values"] == {"ref": "R-1", "status": "new"}
+        assert [op["output_fields"] for op in client.operations].count("*+") == 1
+
+    def test_failed_probe_is_retried(self):
+        """Test that a probe that raised is not reused by the next schema request."""
+        record = {"code": 0, "fields": {"ref": "R-1"}}
+        responses = [ConnectionError("iTop unreachable"), {"code": 0, "objects": {"UserRequest::1": record}}]
+
+        def respond(op):
+            response = responses.pop(0)
+            if isinstance(response, Exception):
+                raise response
+            return response
+
+        handler = UserRequestHandler(FakeClient(respond))
+
+        async def run():
+            failed = await asyncio.gather(handler.get_schema(), return_exceptions=True)
+            return failed[0], await handler.get_schema()
+
+        failure, schema = asyncio.run(run())
+        assert isinstance(failure, ConnectionError)
+        assert schema == {"field_names": ["ref"], "total_fields": 1}
+
+    def test_itop_error_and_empty_probe_are_retried(self):
+        """Test that probes answered with an iTop error or no records are not reused."""
+        record = {"code": 0, "fields": {"ref": "R-1"}}
+        responses = [{"code": 1, "message": "Invalid login"}, {"code": 0, "objects": {}},
+                     {"code": 0, "objects": {"UserRequest::1": record}}]
+        handler = UserRequestHandler(FakeClient(lambda op: responses.pop(0)))
+
+        async def run():
+            return [await handler.get_schema() for _ in range(3)]
+
+        assert asyncio.run(run()) == [{}, {}, {"field_names": ["ref"], "total_fields": 1}]
+        assert responses == []
+
+
+class TestRecordFormatting:
+    """Unit tests for single record formatting."""
+
+    def test_people_and_org_lines(self):
+        """Test that only non-empty people and org fields are listed."""
+        handler = SmartHandlerBase(None, "UserRequest")
+        fields = {"ref": "R-1", "title": "VPN down", "status": "new", "priority": "1",
+                  "caller_name": "Ann", "agent_name": "", "org_name": "Demo", "team_name": "Helpdesk"}
+        output = handler._format_single_record(1, "UserRequest::1", {"fields": fields}, {})
+
+        assert output.startswith("1. **R-1** - VPN down\n   Status: new | Priority: 🔴 1\n")
+        assert "   👤 Caller: Ann\n" in output
+        assert "   🏢 Org: Demo | Team: Helpdesk\n" in output
+
+    def test_no_people_line(self):
+        """Test that the people line is omitted when no names are set."""
+        handler = SmartHandlerBase(None, "Incident")
+        output = handler._format_single_record(2, "Incident::2", {"fields": {"ref": "I-2"}}, {})
+        assert "👤" not in output and "🏢" not in output
+
+    def test_problem_detail_lines(self):
+        """Test that only set optional problem fields are listed, in display order."""
+        fields = {"ref": "P-1", "title": "Slow DB", "status": "new", "priority": "2",
+                  "impact": "3", "urgency": "", "service_name": "CRM"}
+        output = ProblemHandler(None)._format_detailed_results({"Problem::1": {"code": 0, "fields": fields}})
+        assert output == "1. **P-1** - Slow DB\n   Status: new\n   Priority: 🟡 2\n   Impact: 3\n   Service: CRM\n\n"
+
+    def test_detailed_ref_falls_back_to_object_key(self):
+        """Test that records without a ref are labelled with their iTop object key."""
+        objects = {
+            "Incident::7": {"code": 0, "class": "Incident", "key": "7", "fields": {"title": "Disk full"}},
+            "Incident::8": {"code": 0, "class": "Incident", "key": "8", "fields": {"ref": "I-8", "title": "VPN"}},
+        }
+        output = IncidentHandler(None)._format_detailed_results(objects)
+        assert output.startswith("1. **Incident::7** - Disk full\n")
+        assert "2. **I-8** - VPN\n" in output
+
+    def test_sla_icons(self):
+        """Test the SLA icons for passed, missed and unknown flags."""
+        handler = SmartHandlerBase(None, "UserRequest")
+        fields = {"ref": "R-1", "sla_tto_passed": "yes", "sla_ttr_passed": "unknown"}
+        output = handler._format_single_record(1, "UserRequest::1", {"fields": fields}, {"sla_analysis": True})
+        assert "   ⏰ SLA - TTO: ✅ | TTR: ❓\n" in output
+
+    def test_writes_to_any_stream(self):
+        """Test that records can be written to a stream and match the string formatter."""
+        handler = SmartHandlerBase(None, "Change")
+        obj_data = {"fields": {"ref": "C-1", "status": "planned", "outage": "yes"}}
+        stream = io.StringIO()
+        handler._write_single_record(stream.write, 3, "Change::1", obj_data, {})
+
+        assert stream.getvalue() == handler._format_single_record(3, "Change::1", obj_data, {})
+        assert "⚠️ Planned Outage: Yes" in stream.getvalue()
+
+    def test_ticket_type_groups(self):
+        """Test that generic Ticket results are grouped by final class in first-seen order."""
+        handler = SmartHandlerBase(None, "Ticket")
+        objects = {
+            "Ticket::1": {"code": 0, "fields": {"ref": "I-1", "finalclass": "Incident"}},
+            "Ticket::2": {"code": 0, "fields": {"ref": "R-2", "finalclass": "UserRequest"}},
+            "Ticket::3": {"code": 0, "fields": {"ref": "I-3", "finalclass": "Incident"}},
+            "Ticket::4": {"code": 1, "fields": {"ref": "X-4", "finalclass": "Change"}}
+        }
+        output = handler._format_detailed_results(objects, {})
+
+        assert output.index("### Incident (2)") < output.index("### UserRequest (1)")
+        assert "2. **I-3**" in output and "Change" not in output